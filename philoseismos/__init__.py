@@ -6,4 +6,6 @@ e-mail: io.dubrovin@icloud.com """
 from philoseismos.segy.segy import SegY
 
 from philoseismos.models.hlm import HorizontallyLayeredMedium
+from philoseismos.models.ensemble import HLMEnsemble
+from philoseismos.models.section import VsSection
 from philoseismos.dispersion.rdc import RayleighDispersionCurve
@@ -0,0 +1,173 @@
+""" philoseismos: engineering seismologist's toolbox.
+
+This file defines ForwardCache - a content-addressed cache for forward-modelled dispersion curves.
+
+author: Ivan Dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import os
+import hashlib
+import tempfile
+from collections import OrderedDict
+
+import numpy as np
+
+from philoseismos.dispersion.rayleigh import rayleigh_phase_velocities
+
+
+class ForwardCache:
+    """ This object caches forward-modelled phase velocities, keyed by a hash of the inputs.
+
+    The cache has two tiers: a small LRU dictionary in memory and, optionally, a directory on
+    the disk. Files are written atomically (to a temporary file, then renamed), and missing or
+    broken files are treated as misses, so several processes can share the same directory.
+    When the directory grows above max_bytes, the least recently used files are removed.
+
+    """
+
+    def __init__(self, directory=None, *, max_bytes=2 ** 30, memory_items=1024):
+        """ Create a new ForwardCache.
+
+        Args:
+            directory: Directory for the persistent tier. If None, only the memory tier is used.
+            max_bytes: Maximum size of the persistent tier in bytes.
+            memory_items: Maximum number of results kept in memory.
+
+        """
+
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.memory_items = memory_items
+
+        self._memory = OrderedDict()
+        self._written = 0  # bytes written since the size of the directory was last checked
+
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(freqs, vp, vs, rho, h, modes=1, cs=None):
+        """ Return a stable hash of the forward problem's inputs. """
+
+        sha = hashlib.sha1()
+        sha.update(f'rayleigh:{int(modes)}:{len(h)}'.encode())
+
+        for array in (freqs, vp, vs, rho, h, () if cs is None else cs):
+            array = np.ascontiguousarray(array, dtype='<f8')
+            sha.update(str(array.size).encode())
+            sha.update(array.tobytes())
+
+        return sha.hexdigest()
+
+    def get(self, key):
+        """ Return a copy of the cached result or None.
+
+        The memory tier keeps its own arrays, so changing a result does not change the cache.
+
+        """
+
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key].copy()
+
+        if self.directory is None:
+            return None
+
+        path = self._path(key)
+
+        try:
+            value = np.load(path)
+            os.utime(path)  # mark as recently used
+        except (OSError, ValueError):
+            return None
+
+        self._remember(key, value)
+
+        return value.copy()
+
+    def put(self, key, value):
+        """ Store a copy of the result in both tiers. """
+
+        value = np.array(value)
+        self._remember(key, value)
+
+        if self.directory is None:
+            return
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        fd, temp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, value)
+            os.replace(temp, path)
+        finally:
+            # the temporary file is left only if it could not be written
+            if os.path.exists(temp):
+                os.unlink(temp)
+
+        # checking the size of the directory requires a scan, so it is done only occasionally
+        self._written += value.nbytes
+        if self._written > self.max_bytes / 16:
+            self.evict()
+
+    def evict(self):
+        """ Remove the least recently used files until the directory fits into max_bytes. """
+
+        self._written = 0
+
+        entries = []
+        for sub in os.scandir(self.directory):
+            if sub.is_dir():
+                for entry in os.scandir(sub.path):
+                    if entry.name.endswith('.npy'):
+                        try:
+                            stat = entry.stat()
+                        except OSError:  # removed by another process
+                            continue
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+            total -= size
+
+    def rayleigh_phase_velocities(self, freqs, vp, vs, rho, h, *, modes=1, cs=None):
+        """ Same as dispersion.rayleigh.rayleigh_phase_velocities, but cached. """
+
+        key = self.key(freqs, vp, vs, rho, h, modes, cs)
+        value = self.get(key)
+
+        if value is None:
+            value = rayleigh_phase_velocities(freqs, vp, vs, rho, h, modes=modes, cs=cs)
+            self.put(key, value)
+
+        return value
+
+    def _remember(self, key, value):
+        """ Put the value into the memory tier, forgetting the least recently used one. """
+
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _path(self, key):
+        # files are spread between subdirectories to keep the directories small
+        return os.path.join(self.directory, key[:2], key + '.npy')
+
+    def __getstate__(self):
+        # the memory tier is not sent to other processes
+        state = self.__dict__.copy()
+        state['_memory'] = OrderedDict()
+        return state
@@ -0,0 +1,169 @@
+""" philoseismos: engineering seismologist's toolbox.
+
+This file contains functions for automatic picking of dispersion curves from dispersion images.
+
+author: Ivan Dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import numpy as np
+
+from philoseismos.dispersion.rdc import RayleighDispersionCurve
+from philoseismos.processing.spectra import dispersion_image_of_dm, dispersion_image_axes
+
+
+def pick_dispersion_curves(images, freqs, cs, *, modes=1, f_min=None, f_max=None, threshold=0.3,
+                           max_jump=0.1, separation=0.1):
+    """ Pick modal dispersion curves from a batch of dispersion images at once.
+
+    Ridges are picked as local maxima of the amplitude along the phase velocity axis. Each mode
+    starts at the frequency where its strongest maximum is, and is traced towards both ends of
+    the frequency range, moving at most max_jump from the previous pick at every step. A mode
+    ends where no maximum is found within this window. The picks are refined by fitting
+    a parabola through the maximum and its neighbours.
+
+    Args:
+        images: Dispersion images with shape (phase velocity, frequency), or a stack of them with
+            shape (image, phase velocity, frequency). Complex images are used by absolute value.
+        freqs: Frequencies of the columns.
+        cs: Equally spaced phase velocities of the rows, in any order.
+        modes: Number of modes to pick. Every next mode is picked above the previous one.
+        f_min: Minimum frequency to pick. By default, all frequencies except 0 Hz are used.
+        f_max: Maximum frequency to pick.
+        threshold: Maxima weaker than this fraction of the strongest one at the same frequency
+            are ignored.
+        max_jump: Maximum relative change of the phase velocity between adjacent frequencies.
+        separation: Minimum relative difference between the phase velocities of adjacent modes.
+
+    Returns:
+        A RayleighDispersionCurve for every image, or a single one if a single image is given.
+            Frequencies where a mode is not picked are NaN.
+
+    """
+
+    images = np.asarray(images)
+    single = images.ndim == 2
+    amps = np.abs(images[None] if single else images)
+
+    freqs = np.asarray(freqs, dtype=float)
+    cs = np.asarray(cs, dtype=float)
+
+    # work with phase velocities in ascending order
+    if cs[0] > cs[-1]:
+        cs, amps = cs[::-1], amps[:, ::-1]
+
+    selected = (freqs > 0) if f_min is None else (freqs >= f_min)
+    if f_max is not None:
+        selected &= freqs <= f_max
+    freqs, amps = freqs[selected], amps[:, :, selected]
+
+    peaks = _local_maxima(amps, threshold)
+
+    curves = np.full((amps.shape[0], modes, freqs.size), np.nan)
+    floor = np.zeros((amps.shape[0], freqs.size))  # phase velocities to pick the next mode above
+
+    for m in range(modes):
+        available = np.where(cs[:, None] > floor[:, None, :], peaks, 0)
+        picks = _trace_ridges(available, cs, max_jump)
+        curves[:, m] = _refine(amps, picks, cs)
+
+        # the next mode can only be where the current one is
+        floor = np.where(np.isnan(curves[:, m]), np.inf, curves[:, m] * (1 + separation))
+
+    out = [RayleighDispersionCurve(freqs.copy(), picked) for picked in curves]
+
+    return out[0] if single else out
+
+
+def pick_dispersion_curves_of_dms(data_matrices, *, c_max=1200, c_min=1, c_step=1, f_max=150, **kwargs):
+    """ Compute dispersion images for every Data Matrix and pick the curves from them.
+
+    The Data Matrices must have the same number of samples and the same sample interval.
+    Keyword arguments other than those of dispersion_image_of_dm are passed to
+    pick_dispersion_curves.
+
+    Returns:
+        A list of RayleighDispersionCurve objects, one for every Data Matrix.
+
+    """
+
+    images = np.stack([np.abs(dispersion_image_of_dm(dm, c_max, c_min, c_step, f_max))
+                       for dm in data_matrices])
+    freqs, cs = dispersion_image_axes(data_matrices[0], c_max, c_min, c_step, f_max)
+
+    return pick_dispersion_curves(images, freqs, cs, **kwargs)
+
+
+def _local_maxima(amps, threshold):
+    """ Return the amplitudes of the local maxima along the phase velocity axis, zero elsewhere. """
+
+    inner = amps[:, 1:-1]
+    is_peak = (inner > amps[:, :-2]) & (inner >= amps[:, 2:])
+
+    # amplitudes are compared with the strongest one at the same frequency
+    strongest = amps.max(axis=1, keepdims=True)
+    is_peak &= inner >= threshold * strongest
+    is_peak &= inner > 0
+
+    peaks = np.zeros_like(amps)
+    peaks[:, 1:-1] = np.where(is_peak, inner, 0)
+
+    return peaks
+
+
+def _trace_ridges(peaks, cs, max_jump):
+    """ Trace a ridge in each stack of the peaks, return indices of the phase velocities or -1. """
+
+    n, _, nf = peaks.shape
+    images = np.arange(n)
+    picks = np.full((n, nf), -1)
+
+    # start at the strongest peak of every image
+    strongest = peaks.max(axis=1)
+    start = strongest.argmax(axis=1)
+    found = strongest[images, start] > 0
+    first = peaks[images, :, start].argmax(axis=1)
+    picks[images[found], start[found]] = first[found]
+
+    for direction in (1, -1):
+        current = first.copy()
+        alive = found.copy()
+
+        for step in range(1, nf):
+            column = start + direction * step
+            alive &= (column >= 0) & (column < nf)
+            if not alive.any():
+                break
+
+            column = np.clip(column, 0, nf - 1)
+            candidates = peaks[images, :, column]
+
+            # only the peaks close to the previous pick are considered
+            previous = cs[current][:, None]
+            candidates = np.where(np.abs(cs - previous) <= max_jump * previous, candidates, 0)
+
+            best = candidates.argmax(axis=1)
+            alive &= candidates[images, best] > 0
+
+            picks[images[alive], column[alive]] = best[alive]
+            current = np.where(alive, best, current)
+
+    return picks
+
+
+def _refine(amps, picks, cs):
+    """ Return the phase velocities of the picks refined by parabolic interpolation. """
+
+    n, nc, nf = amps.shape
+    picked = picks >= 0
+
+    j = np.clip(picks, 1, nc - 2)
+    images, columns = np.meshgrid(np.arange(n), np.arange(nf), indexing='ij')
+    left = amps[images, j - 1, columns]
+    center = amps[images, j, columns]
+    right = amps[images, j + 1, columns]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        shift = 0.5 * (left - right) / (left - 2 * center + right)
+    shift = np.where(np.isfinite(shift), np.clip(shift, -0.5, 0.5), 0)
+
+    return np.where(picked, cs[j] + shift * (cs[1] - cs[0]), np.nan)
@@ -0,0 +1,363 @@
+""" philoseismos: engineering seismologist's toolbox.
+
+This file defines functions to compute phase velocities of Rayleigh waves in horizontally
+layered media.
+
+The dispersion function is computed with the delta-matrix (Dunkin's compound matrix) recursion:
+a vector of five 2x2 minors is propagated from the half-space up to the free surface through
+the compound layer matrices, and its first element vanishes at the phase velocities of the
+modes. Exponentially growing terms are factored out of the layer matrices and the vector is
+normalized before every layer, which only scales the function by positive factors. So every
+element stays bounded, and the sign of the function only changes at the roots, which makes
+them easy to bracket on a grid of trial velocities.
+
+author: Ivan Dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import numpy as np
+
+# number of points evaluated at a time, to bound the memory usage
+POINTS_PER_CHUNK = 8192
+
+# number of steps between the trial velocities used to bracket the roots by default
+TRIAL_STEPS = 100
+
+
+def dispersion_function(freqs, cs, vp, vs, rho, h):
+    """ Return the Rayleigh wave dispersion function, normalized to stay bounded.
+
+    Args:
+        freqs: Frequencies in Hz.
+        cs: Trial phase velocities in m/s, broadcastable with freqs.
+        vp, vs, rho: Parameters of the layers from top to bottom, the half-space is the last.
+        h: Thicknesses of the layers from top to bottom (without the half-space).
+
+    Returns:
+        An array with the broadcast shape of freqs and cs. It is continuous in the phase
+            velocity and is zero at the phase velocities of the modes.
+
+    Notes:
+        Phase velocities should not exceed the S-wave velocity of the half-space.
+
+    """
+
+    freqs, cs = np.broadcast_arrays(np.asarray(freqs, dtype=float), np.asarray(cs, dtype=float))
+    vp, vs, rho, h = (np.asarray(a, dtype=float)[np.newaxis] for a in (vp, vs, rho, h))
+
+    models = np.zeros(cs.size, dtype=int)
+
+    return _evaluate(freqs.ravel(), cs.ravel(), models, vp, vs, rho, h).reshape(cs.shape)
+
+
+def secular_function_sign(freqs, cs, vp, vs, rho, h):
+    """ Return the sign of the Rayleigh wave dispersion function, see dispersion_function.
+
+    Returns:
+        An array of -1, 0, or 1 with the broadcast shape of freqs and cs.
+
+    """
+
+    return np.sign(dispersion_function(freqs, cs, vp, vs, rho, h))
+
+
+def rayleigh_phase_velocities(freqs, vp, vs, rho, h, *, modes=1, cs=None, tol=1e-6):
+    """ Compute phase velocities of Rayleigh wave modes.
+
+    Args:
+        freqs: Frequencies in Hz.
+        vp, vs, rho: Parameters of the layers from top to bottom, the half-space is the last.
+        h: Thicknesses of the layers from top to bottom (without the half-space).
+        modes: Number of modes to compute, the fundamental one included.
+        cs: Trial phase velocities used to bracket the roots, in ascending order. By default,
+            TRIAL_STEPS steps from 0.7 of the lowest S-wave velocity to the S-wave velocity
+            of the half-space.
+        tol: Relative tolerance of the phase velocities.
+
+    Returns:
+        A (modes, freqs.size) array of phase velocities, NaN where a mode does not exist.
+
+    """
+
+    vp, vs, rho, h = (np.asarray(a, dtype=float)[np.newaxis] for a in (vp, vs, rho, h))
+
+    return batch_rayleigh_phase_velocities(freqs, vp, vs, rho, h, modes=modes, cs=cs, tol=tol)[0]
+
+
+def batch_rayleigh_phase_velocities(freqs, vp, vs, rho, h, *, modes=1, cs=None, tol=1e-6):
+    """ Compute phase velocities of Rayleigh wave modes for many models with the same number of
+    layers at once.
+
+    The dispersion function is evaluated on the (model, frequency, velocity) lattice at once,
+    and the roots are bracketed by the sign changes along the velocity axis. Only the brackets
+    of the requested modes are kept, and each of them is refined separately with the Illinois
+    variant of regula falsi, all of them in the same vectorized iterations. So the models share
+    the cost of the Python calls, which makes this much faster than a loop over them.
+
+    Args:
+        freqs: Frequencies in Hz.
+        vp, vs, rho: (n_models, n_layers + 1) arrays of the parameters of the layers from top
+            to bottom, the half-space is the last.
+        h: A (n_models, n_layers) array of the thicknesses of the layers from top to bottom.
+        modes: Number of modes to compute, the fundamental one included.
+        cs: Trial phase velocities used to bracket the roots, in ascending order, the same for
+            all the models or a (n_models, n) array of them. Velocities above the S-wave
+            velocity of the half-space of a model are skipped. By default, TRIAL_STEPS
+            steps from 0.7 of the lowest S-wave velocity to the S-wave velocity of the
+            half-space of every model.
+        tol: Relative tolerance of the phase velocities.
+
+    Returns:
+        A (n_models, modes, freqs.size) array of phase velocities, NaN where a mode does not
+            exist.
+
+    """
+
+    freqs = np.asarray(freqs, dtype=float).ravel()
+    vp, vs, rho, h = (np.asarray(a, dtype=float) for a in (vp, vs, rho, h))
+    n_models = vp.shape[0]
+
+    if cs is None:
+        cs = np.linspace(0.7 * vs.min(axis=1), vs[:, -1], TRIAL_STEPS + 1, axis=1)
+    else:
+        cs = np.asarray(cs, dtype=float)
+        cs = np.broadcast_to(cs, (n_models, cs.shape[-1]))
+
+    out = np.full(shape=(n_models, modes, freqs.size), fill_value=np.nan)
+
+    if cs.shape[1] == 0:
+        return out
+
+    # every row of the lattice is a (model, frequency) pair
+    model, freq = np.divmod(np.arange(n_models * freqs.size), freqs.size)
+    grid = cs[model]
+    values = _evaluate(np.repeat(freqs[freq], grid.shape[1]), grid.ravel(), np.repeat(model, grid.shape[1]),
+                       vp, vs, rho, h).reshape(grid.shape)
+    values[grid > vs[model, -1, np.newaxis]] = np.nan
+
+    rows, lo, hi, f_lo, f_hi = _scan(grid, values)
+
+    # the n-th bracket of a row holds the n-th mode, the brackets are sorted by rows and velocities
+    mode = np.arange(rows.size) - np.searchsorted(rows, rows, side='left')
+    keep = mode < modes
+    rows, lo, hi, f_lo, f_hi, mode = rows[keep], lo[keep], hi[keep], f_lo[keep], f_hi[keep], mode[keep]
+
+    out[model[rows], mode, freq[rows]] = _refine(freqs[freq[rows]], model[rows], lo, hi, f_lo, f_hi, tol,
+                                                 vp, vs, rho, h)
+
+    return out
+
+
+def _scan(grid, values):
+    """ Find the brackets of the roots along the rows of the lattice.
+
+    Returns:
+        Arrays of the rows, the low and the high ends of the brackets, and the values at them,
+            sorted by rows and velocities. The roots right at the trial velocities are brackets
+            of zero width.
+
+    """
+
+    signs = np.sign(values)
+
+    with np.errstate(invalid='ignore'):
+        rows, j = np.nonzero((signs[:, :-1] * signs[:, 1:] < 0) | (signs[:, :-1] == 0))
+
+    exact = signs[rows, j] == 0
+    lo, f_lo = grid[rows, j], values[rows, j]
+    hi, f_hi = np.where(exact, lo, grid[rows, j + 1]), np.where(exact, 0, values[rows, j + 1])
+
+    return rows, lo, hi, f_lo, f_hi
+
+
+def _refine(freqs, models, lo, hi, f_lo, f_hi, tol, vp, vs, rho, h):
+    """ Refine the brackets of the roots with the Illinois algorithm, a bracketing secant method.
+
+    When the same end of a bracket is kept twice in a row, the value at the other end is
+    halved, so that the brackets shrink from both sides at a superlinear rate.
+
+    """
+
+    lo, hi, f_lo, f_hi = lo.copy(), hi.copy(), f_lo.copy(), f_hi.copy()
+    side = np.zeros(lo.size, dtype=int)  # which end was replaced the last time, -1 or 1
+
+    # a bracket is done when it is narrow enough or its secant point is a root
+    active = np.nonzero((hi - lo) > tol * hi)[0]
+
+    for _ in range(100):
+        if not active.size:
+            break
+
+        a, b, fa, fb, last = lo[active], hi[active], f_lo[active], f_hi[active], side[active]
+        x = (a * fb - b * fa) / (fb - fa)
+
+        # fall back to bisection where the secant point is not strictly inside the bracket
+        x = np.where((x > a) & (x < b), x, (a + b) / 2)
+        fx = _evaluate(freqs[active], x, models[active], vp, vs, rho, h)
+
+        to_lo = np.sign(fx) == np.sign(fa)
+        to_hi = np.sign(fx) == np.sign(fb)
+        root = fx == 0
+
+        lo[active] = np.where(to_lo | root, x, a)
+        hi[active] = np.where(to_hi | root, x, b)
+        f_lo[active] = np.where(to_lo, fx, np.where(to_hi & (last == 1), fa / 2, fa))
+        f_hi[active] = np.where(to_hi, fx, np.where(to_lo & (last == -1), fb / 2, fb))
+        side[active] = np.where(to_lo, -1, np.where(to_hi, 1, 0))
+
+        active = active[(hi[active] - lo[active]) > tol * hi[active]]
+
+    return (lo + hi) / 2
+
+
+def _evaluate(freqs, cs, models, vp, vs, rho, h):
+    """ Return the dispersion function at the points, for the models of the given indices.
+
+    The parameters of the layers are (n_models, n_layers) arrays, the points are evaluated in
+    chunks of POINTS_PER_CHUNK.
+
+    """
+
+    out = np.empty(cs.shape)
+
+    for start in range(0, cs.size, POINTS_PER_CHUNK):
+        points = slice(start, start + POINTS_PER_CHUNK)
+        m = models[points]
+        out[points] = _delta(freqs[points], cs[points], vp[m].T, vs[m].T, rho[m].T, h[m].T)
+
+    return out
+
+
+def _delta(freqs, cs, vp, vs, rho, h):
+    """ Propagate the delta-matrix vector from the half-space to the surface for every point.
+
+    The formulation follows Dunkin (1965) as implemented in the Computer Programs in
+    Seismology by R. B. Herrmann: the vector holds the 2x2 minors of the half-space
+    eigenvectors, and the compound layer matrices are written out element by element.
+
+    Returns:
+        The first element of the vector at the surface, with the vector normalized before
+            every layer.
+
+    """
+
+    omega = 2 * np.pi * freqs
+    k = omega / cs
+    k2 = k * k
+
+    # densities relative to the half-space keep the elements of the order of one
+    rho = rho / rho[-1]
+
+    ra, _ = _vertical(k, omega / vp[-1])
+    rb, _ = _vertical(k, omega / vs[-1])
+    gammk = 2 * (vs[-1] / omega) ** 2
+    gam = gammk * k2
+    gamm1 = gam - 1
+    r = rho[-1]
+
+    e = [r * r * (gamm1 * gamm1 - gam * gammk * ra * rb), -r * ra, r * (gamm1 - gammk * ra * rb), r * rb,
+         k2 - ra * rb]
+
+    for m in range(len(h) - 1, -1, -1):
+        # the positive scale does not change the sign of the function
+        scale = np.sqrt(e[0] * e[0] + e[1] * e[1] + e[2] * e[2] + e[3] * e[3] + e[4] * e[4])
+        scale[scale == 0] = 1
+        e = [v / scale for v in e]
+
+        # only the first element is needed at the surface
+        ca = _compound_matrix(k, k2, omega, vp[m], vs[m], rho[m], h[m], full=m > 0)
+        e = [e[0] * ca[0][i] + e[1] * ca[1][i] + e[2] * ca[2][i] + e[3] * ca[3][i] + e[4] * ca[4][i]
+             for i in range(len(ca[0]))]
+
+    return e[0]
+
+
+def _vertical(k, kv):
+    """ Return the absolute vertical wavenumber and whether the wave is evanescent. """
+
+    return np.sqrt(np.abs((k + kv) * (k - kv))), k > kv
+
+
+def _compound_matrix(k, k2, omega, vp, vs, rho, h, full=True):
+    """ Return Dunkin's 5x5 compound matrix of a layer as nested lists of arrays, or only its
+    first column as a 5x1 one if full is False.
+
+    Growing exponentials are factored out, so the elements are scaled by exp(-(P + Q)), where
+    P and Q are the evanescent vertical phases of the P and S waves in the layer.
+
+    """
+
+    ra, p_evanescent = _vertical(k, omega / vp)
+    rb, s_evanescent = _vertical(k, omega / vs)
+    p, q = ra * h, rb * h
+
+    cosp, w, x = _eigenfunctions(p, ra, h, p_evanescent)
+    cosq, y, z = _eigenfunctions(q, rb, h, s_evanescent)
+
+    a0 = np.exp(-(np.where(p_evanescent, p, 0) + np.where(s_evanescent, q, 0)))
+
+    cpcq, cpy, cpz = cosp * cosq, cosp * y, cosp * z
+    cqw, cqx = cosq * w, cosq * x
+    xy, xz, wy, wz = x * y, x * z, w * y, w * z
+
+    gammk = 2 * (vs / omega) ** 2
+    gam = gammk * k2
+    gamm1 = gam - 1
+    twgm1 = gam + gamm1
+    gmgmk = gam * gammk
+    gmgm1 = gam * gamm1
+    gm1sq = gamm1 * gamm1
+    rho2 = rho * rho
+    a0pq = a0 - cpcq
+
+    t = -2 * k2
+    ca = [[None] * 5 for _ in range(5)]
+
+    ca[0][0] = cpcq - 2 * gmgm1 * a0pq - gmgmk * xz - k2 * gm1sq * wy
+    ca[1][0] = (gmgmk * cpz - gm1sq * cqw) * rho
+    ca[3][0] = (gm1sq * cpy - gmgmk * cqx) * rho
+    ca[4][0] = -(2 * gmgmk * gm1sq * a0pq + gmgmk * gmgmk * xz + gm1sq * gm1sq * wy) * rho2
+    ca[4][2] = -(gammk * gamm1 * twgm1 * a0pq + gam * gammk * gammk * xz + gamm1 * gm1sq * wy) * rho
+    ca[2][0] = t * ca[4][2]
+
+    if not full:
+        return [row[:1] for row in ca]
+
+    ca[0][1] = (k2 * cpy - cqx) / rho
+    ca[0][2] = -(twgm1 * a0pq + gammk * xz + k2 * gamm1 * wy) / rho
+    ca[0][3] = (cpz - k2 * cqw) / rho
+    ca[0][4] = -(2 * k2 * a0pq + xz + k2 * k2 * wy) / rho2
+
+    ca[1][1] = cpcq
+    ca[1][2] = gammk * cpz - gamm1 * cqw
+    ca[1][3] = -wz
+    ca[1][4] = ca[0][3]
+
+    ca[3][1] = -xy
+    ca[3][2] = gamm1 * cpy - gammk * cqx
+    ca[3][3] = ca[1][1]
+    ca[3][4] = ca[0][1]
+
+    ca[4][1] = ca[3][0]
+    ca[4][3] = ca[1][0]
+    ca[4][4] = ca[0][0]
+
+    ca[2][1] = t * ca[3][2]
+    ca[2][2] = a0 + 2 * (cpcq - ca[0][0])
+    ca[2][3] = t * ca[1][2]
+    ca[2][4] = t * ca[0][2]
+
+    return ca
+
+
+def _eigenfunctions(phase, r, h, evanescent):
+    """ Return cos, sin / r and -r * sin of the vertical phase in a layer (cosh, sinh / r and
+    r * sinh for evanescent waves, divided by the exponential of the phase). """
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sin_ = np.sin(phase)
+        decay = np.exp(-2 * phase)
+
+        # sin / r goes to h where r goes to zero
+        return (np.where(evanescent, (1 + decay) / 2, np.cos(phase)),
+                np.where(evanescent, -np.expm1(-2 * phase) / (2 * r), np.where(r > 0, sin_ / r, h)),
+                np.where(evanescent, r * (1 - decay) / 2, -r * sin_))
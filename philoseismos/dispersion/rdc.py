@@ -6,14 +6,107 @@ e-mail: io.dubrovin@icloud.com """
 import numpy as np
 import pandas as pd
 
+RDCSCALC_MODES = ['Fundamental', '1st', '2nd', '3rd', '4th', '5th']
+
 
 class RayleighDispersionCurve:
+    """ This object represents modal dispersion curves of Rayleigh waves.
+
+    All the modes share the same frequencies. The phase velocities are stored in a 2D array
+    of shape (mode, frequency), with NaNs where a mode is not defined.
+
+    """
+
+    def __init__(self, freqs=None, curves=None):
+        """ Create a new Rayleigh Dispersion Curve.
+
+        Args:
+            freqs: Frequencies of the curves.
+            curves: Phase velocities, an array of shape (mode, frequency).
+
+        """
+
+        self.freqs = freqs
+        self.curves = np.empty((0, 0 if freqs is None else len(freqs))) if curves is None else curves
+
+    @property
+    def freqs(self):
+        return self._freqs
+
+    @freqs.setter
+    def freqs(self, val):
+        self._freqs = None if val is None else np.asarray(val, dtype=float)
+
+    @property
+    def curves(self):
+        return self._curves
+
+    @curves.setter
+    def curves(self, val):
+        self._curves = np.atleast_2d(np.asarray(val, dtype=float))
+
+    @property
+    def modal_curves(self):
+        """ A tuple of the modal curves, writable views of the rows of the curves array.
+
+        The values of the curves can be changed through the views, but the tuple itself can
+        not be appended to, use add_modal_curve to add a mode.
+
+        """
+
+        return tuple(self._curves)
+
+    @modal_curves.setter
+    def modal_curves(self, val):
+        if not len(val):
+            self._curves = np.empty((0, 0 if self._freqs is None else self._freqs.size))
+            return
+
+        self._curves = np.array([np.asarray(curve, dtype=float) for curve in val]).reshape(len(val), -1)
+
+    def add_modal_curve(self, curve):
+        """ Add a mode to the curves.
+
+        Args:
+            curve: Phase velocities of the mode, one for every frequency, NaNs where the mode
+                is not defined.
+
+        """
+
+        curve = np.asarray(curve, dtype=float).ravel()
+
+        if self.n_modes and curve.size != self._curves.shape[1]:
+            raise ValueError(f'The curve has {curve.size} points, but the modes have {self._curves.shape[1]}!')
 
-    def __init__(self):
-        """ Create a new Rayleigh Dispersion Image. """
+        self._curves = np.vstack([self._curves.reshape(-1, curve.size), curve])
 
-        self.freqs = None
-        self.modal_curves = []
+    @property
+    def mask(self):
+        """ A boolean array that is True where the modes are defined. """
+
+        return ~np.isnan(self._curves)
+
+    @property
+    def n_modes(self):
+        return self._curves.shape[0]
+
+    @classmethod
+    def from_points(cls, freqs, modal_curves):
+        """ Create a curve from modes with separate frequencies, using the union of the frequencies.
+
+        Args:
+            freqs: A sequence of frequency arrays, one for every mode.
+            modal_curves: A sequence of phase velocity arrays, one for every mode.
+
+        """
+
+        union = np.unique(np.concatenate(freqs)) if len(freqs) else np.empty(0)
+        curves = np.full((len(modal_curves), union.size), np.nan)
+
+        for i, (fs, cs) in enumerate(zip(freqs, modal_curves)):
+            curves[i, np.searchsorted(union, fs)] = cs
+
+        return cls(union, curves)
 
     @classmethod
     def load_from_rdcscalc(cls, file):
@@ -23,12 +116,7 @@ class RayleighDispersionCurve:
 
         out = cls()
 
-        out.modal_curves = [curves['Fundamental']]
-        out.modal_curves.append(curves['1st'])
-        out.modal_curves.append(curves['2nd'])
-        out.modal_curves.append(curves['3rd'])
-        out.modal_curves.append(curves['4th'])
-        out.modal_curves.append(curves['5th'])
+        out.modal_curves = [curves[mode] for mode in RDCSCALC_MODES]
 
         out.freqs = np.arange(0, 1500, 1) * 0.1 + 0.1
 
@@ -36,72 +124,199 @@ class RayleighDispersionCurve:
 
     @classmethod
     def load_from_radex(cls, file):
-        """ Load the DCs exported from RadExPro's MASW module. """
+        """ Load the DCs exported from RadExPro's MASW module.
 
-        with open(file, 'r') as cur:
-            cur.readline()  # skip first 2 lines
-            cur.readline()
+        The modes are stored on the union of their frequencies.
 
-            out = cls()
-            out.freqs = []
+        """
 
-            n = int(cur.readline())  # number of points in fundamental curve
+        with open(file, 'r') as cur:
+            lines = cur.read().splitlines()
 
-            fs = np.empty(n)
-            cs = np.empty(n)
+        freqs, modal_curves = [], []
 
-            for i in range(n):
-                f, c = map(float, cur.readline().split())
-                fs[i] = f
-                cs[i] = c
+        # skip first 2 lines, then the number of points in fundamental curve
+        n = int(lines[2])
+        fs, cs = _parse_points(lines[3:3 + n])
+        freqs.append(fs)
+        modal_curves.append(cs)
 
-            out.freqs.append(fs)
-            out.modal_curves.append(cs)
+        i = 3 + n
+        k = int(lines[i])  # number of additional curves
 
-            k = int(cur.readline())  # number of additional curves
+        for _ in range(k):
+            n = int(lines[i + 2])  # number of points in the curve
+            fs, cs = _parse_points(lines[i + 3:i + 3 + n])
+            freqs.append(fs)
+            modal_curves.append(cs)
+            i += 2 + n
 
-            for i in range(k):
-                cur.readline()
-                n = int(cur.readline())  # number of points in the curve
+        # the modes are picked at different frequencies, put them onto a common axis
+        return cls.from_points(freqs, modal_curves)
 
-                fs = np.empty(n)
-                cs = np.empty(n)
+    @classmethod
+    def load(cls, file):
+        """ Load the DCs saved with the save method. """
 
-                for i in range(n):
-                    f, c = map(float, cur.readline().split())
-                    fs[i] = f
-                    cs[i] = c
+        with np.load(file) as data:
+            return cls(data['freqs'], data['curves'])
 
-                out.freqs.append(fs)
-                out.modal_curves.append(cs)
+    def save(self, file):
+        """ Save the DCs into a compact binary .npz file. """
 
-        return out
+        np.savez(file, freqs=self._freqs, curves=self._curves)
 
     def export_modal_curves_for_radex(self, filename, *, sou_x=500, rec_x_0, rec_x_1):
         """ Export modal curves to a text file accepted by MASW module in RadExPro. """
 
-        fundamental = ''
-        count = 0
-        for f, c in zip(self.freqs, self.modal_curves[0]):
-            if not np.isnan(c):
-                fundamental += f'{f}\t{c}\n'
-                count += 1
-        fundamental = f'True\n{count}\n' + fundamental
-
-        higher = []
-        for curve in self.modal_curves[1:]:
-            string = ''
-            count = 0
-            for f, c in zip(self.freqs, curve):
-                if not np.isnan(c):
-                    string += f'{f}\t{c}\n'
-                    count += 1
-            string = f'True\n{count}\n' + string
-            higher.append(string)
-
         with open(filename, 'w') as txt:
             txt.write(f'{sou_x} {rec_x_0} {rec_x_1}\n')  # geometry of the survey
-            txt.write(fundamental)
 
-            txt.write(f'{len(higher)}\n')  # how many additional modal curves are in the file?
-            txt.write(''.join(higher))
+            for i in range(self.n_modes):
+                if i == 1:
+                    # how many additional modal curves are in the file?
+                    txt.write(f'{self.n_modes - 1}\n')
+
+                fs, cs = self._mode_points(i)
+                txt.write(f'True\n{fs.size}\n')
+                np.savetxt(txt, np.column_stack([fs, cs]), fmt='%s', delimiter='\t')
+
+            if self.n_modes == 1:
+                txt.write('0\n')
+
+    def export_modal_curves_for_rdcscalc(self, filename):
+        """ Export modal curves to a CSV file in the format of rdcscalc program.
+
+        Missing modes are filled with NaNs. Note that load_from_rdcscalc assumes the frequencies
+        of rdcscalc (0.1 to 150 Hz with 0.1 Hz step) and ignores the Frequency column.
+
+        """
+
+        table = np.full((self._freqs.size, 1 + len(RDCSCALC_MODES)), np.nan)
+        table[:, 0] = self._freqs
+        table[:, 1:1 + self.n_modes] = self._curves.T[:, :len(RDCSCALC_MODES)]
+
+        np.savetxt(filename, table, fmt='%.10g', delimiter=',', comments='',
+                   header=','.join(['Frequency'] + RDCSCALC_MODES))
+
+    def resample(self, freqs):
+        """ Interpolate the curves onto new frequencies.
+
+        The curves are interpolated linearly, and only between two defined points, so gaps in the
+        modes and frequencies outside of the original ones become NaNs.
+
+        Args:
+            freqs: Frequencies to interpolate the curves onto.
+
+        Returns:
+            RayleighDispersionCurve: The resampled curves.
+
+        """
+
+        freqs = np.asarray(freqs, dtype=float)
+
+        return RayleighDispersionCurve(freqs, _interpolate(self._freqs, self._curves, freqs))
+
+    def _mode_points(self, i):
+        """ Return the frequencies and the phase velocities of the defined points of the mode. """
+
+        picked = ~np.isnan(self._curves[i])
+
+        return self._freqs[picked], self._curves[i, picked]
+
+
+def stack_curves(rdcs, freqs, *, modes=None):
+    """ Resample many dispersion curves onto the same frequencies and stack them.
+
+    Args:
+        rdcs: A sequence of RayleighDispersionCurve objects.
+        freqs: Frequencies to resample the curves onto.
+        modes: Number of modes to keep. Missing modes are filled with NaNs. By default, the
+            largest number of modes among the curves.
+
+    Returns:
+        An array of shape (curve, mode, frequency).
+
+    """
+
+    freqs = np.asarray(freqs, dtype=float)
+    modes = max(rdc.n_modes for rdc in rdcs) if modes is None else modes
+
+    out = np.full((len(rdcs), modes, freqs.size), np.nan)
+
+    for i, rdc in enumerate(rdcs):
+        n = min(modes, rdc.n_modes)
+        out[i, :n] = _interpolate(rdc.freqs, rdc.curves[:n], freqs)
+
+    return out
+
+
+def curve_misfits(observed, modelled, *, missing=1.0):
+    """ Compute RMS relative misfits between stacks of curves on the same frequencies.
+
+    The arrays are broadcast against each other, so, for example, observed[:, None] and
+    modelled[None] give the misfits between every observed and every modelled curve.
+
+    Args:
+        observed: Observed phase velocities, an array of shape (..., frequency). Only the defined
+            points of the observed curves are used.
+        modelled: Modelled phase velocities, an array of shape (..., frequency).
+        missing: Relative misfit to use where a modelled curve is not defined.
+
+    Returns:
+        An array of misfits with the broadcast shape of the inputs without the last axis.
+            NaN if an observed curve has no defined points.
+
+    """
+
+    observed = np.asarray(observed, dtype=float)
+    modelled = np.asarray(modelled, dtype=float)
+
+    picked = ~np.isnan(observed)
+
+    with np.errstate(invalid='ignore'):
+        relative = (modelled - observed) / observed
+
+    relative = np.where(np.isnan(relative), missing, relative)
+    relative = np.where(picked, relative, 0)
+
+    # misfits of multimodal curves are computed over all the defined points
+    squares = np.sum(relative ** 2, axis=-1)
+    counts = np.sum(picked, axis=-1)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.sqrt(squares / counts)
+
+
+def _interpolate(freqs, curves, targets):
+    """ Interpolate the rows of the curves linearly, without crossing NaNs. """
+
+    curves = np.atleast_2d(curves)
+    out = np.full((curves.shape[0], targets.size), np.nan)
+
+    if freqs.size == 0:
+        return out
+
+    # right is the first frequency above the target, the target is at or after left
+    right = np.searchsorted(freqs, targets, side='right')
+    inside = (right > 0) & (targets <= freqs[-1])
+    left = np.clip(right - 1, 0, freqs.size - 1)
+    right = np.clip(right, 0, freqs.size - 1)
+
+    span = freqs[right] - freqs[left]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        weight = np.where(span > 0, (targets - freqs[left]) / span, 0)
+
+    # a zero weight means the target is exactly at the left point
+    values = curves[:, left] + weight * np.where(weight > 0, curves[:, right] - curves[:, left], 0)
+    out[:, inside] = values[:, inside]
+
+    return out
+
+
+def _parse_points(lines):
+    """ Parse lines of frequency and phase velocity pairs at once. """
+
+    points = np.array(' '.join(lines).split(), dtype=float).reshape(-1, 2)
+
+    return points[:, 0], points[:, 1]
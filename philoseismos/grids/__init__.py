@@ -5,3 +5,5 @@ e-mail: io.dubrovin@icloud.com """
 
 from philoseismos.grids.surfer6binary import Surfer6BinaryGrid
 from philoseismos.grids.surfer6text import Surfer6TextGrid
+from philoseismos.grids.surfer7binary import Surfer7BinaryGrid
+from philoseismos.grids.tiled import TiledGrid, mosaic
@@ -0,0 +1,52 @@
+""" philoseismos: with passion for the seismic method.
+
+This file defines general functions used in philoseismos.grids package.
+
+author: ivan dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import numpy as np
+
+# Surfer marks the blanked nodes of the grid with this value
+BLANK = 1.70141e38
+
+# number of rows processed at a time when scanning large grids
+ROWS_PER_CHUNK = 256
+
+
+def z_range(dm):
+    """ Return the minimum and the maximum value of the grid, ignoring blanks and NaNs.
+
+    Both values are computed in a single pass over the data: the rows are processed in chunks
+    that fit into the cache, so memory-mapped grids are read only once.
+
+    """
+
+    zlo, zhi = np.inf, -np.inf
+
+    for start in range(0, dm.shape[0], ROWS_PER_CHUNK):
+        chunk = np.asarray(dm[start:start + ROWS_PER_CHUNK])
+        chunk = chunk[np.isfinite(chunk)]
+        chunk = chunk[chunk < BLANK * (1 - 1e-7)]
+
+        if chunk.size:
+            zlo = min(zlo, chunk.min())
+            zhi = max(zhi, chunk.max())
+
+    if zlo > zhi:  # everything is blanked
+        return 0.0, 0.0
+
+    return float(zlo), float(zhi)
+
+
+def blank_to_nan(dm, blank=BLANK):
+    """ Replace the blanked nodes of the grid with NaNs in place. """
+
+    with np.errstate(invalid='ignore'):
+        dm[dm >= blank * (1 - 1e-7)] = np.nan
+
+
+def nan_to_blank(dm, blank=BLANK):
+    """ Return a copy of the grid with NaNs replaced by the blank value. """
+
+    return np.where(np.isnan(dm), blank, dm)
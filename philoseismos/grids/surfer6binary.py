@@ -9,9 +9,14 @@ import struct
 
 import numpy as np
 
+from philoseismos.grids import gfunc
+
 
 class Surfer6BinaryGrid:
 
+    # size of the header in bytes: ID string, nx, ny, and six doubles
+    header_size = 56
+
     def __init__(self):
         """ """
 
@@ -27,8 +32,17 @@ class Surfer6BinaryGrid:
         self.dm = None
 
     @classmethod
-    def load(cls, file):
-        """ Load the Surfer6BinaryGrid from the specified file. """
+    def load(cls, file, *, mmap=False):
+        """ Load the Surfer6BinaryGrid from the specified file.
+
+        Args:
+            file: Path to the file.
+            mmap (bool): If True, the .dm is a read-only memory map of the file instead of an
+                array in memory. The map shows the values as they are in the file, so blanked
+                nodes keep the blank value instead of being replaced with NaNs. Use
+                gfunc.blank_to_nan on copies of the parts read from it.
+
+        """
 
         with open(file, 'br') as f:
             id_ = f.read(4)
@@ -48,22 +62,37 @@ class Surfer6BinaryGrid:
             out.zlo = struct.unpack('<d', f.read(8))[0]  # minimum Z value of the grid
             out.zhi = struct.unpack('<d', f.read(8))[0]  # maximum Z value of the grid
 
-            # a matrix to hold the data
-            out.dm = np.empty(shape=(out.ny, out.nx), dtype=np.float64)
-
             # now read the rows. each row has a constant Y coordinate.
             # first row corresponds to ylo, last row corresponds to yhi.
             # within each row Z values are ordered from xlo to xhi
 
-            format_string = '<' + 'f' * out.nx
+            if not mmap:
+                values = np.fromfile(f, dtype='<f4', count=out.nx * out.ny)
+                out.dm = values.reshape(out.ny, out.nx).astype(np.float64)
+                gfunc.blank_to_nan(out.dm)
 
-            for row in range(out.ny):
-                bytes_ = f.read(out.nx * 4)
-                values = struct.unpack(format_string, bytes_)
-                out.dm[row, :] = values
+        if mmap:
+            out.dm = np.memmap(file, dtype='<f4', mode='r', offset=cls.header_size, shape=(out.ny, out.nx))
 
         return out
 
+    def save(self, file):
+        """ Save the Surfer6BinaryGrid to the specified file.
+
+        The number of nodes and the Z range are taken from the .dm, NaNs are saved as blanks.
+
+        """
+
+        self.ny, self.nx = self.dm.shape
+        self.zlo, self.zhi = gfunc.z_range(self.dm)
+
+        header = struct.pack('<4shhdddddd', b'DSBB', self.nx, self.ny,
+                             self.xlo, self.xhi, self.ylo, self.yhi, self.zlo, self.zhi)
+
+        with open(file, 'bw') as f:
+            f.write(header)
+            gfunc.nan_to_blank(self.dm).astype('<f4').tofile(f)
+
     def invert_yaxis(self):
         """ Inverts the Y axis in the DataMatrix. """
 
@@ -7,9 +7,14 @@ e-mail: io.dubrovin@icloud.com """
 
 import numpy as np
 
+from philoseismos.grids import gfunc
+
 
 class Surfer6TextGrid:
 
+    # number of characters read from the body of the file at a time
+    block_size = 2 ** 22
+
     def __init__(self):
         """ """
 
@@ -25,43 +30,145 @@ class Surfer6TextGrid:
         self.dm = None
 
     @classmethod
-    def load(cls, file):
-        """ Load the Surfer6TextGrid from the specified file. """
+    def load(cls, file, *, dtype=np.float64):
+        """ Load the Surfer6TextGrid from the specified file.
+
+        Args:
+            file: Path to the file.
+            dtype: Data type of the matrix. Use np.float32 to halve the memory footprint.
+
+        """
 
         with open(file, 'r') as f:
-            id_ = f.readline().strip()
+            out = cls._read_header(f)
+
+            # a flat buffer to hold the data. it is filled block by block
+            # and reshaped into a matrix once all the values are parsed
+            values = np.empty(shape=out.nx * out.ny, dtype=dtype)
 
-            # first 4 bytes are ID string identifying a file as Surfer 6 Text Grid
-            if id_ != 'DSAA':
-                raise ValueError('The specified file is not a Surfer 6 Text grid!')
+            # now read the rows. each row has a constant Y coordinate.
+            # first row corresponds to ylo, last row corresponds to yhi.
+            # within each row Z values are ordered from xlo to xhi
 
-            out = cls()
+            filled = 0
+            for parsed in _iter_values(f, dtype, cls.block_size):
+                n = min(parsed.size, values.size - filled)
+                values[filled:filled + n] = parsed[:n]
+                filled += n
 
-            # number of grid lines along the X and Y axes
-            out.nx, out.ny = map(int, f.readline().split())
+                if filled == values.size:
+                    break
 
-            # minimum and maximum X values of the grid
-            out.xlo, out.xhi = map(float, f.readline().split())
+        if filled < values.size:
+            raise ValueError(f'The grid is expected to have {values.size} values, found only {filled}!')
 
-            # minimum and maximum Y values of the grid
-            out.ylo, out.yhi = map(float, f.readline().split())
+        out.dm = values.reshape(out.ny, out.nx)
+        gfunc.blank_to_nan(out.dm)
 
-            # minimum and maximum Z values of the grid
-            out.zlo, out.zhi = map(float, f.readline().split())
+        return out
 
-            # a matrix to hold the data
-            out.dm = np.empty(shape=(out.ny, out.nx), dtype=np.float64)
+    def save(self, file, *, precision=17):
+        """ Save the Surfer6TextGrid to the specified file.
 
-            # now read the rows. each row has a constant Y coordinate.
-            # first row corresponds to ylo, last row corresponds to yhi.
-            # within each row Z values are ordered from xlo to xhi
+        The number of nodes and the Z range are taken from the .dm, NaNs are saved as blanks.
+
+        Args:
+            file: Path to the file.
+            precision: Number of significant digits of the values. The default 17 digits
+                restore float64 values exactly, 9 are enough for float32 ones.
+
+        """
+
+        self.ny, self.nx = self.dm.shape
+        self.zlo, self.zhi = gfunc.z_range(self.dm)
+
+        # a format string for a band of rows, so that each band is formatted in one call
+        row_format = ' '.join([f'%.{precision}g'] * self.nx) + '\n'
+
+        with open(file, 'w') as f:
+            f.write('DSAA\n')
+            f.write(f'{self.nx} {self.ny}\n')
+            f.write(f'{self.xlo} {self.xhi}\n')
+            f.write(f'{self.ylo} {self.yhi}\n')
+            f.write(f'{self.zlo} {self.zhi}\n')
+
+            for start in range(0, self.ny, gfunc.ROWS_PER_CHUNK):
+                band = gfunc.nan_to_blank(self.dm[start:start + gfunc.ROWS_PER_CHUNK])
+                f.write((row_format * band.shape[0]) % tuple(band.ravel()))
+
+    @classmethod
+    def load_header(cls, file):
+        """ Load only the header of the Surfer6TextGrid, leaving the .dm empty. """
+
+        with open(file, 'r') as f:
+            return cls._read_header(f)
+
+    @classmethod
+    def iter_row_bands(cls, file, rows=256, *, dtype=np.float64):
+        """ Iterate over the grid in bands of rows without loading the whole grid into memory.
 
-            for row in range(out.ny):
-                values = []
-                while len(values) < out.nx:
-                    values += f.readline().split()
+        Args:
+            file: Path to the file.
+            rows: Number of rows in each band. The last band may be shorter.
+            dtype: Data type of the yielded bands.
 
-                out.dm[row, :] = values
+        Yields:
+            row, band: Index of the first row in the band and a (rows, nx) matrix of values.
+
+        """
+
+        with open(file, 'r') as f:
+            grd = cls._read_header(f)
+
+            band = np.empty(shape=rows * grd.nx, dtype=dtype)
+            size = min(rows, grd.ny) * grd.nx  # number of values in the current band
+            filled = 0
+            row = 0
+
+            for parsed in _iter_values(f, dtype, cls.block_size):
+                while parsed.size and row < grd.ny:
+                    n = min(parsed.size, size - filled)
+                    band[filled:filled + n] = parsed[:n]
+                    parsed = parsed[n:]
+                    filled += n
+
+                    if filled == size:
+                        values = band[:size].reshape(-1, grd.nx).copy()
+                        gfunc.blank_to_nan(values)
+                        yield row, values
+                        row += size // grd.nx
+                        size = min(rows, grd.ny - row) * grd.nx
+                        filled = 0
+
+                if row == grd.ny:
+                    break
+
+        if row < grd.ny:
+            raise ValueError(f'The grid is expected to have {grd.ny} rows, found only {row}!')
+
+    @classmethod
+    def _read_header(cls, f):
+        """ Read the header from the opened file and return a grid with empty .dm. """
+
+        id_ = f.readline().strip()
+
+        # first 4 bytes are ID string identifying a file as Surfer 6 Text Grid
+        if id_ != 'DSAA':
+            raise ValueError('The specified file is not a Surfer 6 Text grid!')
+
+        out = cls()
+
+        # number of grid lines along the X and Y axes
+        out.nx, out.ny = map(int, f.readline().split())
+
+        # minimum and maximum X values of the grid
+        out.xlo, out.xhi = map(float, f.readline().split())
+
+        # minimum and maximum Y values of the grid
+        out.ylo, out.yhi = map(float, f.readline().split())
+
+        # minimum and maximum Z values of the grid
+        out.zlo, out.zhi = map(float, f.readline().split())
 
         return out
 
@@ -80,3 +187,36 @@ class Surfer6TextGrid:
     @property
     def extent(self):
         return [self.xlo, self.xhi, self.yhi, self.ylo]
+
+
+def _iter_values(f, dtype, block_size):
+    """ Parse whitespace separated numbers from an opened text file in large blocks.
+
+    Each block is cut at its last whitespace, so that a number is never split between two
+    blocks, and converted in one vectorized call. Line breaks are treated as any other
+    whitespace, so the values can be arbitrarily distributed among the lines.
+
+    """
+
+    tail = ''
+
+    while True:
+        block = f.read(block_size)
+
+        if not block:
+            break
+
+        block = tail + block
+        cut = max(block.rfind(' '), block.rfind('\n'), block.rfind('\t'))
+
+        if cut == -1:
+            tail = block
+            continue
+
+        block, tail = block[:cut], block[cut:]
+
+        if block.strip():
+            yield np.fromstring(block, dtype=dtype, sep=' ')
+
+    if tail.strip():
+        yield np.fromstring(tail, dtype=dtype, sep=' ')
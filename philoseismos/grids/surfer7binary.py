@@ -0,0 +1,224 @@
+""" philoseismos: with passion for the seismic method.
+
+This file defines Surfer7BinaryGrid class, that reads and writes Surfer 7 Binary Grid data format.
+
+author: ivan dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import struct
+
+import numpy as np
+
+from philoseismos.grids import gfunc
+
+
+class Surfer7BinaryGrid:
+    """ Surfer 7 Binary Grid is a tagged format: each section starts with a 4 byte ID and
+    4 bytes that hold the size of the section. The sections used here are the header ('DSRB'),
+    the grid information ('GRID') and the data itself ('DATA'). """
+
+    # grid section: nrow, ncol, xll, yll, xsize, ysize, zmin, zmax, rotation, blank value
+    grid_format = '<iidddddddd'
+
+    # sizes of the sections are 4-byte signed integers, so the DATA section is limited to this
+    # many bytes, 268435455 nodes
+    max_data_size = 2 ** 31 - 1
+
+    def __init__(self):
+        """ """
+
+        self.nx = None
+        self.ny = None
+        self.xlo = None
+        self.xhi = None
+        self.ylo = None
+        self.yhi = None
+        self.zlo = None
+        self.zhi = None
+        self.rotation = 0
+        self.blank = gfunc.BLANK
+
+        self.dm = None
+
+        # where the GRID and DATA sections start, needed to update memory-mapped files
+        self._grid_offset = None
+        self._file = None
+
+    @classmethod
+    def load(cls, file, *, mmap=False):
+        """ Load the Surfer7BinaryGrid from the specified file.
+
+        Args:
+            file: Path to the file.
+            mmap (bool): If True, the .dm is a read-only memory map of the file instead of an
+                array in memory. The map shows the values as they are in the file, so blanked
+                nodes keep the .blank value instead of being replaced with NaNs. Use
+                gfunc.blank_to_nan on copies of the parts read from it.
+
+        """
+
+        with open(file, 'br') as f:
+            id_ = f.read(4)
+
+            # first 4 bytes are ID string identifying a file as Surfer 7 Binary Grid
+            if id_ != b'DSRB':
+                raise ValueError('The specified file is not a Surfer 7 Binary grid!')
+
+            # skip the rest of the header section: its size and the version
+            size = struct.unpack('<i', f.read(4))[0]
+            f.seek(size, 1)
+
+            out = cls()
+            out._file = file
+
+            while True:
+                tag = f.read(8)
+
+                if len(tag) < 8:
+                    raise ValueError('The specified file does not contain a DATA section!')
+
+                id_, size = struct.unpack('<4si', tag)
+
+                if id_ == b'GRID':
+                    out._grid_offset = f.tell()
+                    ny, nx, xll, yll, xsize, ysize, zlo, zhi, rotation, blank = \
+                        struct.unpack(cls.grid_format, f.read(size))
+
+                    out.nx, out.ny = nx, ny
+                    out.xlo, out.xhi = xll, xll + xsize * (nx - 1)
+                    out.ylo, out.yhi = yll, yll + ysize * (ny - 1)
+                    out.zlo, out.zhi = zlo, zhi
+                    out.rotation = rotation
+                    out.blank = blank
+
+                elif id_ == b'DATA':
+                    # rows are ordered from ylo to yhi, values in rows from xlo to xhi
+                    if mmap:
+                        offset = f.tell()
+                    else:
+                        values = np.fromfile(f, dtype='<f8', count=out.nx * out.ny)
+                        out.dm = values.reshape(out.ny, out.nx)
+                        gfunc.blank_to_nan(out.dm, out.blank)
+                    break
+
+                else:  # other sections (e.g. fault traces) are skipped
+                    f.seek(size, 1)
+
+        if mmap:
+            out.dm = np.memmap(file, dtype='<f8', mode='r', offset=offset, shape=(out.ny, out.nx))
+
+        return out
+
+    @classmethod
+    def create(cls, file, nx, ny, xlo, xhi, ylo, yhi):
+        """ Create a new Surfer 7 Binary Grid file and return it memory-mapped for writing.
+
+        This allows filling grids that do not fit into memory piece by piece. The nodes
+        are initially blanked. Call .flush() after filling the .dm to update the Z range.
+
+        Raises:
+            ValueError: If the grid has too many nodes for the format, see max_data_size.
+
+        """
+
+        cls._check_size(nx, ny)
+
+        out = cls()
+        out.nx, out.ny = nx, ny
+        out.xlo, out.xhi = xlo, xhi
+        out.ylo, out.yhi = ylo, yhi
+        out.zlo, out.zhi = 0.0, 0.0
+        out._file = file
+
+        with open(file, 'bw') as f:
+            out._write_header(f)
+            offset = f.tell()
+
+        out.dm = np.memmap(file, dtype='<f8', mode='r+', offset=offset, shape=(ny, nx))
+
+        for start in range(0, ny, gfunc.ROWS_PER_CHUNK):
+            out.dm[start:start + gfunc.ROWS_PER_CHUNK] = out.blank
+
+        return out
+
+    def flush(self):
+        """ Update the Z range of a memory-mapped grid and write the changes to the disk.
+
+        Only grids memory-mapped for writing by .create can be flushed, other grids are
+        written with .save.
+
+        """
+
+        if not isinstance(self.dm, np.memmap) or self.dm.mode not in ('r+', 'w+'):
+            raise ValueError('Only grids memory-mapped for writing can be flushed, use .save instead!')
+
+        self.zlo, self.zhi = gfunc.z_range(self.dm)
+
+        with open(self._file, 'br+') as f:
+            f.seek(self._grid_offset)
+            f.write(self._pack_grid_section())
+
+        self.dm.flush()
+
+    def save(self, file):
+        """ Save the Surfer7BinaryGrid to the specified file.
+
+        The number of nodes and the Z range are taken from the .dm, NaNs are saved as blanks.
+
+        Raises:
+            ValueError: If the grid has too many nodes for the format, see max_data_size.
+
+        """
+
+        self._check_size(self.dm.shape[1], self.dm.shape[0])
+
+        self.ny, self.nx = self.dm.shape
+        self.zlo, self.zhi = gfunc.z_range(self.dm)
+
+        with open(file, 'bw') as f:
+            self._write_header(f)
+            gfunc.nan_to_blank(self.dm, self.blank).astype('<f8').tofile(f)
+
+    def _write_header(self, f):
+        """ Write the header, the GRID section and the DATA tag into an opened file. """
+
+        f.write(struct.pack('<4sii', b'DSRB', 4, 2))  # header section with version 2
+
+        f.write(struct.pack('<4si', b'GRID', struct.calcsize(self.grid_format)))
+        self._grid_offset = f.tell()
+        f.write(self._pack_grid_section())
+
+        f.write(struct.pack('<4si', b'DATA', self.nx * self.ny * 8))
+
+    @classmethod
+    def _check_size(cls, nx, ny):
+        """ Raise a ValueError if the DATA section of the grid does not fit into the format. """
+
+        if nx * ny * 8 > cls.max_data_size:
+            raise ValueError(f'A grid of {nx}x{ny} nodes does not fit into the Surfer 7 Binary format, '
+                             f'it holds at most {cls.max_data_size // 8} nodes!')
+
+    def _pack_grid_section(self):
+        """ Pack the contents of the GRID section. """
+
+        xsize = (self.xhi - self.xlo) / (self.nx - 1) if self.nx > 1 else 1
+        ysize = (self.yhi - self.ylo) / (self.ny - 1) if self.ny > 1 else 1
+
+        return struct.pack(self.grid_format, self.ny, self.nx, self.xlo, self.ylo, xsize, ysize,
+                           self.zlo, self.zhi, self.rotation, self.blank)
+
+    def invert_yaxis(self):
+        """ Inverts the Y axis in the DataMatrix. """
+
+        self.dm = self.dm[::-1, :]
+        self.ylo, self.yhi = self.yhi, self.ylo
+
+    def invert_xaxis(self):
+        """ Inverts the X axis in the DataMatrix. """
+
+        self.dm = self.dm[:, ::-1]
+        self.xlo, self.xhi = self.xhi, self.xlo
+
+    @property
+    def extent(self):
+        return [self.xlo, self.xhi, self.yhi, self.ylo]
@@ -0,0 +1,265 @@
+""" philoseismos: with passion for the seismic method.
+
+This file defines TiledGrid class, that gives windowed access to large binary grids without
+loading them into memory, and the mosaic function, that combines many grids into one.
+
+author: ivan dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import numpy as np
+
+from philoseismos.grids import gfunc
+from philoseismos.grids.surfer6binary import Surfer6BinaryGrid
+from philoseismos.grids.surfer7binary import Surfer7BinaryGrid
+
+
+class TiledGrid:
+    """ This object gives access to parts of a memory-mapped binary grid.
+
+    Only the nodes that fall into a requested window are read from the disk, so grids much
+    larger than the available memory can be processed window by window or tile by tile.
+
+    """
+
+    def __init__(self, grid):
+        """ Create a new TiledGrid from a memory-mapped Surfer6BinaryGrid or Surfer7BinaryGrid. """
+
+        self.grid = grid
+
+    @classmethod
+    def open(cls, file):
+        """ Open a Surfer 6 or Surfer 7 binary grid file. """
+
+        with open(file, 'br') as f:
+            id_ = f.read(4)
+
+        if id_ == b'DSBB':
+            return cls(Surfer6BinaryGrid.load(file, mmap=True))
+        elif id_ == b'DSRB':
+            return cls(Surfer7BinaryGrid.load(file, mmap=True))
+        else:
+            raise ValueError('The specified file is not a Surfer 6 or Surfer 7 Binary grid!')
+
+    @property
+    def nx(self):
+        return self.grid.dm.shape[1]
+
+    @property
+    def ny(self):
+        return self.grid.dm.shape[0]
+
+    @property
+    def dx(self):
+        # a grid one node wide has the node size of 1, as in the saved grids
+        return (self.grid.xhi - self.grid.xlo) / (self.nx - 1) if self.nx > 1 else 1
+
+    @property
+    def dy(self):
+        return (self.grid.yhi - self.grid.ylo) / (self.ny - 1) if self.ny > 1 else 1
+
+    @property
+    def x(self):
+        """ X coordinates of the grid's columns. """
+        return self.grid.xlo + np.arange(self.nx) * self.dx
+
+    @property
+    def y(self):
+        """ Y coordinates of the grid's rows. """
+        return self.grid.ylo + np.arange(self.ny) * self.dy
+
+    def read(self, row0, row1, col0, col1, *, row_step=1, col_step=1):
+        """ Read a block of nodes by their indices, every row_step row and every col_step column.
+        Blanked nodes are replaced with NaNs. """
+
+        block = np.array(self.grid.dm[row0:row1:row_step, col0:col1:col_step], dtype=np.float64)
+        gfunc.blank_to_nan(block, getattr(self.grid, 'blank', gfunc.BLANK))
+
+        return block
+
+    def window(self, x0, x1, y0, y1):
+        """ Return a grid with the nodes that fall within the specified extent.
+
+        Args:
+            x0, x1: Limits of the window along the X axis.
+            y0, y1: Limits of the window along the Y axis.
+
+        Returns:
+            A new grid of the same type as the opened one, with the .dm in memory.
+
+        """
+
+        col0, col1 = self._index_range(x0, x1, self.grid.xlo, self.dx, self.nx)
+        row0, row1 = self._index_range(y0, y1, self.grid.ylo, self.dy, self.ny)
+
+        return self._subgrid(row0, row1, col0, col1)
+
+    def tiles(self, size=512):
+        """ Iterate over the grid in square tiles.
+
+        Args:
+            size: Number of nodes along each side of a tile. Edge tiles may be smaller.
+
+        Yields:
+            Grids of the same type as the opened one, with the .dm in memory.
+
+        """
+
+        for row0 in range(0, self.ny, size):
+            for col0 in range(0, self.nx, size):
+                yield self._subgrid(row0, min(row0 + size, self.ny), col0, min(col0 + size, self.nx))
+
+    def _subgrid(self, row0, row1, col0, col1):
+        """ Return a grid constructed from the block of nodes. """
+
+        out = type(self.grid)()
+        out.dm = self.read(row0, row1, col0, col1)
+        out.ny, out.nx = out.dm.shape
+        out.xlo, out.xhi = self.grid.xlo + col0 * self.dx, self.grid.xlo + (col1 - 1) * self.dx
+        out.ylo, out.yhi = self.grid.ylo + row0 * self.dy, self.grid.ylo + (row1 - 1) * self.dy
+        out.zlo, out.zhi = gfunc.z_range(out.dm)
+
+        return out
+
+    @staticmethod
+    def _index_range(v0, v1, lo, step, n):
+        """ Return the range of indices of the nodes that lie between v0 and v1. """
+
+        v0, v1 = min(v0, v1), max(v0, v1)
+        i0 = int(np.clip(np.ceil((v0 - lo) / step - 1e-9), 0, n))
+        i1 = int(np.clip(np.floor((v1 - lo) / step + 1e-9) + 1, 0, n))
+
+        return i0, max(i0, i1)
+
+
+def mosaic(grids, file, dx, dy=None, *, extent=None, tile_size=512):
+    """ Combine many grids into one Surfer 7 Binary grid.
+
+    The input grids are resampled onto a common lattice with bilinear interpolation. Where the
+    grids overlap, their values are averaged. The output is computed tile by tile, and only the
+    part of each input grid that overlaps the current tile is read, so the memory consumption
+    is bounded by the tile size and does not depend on the size of the mosaic.
+
+    Args:
+        grids: A sequence of paths to binary grid files, TiledGrid objects, or grids with the .dm
+            in memory.
+        file: Path to the resulting file.
+        dx: Node spacing along the X axis of the mosaic.
+        dy: Node spacing along the Y axis of the mosaic. Defaults to dx.
+        extent: (xlo, xhi, ylo, yhi) of the mosaic. Defaults to the union of the inputs.
+        tile_size: Number of nodes along each side of the tile.
+
+    Returns:
+        The memory-mapped Surfer7BinaryGrid.
+
+    """
+
+    dy = dx if dy is None else dy
+
+    sources = []
+    for grid in grids:
+        if isinstance(grid, str):
+            grid = TiledGrid.open(grid)
+        elif not isinstance(grid, TiledGrid):
+            grid = TiledGrid(grid)
+        sources.append(grid)
+
+    if extent is None:
+        xlo = min(min(s.grid.xlo, s.grid.xhi) for s in sources)
+        xhi = max(max(s.grid.xlo, s.grid.xhi) for s in sources)
+        ylo = min(min(s.grid.ylo, s.grid.yhi) for s in sources)
+        yhi = max(max(s.grid.ylo, s.grid.yhi) for s in sources)
+    else:
+        xlo, xhi, ylo, yhi = extent
+
+    nx = int(round((xhi - xlo) / dx)) + 1
+    ny = int(round((yhi - ylo) / dy)) + 1
+
+    out = Surfer7BinaryGrid.create(file, nx, ny, xlo, xlo + (nx - 1) * dx, ylo, ylo + (ny - 1) * dy)
+
+    for row0 in range(0, ny, tile_size):
+        row1 = min(row0 + tile_size, ny)
+        y = ylo + np.arange(row0, row1) * dy
+
+        for col0 in range(0, nx, tile_size):
+            col1 = min(col0 + tile_size, nx)
+            x = xlo + np.arange(col0, col1) * dx
+
+            total = np.zeros(shape=(y.size, x.size))
+            count = np.zeros(shape=(y.size, x.size))
+
+            for source in sources:
+                values = _resample(source, x, y)
+
+                if values is not None:
+                    valid = ~np.isnan(values)
+                    total[valid] += values[valid]
+                    count[valid] += 1
+
+            with np.errstate(invalid='ignore'):
+                out.dm[row0:row1, col0:col1] = np.where(count > 0, total / count, out.blank)
+
+    out.flush()
+
+    return out
+
+
+def _resample(source, x, y):
+    """ Bilinearly interpolate the source TiledGrid at the nodes of the (x, y) lattice.
+
+    Returns a (y.size, x.size) matrix, NaN outside the source, or None if the lattice does
+    not overlap with the source at all.
+
+    """
+
+    # fractional indices of the lattice nodes in the source grid
+    fx = (x - source.grid.xlo) / source.dx
+    fy = (y - source.grid.ylo) / source.dy
+
+    inside_x = (fx >= -1e-9) & (fx <= source.nx - 1 + 1e-9)
+    inside_y = (fy >= -1e-9) & (fy <= source.ny - 1 + 1e-9)
+
+    if not inside_x.any() or not inside_y.any():
+        return None
+
+    # read only the block of the source that is needed
+    col0, col1, col_step = _block_range(fx[inside_x], source.nx)
+    row0, row1, row_step = _block_range(fy[inside_y], source.ny)
+    block = source.read(row0, row1, col0, col1, row_step=row_step, col_step=col_step)
+
+    # indices of the upper left corners of the cells that contain the nodes, a block of a
+    # single node wide has cells of zero width
+    fx = np.clip((fx - col0) / col_step, 0, block.shape[1] - 1)
+    fy = np.clip((fy - row0) / row_step, 0, block.shape[0] - 1)
+    j0 = np.clip(np.floor(fx).astype(int), 0, max(block.shape[1] - 2, 0))
+    i0 = np.clip(np.floor(fy).astype(int), 0, max(block.shape[0] - 2, 0))
+    j1, i1 = np.minimum(j0 + 1, block.shape[1] - 1), np.minimum(i0 + 1, block.shape[0] - 1)
+
+    wx = (fx - j0)[np.newaxis, :]
+    wy = (fy - i0)[:, np.newaxis]
+
+    values = (block[np.ix_(i0, j0)] * (1 - wy) * (1 - wx) +
+              block[np.ix_(i0, j1)] * (1 - wy) * wx +
+              block[np.ix_(i1, j0)] * wy * (1 - wx) +
+              block[np.ix_(i1, j1)] * wy * wx)
+
+    values[~inside_y, :] = np.nan
+    values[:, ~inside_x] = np.nan
+
+    return values
+
+
+def _block_range(f, n):
+    """ Return the range and the step of the source nodes needed to interpolate at the
+    fractional indices f of evenly spaced lattice nodes.
+
+    The range covers the cells of all the lattice nodes. If the lattice nodes are further
+    apart than the source nodes, the source is decimated to about a node per lattice node,
+    so the block read for a tile is not larger than the tile, however fine the source is.
+
+    """
+
+    step = max(1, int(abs(f[1] - f[0]) + 1e-9)) if f.size > 1 else 1
+    first = int(np.clip(np.floor(f.min() + 1e-9), 0, n - 1))
+    last = min(first + int(np.ceil((f.max() - first) / step - 1e-9)) * step, n - 1)
+
+    return first, last + 1, step
@@ -0,0 +1,6 @@
+""" philoseismos: engineering seismologist's toolbox.
+
+author: Ivan Dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+from philoseismos.inversion.de import ModelSpace, invert_rdc, invert_rdcs
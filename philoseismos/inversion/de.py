@@ -0,0 +1,243 @@
+""" philoseismos: engineering seismologist's toolbox.
+
+This file defines the inversion of Rayleigh wave dispersion curves into horizontally layered
+media with differential evolution - a global search that evolves a population of models.
+
+author: Ivan Dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from philoseismos.models.hlm import HorizontallyLayeredMedium
+from philoseismos.models.ensemble import HLMEnsemble
+from philoseismos.dispersion.rayleigh import batch_rayleigh_phase_velocities
+from philoseismos.dispersion.rdc import curve_misfits
+
+
+class ModelSpace:
+    """ This object represents the space of layered models to search through.
+
+    Each model is described by a vector of parameters: thicknesses of the layers from top to
+    bottom, followed by S-wave velocities of the layers and the half-space. Vp is computed
+    from Vs with a constant ratio, and rho is computed from Vp with the Gardner's relation.
+
+    """
+
+    def __init__(self, h_bounds, vs_bounds, *, vp_vs=np.sqrt(3)):
+        """ Create a new ModelSpace.
+
+        Args:
+            h_bounds: (min, max) thickness in m for every layer, from top to bottom.
+            vs_bounds: (min, max) S-wave velocity in m/s for every layer and the half-space.
+            vp_vs: Ratio of P- and S-wave velocities.
+
+        """
+
+        if len(vs_bounds) != len(h_bounds) + 1:
+            raise ValueError('There should be Vs bounds for every layer and the half-space!')
+
+        self.n_layers = len(h_bounds)
+        self.vp_vs = vp_vs
+
+        bounds = np.array(list(h_bounds) + list(vs_bounds), dtype=float)
+        self.lower = bounds[:, 0]
+        self.upper = bounds[:, 1]
+
+    @property
+    def n_params(self):
+        return self.lower.size
+
+    def arrays(self, params):
+        """ Return vp, vs, rho, h arrays of shape (n_models, n_layers [+ 1]) for the parameters. """
+
+        params = np.atleast_2d(params)
+
+        h = params[:, :self.n_layers]
+        vs = params[:, self.n_layers:]
+        vp = vs * self.vp_vs
+        rho = 310 * vp ** 0.25
+
+        return vp, vs, rho, h
+
+    def to_hlm(self, params):
+        """ Return a HorizontallyLayeredMedium described by the parameters. """
+
+        vp, vs, rho, h = (a[0] for a in self.arrays(params))
+
+        hlm = HorizontallyLayeredMedium(vp=vp[-1], vs=vs[-1], rho=rho[-1])
+
+        # layers are added on top of the medium, so start from the bottom one
+        for i in reversed(range(self.n_layers)):
+            hlm.add_layer(vp=vp[i], vs=vs[i], rho=rho[i], h=h[i])
+
+        return hlm
+
+
+def invert_rdc(rdc, space, *, mode=0, population=40, generations=60, mutation=0.7, crossover=0.8,
+               n_trial=120, max_workers=None, file=None, seed=None, cache=None):
+    """ Invert a Rayleigh wave dispersion curve into an ensemble of horizontally layered media.
+
+    Args:
+        rdc: RayleighDispersionCurve with the observed curve.
+        space: ModelSpace to search through.
+        mode: Index of the modal curve to invert. Defaults to the fundamental mode.
+        population: Number of models in the population.
+        generations: Number of generations to evolve the population for.
+        mutation: Differential weight of the mutation, between 0 and 2.
+        crossover: Crossover probability, between 0 and 1.
+        n_trial: Number of steps between the trial velocities used to bracket the phase
+            velocities.
+        max_workers: Number of processes to evaluate the misfits in. If 1, everything is
+            computed in the current process.
+        file: If given, every model that enters the population is appended to this text file
+            as a line of the generation number, the misfit and the parameters.
+        seed: Seed for the random number generator.
+        cache: A ForwardCache to reuse the curves of already evaluated models. Use one with a
+            directory to share the curves between the worker processes and between runs.
+
+    Returns:
+        ensemble, misfits: The final population as an HLMEnsemble sorted by the misfit, and
+            the misfits themselves.
+
+    """
+
+    return invert_rdcs([rdc], space, mode=mode, population=population, generations=generations,
+                       mutation=mutation, crossover=crossover, n_trial=n_trial,
+                       max_workers=max_workers, files=None if file is None else [file], seed=seed,
+                       cache=cache)[0]
+
+
+def invert_rdcs(rdcs, space, *, mode=0, population=40, generations=60, mutation=0.7, crossover=0.8,
+                n_trial=120, max_workers=None, files=None, seed=None, cache=None):
+    """ Invert many dispersion curves sharing one pool of processes.
+
+    Takes the same arguments as invert_rdc, except for a sequence of curves and a sequence
+    of files to stream the models to, one for each curve.
+
+    Returns:
+        A list of (ensemble, misfits) tuples, one for each curve.
+
+    """
+
+    rng = np.random.default_rng(seed)
+    executor = None if max_workers == 1 else ProcessPoolExecutor(max_workers=max_workers)
+    n_chunks = 1 if executor is None else max_workers or os.cpu_count() or 1
+
+    def evaluate(params, freqs, observed):
+        if executor is None:
+            return _misfits(params, space, freqs, observed, n_trial, cache, mode)
+
+        chunks = np.array_split(params, n_chunks)
+        args = [(chunk, space, freqs, observed, n_trial, cache, mode) for chunk in chunks]
+        return np.concatenate(list(executor.map(_misfits_star, args)))
+
+    out = []
+
+    try:
+        for i, rdc in enumerate(rdcs):
+            freqs, observed = _observed_curve(rdc, mode)
+            file = None if files is None else files[i]
+            out.append(_evolve(space, freqs, observed, evaluate, rng, population, generations,
+                               mutation, crossover, file))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return out
+
+
+def _evolve(space, freqs, observed, evaluate, rng, population, generations, mutation, crossover, file):
+    """ Run the differential evolution (rand/1/bin) for one observed curve. """
+
+    span = space.upper - space.lower
+    params = space.lower + rng.random((population, space.n_params)) * span
+    misfits = evaluate(params, freqs, observed)
+
+    stream = open(file, 'a') if file is not None else None
+
+    try:
+        if stream is not None:
+            _write_models(stream, 0, params, misfits)
+
+        for generation in range(1, generations + 1):
+            # three distinct random partners for every model, all different from the model itself
+            partners = np.argsort(rng.random((population, population)), axis=1)
+            partners = np.array([row[row != i][:3] for i, row in enumerate(partners)])
+            a, b, c = (params[partners[:, j]] for j in range(3))
+
+            mutants = a + mutation * (b - c)
+
+            # reflect the parameters that left the space back inside
+            mutants = np.where(mutants < space.lower, 2 * space.lower - mutants, mutants)
+            mutants = np.where(mutants > space.upper, 2 * space.upper - mutants, mutants)
+            mutants = np.clip(mutants, space.lower, space.upper)
+
+            # binomial crossover, with at least one parameter taken from the mutant
+            cross = rng.random(params.shape) < crossover
+            cross[np.arange(population), rng.integers(0, space.n_params, population)] = True
+            trials = np.where(cross, mutants, params)
+
+            trial_misfits = evaluate(trials, freqs, observed)
+            better = trial_misfits <= misfits
+
+            params[better] = trials[better]
+            misfits[better] = trial_misfits[better]
+
+            if stream is not None:
+                _write_models(stream, generation, trials[better], trial_misfits[better])
+    finally:
+        if stream is not None:
+            stream.close()
+
+    order = np.argsort(misfits)
+
+    ensemble = HLMEnsemble(*space.arrays(params[order]))
+    ensemble.misfits = misfits[order]
+
+    return ensemble, misfits[order]
+
+
+def _observed_curve(rdc, mode):
+    """ Return frequencies and phase velocities of the modal curve, without NaNs. """
+
+    valid = rdc.mask[mode]
+
+    return rdc.freqs[valid], rdc.curves[mode, valid]
+
+
+def _misfits(params, space, freqs, observed, n_trial, cache=None, mode=0):
+    """ Return the RMS relative misfits between the observed curve and the models' curves.
+
+    The observed curve is compared with the modelled curve of the given mode. Frequencies
+    where a model has no such mode count as a relative misfit of one.
+
+    """
+
+    vp, vs, rho, h = space.arrays(params)
+    cs = np.linspace(0.7 * vs.min(axis=1), vs[:, -1], n_trial + 1, axis=1)
+
+    if cache is None:
+        modelled = batch_rayleigh_phase_velocities(freqs, vp, vs, rho, h, modes=mode + 1, cs=cs)[:, mode]
+    else:
+        modelled = np.array([cache.rayleigh_phase_velocities(freqs, vp[i], vs[i], rho[i], h[i], modes=mode + 1,
+                                                             cs=cs[i])[mode] for i in range(vp.shape[0])])
+
+    return curve_misfits(observed, modelled.reshape(-1, freqs.size))
+
+
+def _misfits_star(args):
+    """ Unpack the arguments for _misfits, to be used with executor.map. """
+
+    return _misfits(*args)
+
+
+def _write_models(stream, generation, params, misfits):
+    """ Append the models to the opened text file and flush it. """
+
+    for p, misfit in zip(params, misfits):
+        stream.write(f'{generation} {misfit:.6g} ' + ' '.join(f'{v:.6g}' for v in p) + '\n')
+
+    stream.flush()
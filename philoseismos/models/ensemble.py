@@ -0,0 +1,160 @@
+""" philoseismos: engineering seismologist's toolbox.
+
+author: Ivan Dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import numpy as np
+
+from philoseismos.models.hlm import HorizontallyLayeredMedium
+
+# number of (model, layer, depth) comparisons made at a time, to bound the memory usage
+ELEMENTS_PER_CHUNK = 2 ** 22
+
+
+class HLMEnsemble:
+    """ This object represents a collection of horizontally layered media.
+
+    Parameters of all the models are stored in arrays with a row for every model. The columns
+    of vp, vs, rho, and q correspond to the layers from top to bottom, followed by the
+    half-space. The columns of h and mask correspond to the layers only. Models with fewer
+    layers than the others are padded with empty layers right above the half-space: their
+    mask is False, thickness is 0, and parameters are NaN.
+
+    """
+
+    def __init__(self, vp, vs, rho, h, q=None, mask=None):
+        """ Create a new HLMEnsemble from arrays of parameters.
+
+        Args:
+            vp, vs, rho: (n_models, n_layers + 1) arrays, the half-space in the last column.
+            h: (n_models, n_layers) array of thicknesses.
+            q: (n_models, n_layers + 1) array of quality factors. Defaults to NaNs.
+            mask: (n_models, n_layers) boolean array of existing layers. Defaults to all True.
+
+        """
+
+        self.vp = np.atleast_2d(np.asarray(vp, dtype=float))
+        self.vs = np.atleast_2d(np.asarray(vs, dtype=float))
+        self.rho = np.atleast_2d(np.asarray(rho, dtype=float))
+        self.h = np.asarray(h, dtype=float).reshape(self.vs.shape[0], self.vs.shape[1] - 1)
+        self.q = np.full_like(self.vs, np.nan) if q is None else np.atleast_2d(np.asarray(q, dtype=float))
+        self.mask = np.ones(self.h.shape, dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+
+        # misfits of the models, if the ensemble is a result of an inversion
+        self.misfits = None
+
+    @classmethod
+    def from_hlms(cls, hlms):
+        """ Create a new HLMEnsemble from a sequence of HorizontallyLayeredMedium objects. """
+
+        n_models = len(hlms)
+        n_layers = max((len(hlm._layers) for hlm in hlms), default=0)
+
+        params = np.full(shape=(4, n_models, n_layers + 1), fill_value=np.nan)
+        h = np.zeros(shape=(n_models, n_layers))
+        mask = np.zeros(shape=(n_models, n_layers), dtype=bool)
+
+        for i, hlm in enumerate(hlms):
+            layers = list(reversed(hlm._layers))
+            n = len(layers)
+
+            params[:, i, :n] = np.array([[l.vp, l.vs, l.rho, l.q] for l in layers], dtype=float).T.reshape(4, n)
+            params[:, i, -1] = np.array([hlm.vp, hlm.vs, hlm.rho, hlm.q], dtype=float)
+            h[i, :n] = [l.h for l in layers]
+            mask[i, :n] = True
+
+        vp, vs, rho, q = params
+
+        return cls(vp, vs, rho, h, q=q, mask=mask)
+
+    def to_hlms(self):
+        """ Return a list of HorizontallyLayeredMedium objects. """
+
+        return [self[i] for i in range(len(self))]
+
+    def __len__(self):
+        return self.vs.shape[0]
+
+    def __getitem__(self, index):
+        """ Return the model at index as a HorizontallyLayeredMedium. """
+
+        q = self.q[index, -1]
+        hlm = HorizontallyLayeredMedium(vp=self.vp[index, -1], vs=self.vs[index, -1], rho=self.rho[index, -1],
+                                        q=None if np.isnan(q) else q)
+
+        # layers are added on top of the medium, so start from the bottom one
+        for j in reversed(np.flatnonzero(self.mask[index])):
+            q = self.q[index, j]
+            hlm.add_layer(vp=self.vp[index, j], vs=self.vs[index, j], rho=self.rho[index, j],
+                          h=self.h[index, j], q=None if np.isnan(q) else q)
+
+        return hlm
+
+    def __repr__(self):
+        return f'HLMEnsemble: {len(self)} models, up to {self.h.shape[1]} layers'
+
+    def sample(self, z, parameter='vs'):
+        """ Return values of a parameter of all the models at the given depths.
+
+        A sample at the boundary between two layers belongs to the upper one, the same as in
+        HorizontallyLayeredMedium.rasterize.
+
+        Args:
+            z: 1D array of depths in m.
+            parameter: One of 'vp', 'vs', 'rho', or 'q'.
+
+        Returns:
+            A (n_models, z.size) array.
+
+        """
+
+        z = np.asarray(z, dtype=float)
+        values = getattr(self, parameter)
+        bottoms = np.cumsum(self.h, axis=1)
+
+        out = np.empty(shape=(len(self), z.size))
+        models = max(1, ELEMENTS_PER_CHUNK // max(1, self.h.shape[1] * z.size))
+
+        for i in range(0, len(self), models):
+            chunk = slice(i, i + models)
+
+            # index of the layer every sample belongs to: the number of bottoms above the sample.
+            # samples below the last real layer are moved past the padding into the half-space
+            mask = self.mask[chunk]
+            index = ((bottoms[chunk, :, np.newaxis] < z) & mask[:, :, np.newaxis]).sum(axis=1)
+            index[index == mask.sum(axis=1)[:, np.newaxis]] = self.h.shape[1]
+            out[chunk] = np.take_along_axis(values[chunk], index, axis=1)
+
+        return out
+
+    def percentile(self, q, z, parameter='vs'):
+        """ Return percentiles of a parameter across the models at the given depths.
+
+        Args:
+            q: Percentile or a sequence of percentiles, between 0 and 100.
+            z: 1D array of depths in m.
+            parameter: One of 'vp', 'vs', 'rho', or 'q'.
+
+        """
+
+        return np.nanpercentile(self.sample(z, parameter), q, axis=0)
+
+    def median(self, z, parameter='vs'):
+        """ Return the median of a parameter across the models at the given depths. """
+
+        return self.percentile(50, z, parameter)
+
+    def vs30(self):
+        """ Return the time-averaged S-wave velocity in the upper 30 m of every model. """
+
+        bottoms = np.cumsum(self.h, axis=1)
+        tops = bottoms - self.h
+
+        # part of each layer that is above 30 m
+        h30 = np.clip(np.minimum(bottoms, 30) - tops, 0, None)
+
+        with np.errstate(invalid='ignore'):
+            time = np.nansum(np.where(h30 > 0, h30 / self.vs[:, :-1], 0), axis=1)
+        time += np.clip(30 - bottoms[:, -1] if bottoms.shape[1] else 30, 0, None) / self.vs[:, -1]
+
+        return 30 / time
@@ -3,10 +3,14 @@
 author: Ivan Dubrovin
 e-mail: io.dubrovin@icloud.com """
 
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 
 from philoseismos.models.layer import Layer
 from philoseismos.segy.segy import SegY
+from philoseismos.dispersion.rdc import RayleighDispersionCurve
+from philoseismos.dispersion.rayleigh import rayleigh_phase_velocities
 
 
 class HorizontallyLayeredMedium:
@@ -90,6 +94,35 @@ class HorizontallyLayeredMedium:
 
         return z, vp, vs, rho, q
 
+    def rasterize(self, z):
+        """ Return values of all the parameters at the given depths.
+
+        A sample at the boundary between two layers belongs to the upper one. Samples below the
+        last layer belong to the half-space.
+
+        Args:
+            z: Depths to sample the parameters at, in m.
+
+        Returns:
+            vp, vs, rho, q: Arrays of parameter values with the same shape as z.
+
+        """
+
+        z = np.asarray(z, dtype=float)
+
+        # bottoms of the layers, from top to bottom
+        bottoms = np.cumsum([layer.h for layer in reversed(self._layers)])
+
+        # parameters of the layers and the half-space, one row per layer
+        table = [[layer.vp, layer.vs, layer.rho, layer.q] for layer in reversed(self._layers)]
+        table.append([self.vp, self.vs, self.rho, self.q])
+        table = np.array(table, dtype=float)
+
+        # index of the layer each sample belongs to; all the parameters are filled in one go
+        values = table[np.searchsorted(bottoms, z, side='left')]
+
+        return values[..., 0], values[..., 1], values[..., 2], values[..., 3]
+
     def export_for_tesseral(self, x0, x1, base_filename, *,
                             dz=0.01, half_space_depth=100):
         """ Export model to SEG-Y format for use in Tesseral.
@@ -103,57 +136,53 @@ class HorizontallyLayeredMedium:
             half_space_depth: How deep should the half-space be in the model.
 
         Notes:
-            Creates three SEG-Y files: one with values of Vp, one with values of Vs, and one
-            with values of rho.
+            Creates four SEG-Y files: one with values of Vp, one with values of Vs, one
+            with values of rho, and one with values of Q.
 
         """
 
         hs = [layer.h for layer in self._layers]
         z1 = sum(hs) + half_space_depth
-        zz = np.repeat(np.arange(0, z1 + dz, dz)[np.newaxis, :], 2, axis=0)
-
-        vps = np.empty_like(zz, dtype=np.float32)
-        vss = np.empty_like(zz, dtype=np.float32)
-        rhos = np.empty_like(zz, dtype=np.float32)
-        qs = np.empty_like(zz, dtype=np.float32)
-
-        if self._layers:
-            vps[:, 0] = self._layers[-1].vp
-            vss[:, 0] = self._layers[-1].vs
-            rhos[:, 0] = self._layers[-1].rho
-            qs[:, 0] = self._layers[-1].q
-        else:
-            vps[:, 0] = self.vp
-            vss[:, 0] = self.vs
-            rhos[:, 0] = self.rho
-            qs[:, 0] = self.q
+        z = np.arange(0, z1 + dz, dz)
 
-        depth = 0
-        for layer in reversed(self._layers):
-            vps[(zz > depth) & (zz <= depth + layer.h)] = layer.vp
-            vss[(zz > depth) & (zz <= depth + layer.h)] = layer.vs
-            rhos[(zz > depth) & (zz <= depth + layer.h)] = layer.rho
-            qs[(zz > depth) & (zz <= depth + layer.h)] = layer.q
+        for name, values in zip(('vp', 'vs', 'rho', 'q'), self.rasterize(z)):
+            # the model is constant along x, so two identical traces are enough
+            matrix = np.repeat(values[np.newaxis, :].astype(np.float32), 2, axis=0)
 
-            depth += layer.h
+            sgy = SegY.from_matrix(matrix, sample_interval=int(dz * 1000))
+            sgy.g.REC_X = [x0, x1]
+            sgy.save(f'{base_filename}_{name}.sgy')
 
-        vps[zz > depth] = self.vp
-        vss[zz > depth] = self.vs
-        rhos[zz > depth] = self.rho
-        qs[zz > depth] = self.q
+    def rayleigh_dispersion(self, freqs, *, modes=1, cs=None, cache=None):
+        """ Compute the theoretical dispersion curves of Rayleigh waves for the medium.
 
-        vps_sgy = SegY.from_matrix(vps, sample_interval=int(dz * 1000))
-        vss_sgy = SegY.from_matrix(vss, sample_interval=int(dz * 1000))
-        rhos_sgy = SegY.from_matrix(rhos, sample_interval=int(dz * 1000))
-        qs_sgy = SegY.from_matrix(qs, sample_interval=int(dz * 1000))
+        Args:
+            freqs: Frequencies to compute the phase velocities at, in Hz.
+            modes: Number of modes to compute, the fundamental one included.
+            cs: Trial phase velocities used to bracket the roots, in m/s. By default, 100 steps
+                from 0.7 of the lowest S-wave velocity to the S-wave velocity of the half-space.
+                Modes closer than the step between the velocities can be missed.
+            cache: A ForwardCache to look the curves up in before computing them.
 
-        for sgy in (vps_sgy, vss_sgy, rhos_sgy, qs_sgy):
-            sgy.g.REC_X = [x0, x1]
+        Returns:
+            RayleighDispersionCurve: Modal curves with NaNs where the modes do not exist.
+
+        """
+
+        freqs = np.asarray(freqs, dtype=float)
+        layers = list(reversed(self._layers))
+
+        vp = [layer.vp for layer in layers] + [self.vp]
+        vs = [layer.vs for layer in layers] + [self.vs]
+        rho = [layer.rho for layer in layers] + [self.rho]
+        h = [layer.h for layer in layers]
+
+        if cache is None:
+            curves = rayleigh_phase_velocities(freqs, vp, vs, rho, h, modes=modes, cs=cs)
+        else:
+            curves = cache.rayleigh_phase_velocities(freqs, vp, vs, rho, h, modes=modes, cs=cs)
 
-        vps_sgy.save(f'{base_filename}_vp.sgy')
-        vss_sgy.save(f'{base_filename}_vs.sgy')
-        rhos_sgy.save(f'{base_filename}_rho.sgy')
-        qs_sgy.save(f'{base_filename}_q.sgy')
+        return RayleighDispersionCurve(freqs, curves)
 
     def export_for_rdcscalc(self, file):
         """ Export HLM as an input file for rdcscalc. """
@@ -185,3 +214,29 @@ class HorizontallyLayeredMedium:
         rho = f'rho={self.rho}' if self.rho == int(self.rho) else f'rho≈{round(self.rho)}'
         out += f'Half-space: {vp} {vs} {rho}'
         return out
+
+
+def export_models_for_tesseral(models, x0, x1, base_filenames, *,
+                               dz=0.01, half_space_depth=100, max_workers=None):
+    """ Export many models to SEG-Y format for use in Tesseral concurrently.
+
+    Args:
+        models: A sequence of HorizontallyLayeredMedium objects.
+        x0 : Start of the x axis.
+        x1 : End of the x axis.
+        base_filenames: Base file names for resulting SEG-Y files, one for each model.
+        dz: Discretization step for z-axis in m. Default to 1 cm.
+        half_space_depth: How deep should the half-space be in the models.
+        max_workers: Maximum number of threads to use. Defaults to the ThreadPoolExecutor default.
+
+    """
+
+    if len(models) != len(base_filenames):
+        raise ValueError('There should be a base file name for every model!')
+
+    def export(model, base_filename):
+        model.export_for_tesseral(x0, x1, base_filename, dz=dz, half_space_depth=half_space_depth)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # consume the results to re-raise the exceptions from the workers
+        list(executor.map(export, models, base_filenames))
@@ -9,6 +9,8 @@ import math
 class Layer:
     """ This object represents a layer for a layered model. """
 
+    __slots__ = ('vp', 'vs', 'rho', 'h', 'q')
+
     def __init__(self, *, vp=None, vs=300, rho=None, h=10, q=None):
         """ Create a new layer.
 
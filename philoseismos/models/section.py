@@ -0,0 +1,256 @@
+""" philoseismos: engineering seismologist's toolbox.
+
+This file defines VsSection - a pseudo-2D section built from 1D profiles along a line.
+
+author: Ivan Dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import numpy as np
+
+from philoseismos.models.ensemble import HLMEnsemble
+from philoseismos.grids.surfer7binary import Surfer7BinaryGrid
+from philoseismos.segy.segy import SegY
+
+# number of nodes computed at a time, to bound the memory usage
+NODES_PER_CHUNK = 2 ** 22
+
+
+class VsSection:
+    """ This object represents a pseudo-2D section of S-wave velocity along a line.
+
+    The section is built from 1D profiles at several positions along the line: either layered
+    models, or dispersion curves converted into velocity profiles with the wavelength-depth
+    approximation. Between the positions the profiles are interpolated linearly, outside of
+    them the section is not defined.
+
+    """
+
+    def __init__(self, xs):
+        """ Create a new VsSection with profiles at the given positions. Use from_models or
+        from_curves instead. """
+
+        xs = np.asarray(xs, dtype=float)
+
+        # the profiles are kept in the given order, and sorted by position when interpolating
+        self._order = np.argsort(xs, kind='stable')
+        self.xs = xs[self._order]
+
+        self._ensemble = None
+        self._parameter = 'vs'
+        self._points = None
+
+    @classmethod
+    def from_models(cls, models, xs, *, parameter='vs'):
+        """ Create a section from layered models.
+
+        Args:
+            models: An HLMEnsemble or a sequence of HorizontallyLayeredMedium objects.
+            xs: Positions of the models along the line in m.
+            parameter: Parameter of the models to build the section of: 'vp', 'vs', 'rho', or 'q'.
+
+        """
+
+        if not isinstance(models, HLMEnsemble):
+            models = HLMEnsemble.from_hlms(list(models))
+
+        if len(models) != len(xs):
+            raise ValueError('The number of models and positions must be the same!')
+
+        out = cls(xs)
+        out._ensemble = models
+        out._parameter = parameter
+
+        return out
+
+    @classmethod
+    def from_curves(cls, rdcs, xs, *, mode=0, depth_factor=0.5, velocity_factor=1.1):
+        """ Create a section from dispersion curves with the wavelength-depth approximation.
+
+        Every point of a modal curve is converted into a point of a velocity profile: its depth
+        is a fraction of the wavelength, and the S-wave velocity is a multiple of the phase
+        velocity. Between the points the profile is interpolated linearly.
+
+        Args:
+            rdcs: A sequence of RayleighDispersionCurve objects.
+            xs: Positions of the curves along the line in m.
+            mode: Index of the modal curve to use.
+            depth_factor: Depth of a point as a fraction of its wavelength.
+            velocity_factor: Ratio of the S-wave velocity to the phase velocity.
+
+        """
+
+        if len(rdcs) != len(xs):
+            raise ValueError('The number of curves and positions must be the same!')
+
+        out = cls(xs)
+        out._points = []
+
+        for rdc in rdcs:
+            freqs, cs = rdc._mode_points(mode)
+            freqs, cs = freqs[freqs > 0], cs[freqs > 0]
+
+            depths = depth_factor * cs / freqs
+            order = np.argsort(depths)
+            out._points.append((depths[order], velocity_factor * cs[order]))
+
+        return out
+
+    def profiles(self, z):
+        """ Return the profiles at the given depths.
+
+        Args:
+            z: 1D array of depths in m.
+
+        Returns:
+            A (profile, depth) array, the profiles sorted by position.
+
+        """
+
+        z = np.asarray(z, dtype=float)
+
+        if self._ensemble is not None:
+            return self._ensemble.sample(z, self._parameter)[self._order]
+
+        out = np.empty((len(self._points), z.size))
+
+        for i, j in enumerate(self._order):
+            depths, vs = self._points[j]
+            out[i] = np.interp(z, depths, vs, left=np.nan, right=np.nan) if depths.size else np.nan
+
+        return out
+
+    def rasterize(self, x, z):
+        """ Return the values of the section on an (x, z) lattice.
+
+        Args:
+            x: 1D array of positions in m.
+            z: 1D array of depths in m.
+
+        Returns:
+            A (depth, position) array with NaNs outside of the profiles.
+
+        """
+
+        x = np.asarray(x, dtype=float)
+        left, right, weight, inside = _lateral_weights(self.xs, x)
+
+        profiles = self.profiles(z)
+        difference = np.where(weight[:, None] > 0, profiles[right] - profiles[left], 0)
+
+        out = np.full((profiles.shape[1], x.size), np.nan)
+        out[:, inside] = (profiles[left] + weight[:, None] * difference).T[:, inside]
+
+        return out
+
+    def save_surfer(self, file, x, z):
+        """ Save the section as a Surfer 7 Binary Grid, chunk by chunk.
+
+        The Y axis of the grid is the negative depth, so that the surface is at the top.
+
+        Args:
+            file: Path to the grid file.
+            x: 1D array of equally spaced positions in m.
+            z: 1D array of equally spaced depths in m, in ascending order.
+
+        """
+
+        x = np.asarray(x, dtype=float)
+        z = np.asarray(z, dtype=float)
+
+        grid = Surfer7BinaryGrid.create(file, x.size, z.size, x[0], x[-1], -z[-1], -z[0])
+
+        # rows of the grid go from the bottom to the top
+        rows = max(1, NODES_PER_CHUNK // x.size)
+        for start in range(0, z.size, rows):
+            stop = min(start + rows, z.size)
+            values = self.rasterize(x, z[z.size - stop:z.size - start])[::-1]
+            grid.dm[start:stop] = np.where(np.isnan(values), grid.blank, values)
+
+        grid.flush()
+
+        return grid
+
+    def export_for_tesseral(self, x, filename, *, dz=0.01, depth=None):
+        """ Export the section to a SEG-Y file for use in Tesseral, chunk by chunk.
+
+        Every position is a trace with depth samples starting at the surface, the same as in
+        HorizontallyLayeredMedium.export_for_tesseral. Tesseral needs the model everywhere,
+        so positions outside of the profiles take the closest profile, and NaNs in the traces
+        are replaced with the closest defined value above or below them.
+
+        Args:
+            x: 1D array of positions in m.
+            filename: Path to the SEG-Y file.
+            dz: Discretization step for z-axis in m. Default to 1 cm.
+            depth: Depth of the section in m. Defaults to the deepest layer of the models plus
+                100 m of the half-space, or to the deepest point of the profiles from curves.
+
+        """
+
+        x = np.asarray(x, dtype=float)
+        clipped = np.clip(x, self.xs[0], self.xs[-1])
+
+        if depth is None:
+            depth = self._depth()
+        z = np.arange(0, depth + dz, dz)
+
+        traces = max(1, NODES_PER_CHUNK // z.size)
+
+        with open(filename, 'bw') as sgy:
+            for start in range(0, x.size, traces):
+                stop = min(start + traces, x.size)
+                values = _fill_nans(self.rasterize(clipped[start:stop], z).T).astype(np.float32)
+
+                chunk = SegY.from_matrix(values, sample_interval=int(dz * 1000))
+                chunk.g.REC_X = x[start:stop]
+                chunk.g.TRACENO = np.arange(start + 1, stop + 1)
+                chunk.g.CHAN = np.arange(start + 1, stop + 1)
+
+                if start == 0:
+                    chunk.bfh['no_traces'] = x.size
+                    chunk._write_file_headers(sgy)
+
+                chunk._write_traces(sgy)
+
+    def _depth(self):
+        """ Return the depth of the deepest defined point of the profiles. """
+
+        if self._ensemble is not None:
+            return np.max(np.sum(self._ensemble.h, axis=1)) + 100
+
+        return max((depths[-1] for depths, _ in self._points if depths.size), default=0)
+
+
+def _lateral_weights(xs, x):
+    """ Return the indices of the profiles around every position and the interpolation weights. """
+
+    right = np.searchsorted(xs, x, side='right')
+    inside = (right > 0) & (x <= xs[-1])
+    left = np.clip(right - 1, 0, xs.size - 1)
+    right = np.clip(right, 0, xs.size - 1)
+
+    span = xs[right] - xs[left]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        weight = np.where(span > 0, (x - xs[left]) / span, 0)
+
+    return left, right, weight, inside
+
+
+def _fill_nans(matrix):
+    """ Fill NaNs in every row with the previous defined value, or the first one at the start. """
+
+    matrix = np.array(matrix)
+    n = matrix.shape[1]
+
+    defined = ~np.isnan(matrix)
+    index = np.where(defined, np.arange(n), 0)
+    np.maximum.accumulate(index, axis=1, out=index)
+    matrix = np.take_along_axis(matrix, index, axis=1)
+
+    # leading NaNs take the first defined value
+    first = np.argmax(defined, axis=1)
+    first_values = matrix[np.arange(matrix.shape[0]), first]
+    leading = np.arange(n) < first[:, None]
+    matrix[leading] = np.broadcast_to(first_values[:, None], matrix.shape)[leading]
+
+    return matrix
@@ -4,7 +4,8 @@ author: Ivan Dubrovin
 e-mail: io.dubrovin@icloud.com """
 
 from philoseismos.plotting.wiggle import wiggle_dm_into
-from philoseismos.plotting.imshow import imshow_dm_into
+from philoseismos.plotting.imshow import imshow_dm_into, imshow_dm_lod_into
 from philoseismos.plotting.spectra import plot_average_spectrum_of_dm_into, imshow_dispersion_image_of_dm_into
-from philoseismos.plotting.spectra import pcolormesh_fk_spectrum_of_dm_into
+from philoseismos.plotting.spectra import pcolormesh_fk_spectrum_of_dm_into, imshow_velocity_spectrum_of_dm_into
 from philoseismos.plotting.dispersion import plot_rdc_into
+from philoseismos.plotting.qc import render_qc
@@ -3,8 +3,17 @@
 author: Ivan Dubrovin
 e-mail: io.dubrovin@icloud.com """
 
+import weakref
+
 import numpy as np
 
+# number of traces reduced at a time when building a level of a pyramid
+TRACES_PER_CHUNK = 2 ** 14
+
+# pyramids of the Data Matrices that were displayed, with the versions of the matrices they
+# were built for, reused while the matrix is the same and was not changed in place
+_pyramids = weakref.WeakKeyDictionary()
+
 
 def imshow_dm_into(data_matrix, ax, norm=True):
     """ Display the Data Matrix in form of an image.
@@ -25,3 +34,227 @@ def imshow_dm_into(data_matrix, ax, norm=True):
     else:
         im = ax.imshow(data_matrix._m.T, aspect='auto', cmap='binary', interpolation='gaussian')
         return im
+
+
+def imshow_dm_lod_into(data_matrix, ax, norm=True):
+    """ Display the Data Matrix in form of an image, at the resolution of the screen.
+
+    Only the visible part of the matrix is shown, decimated to about the size of the Axes
+    in pixels with a RasterPyramid. The image is updated when the view is panned or zoomed.
+    The pyramid is kept for the Data Matrix, so showing it again is cheap.
+
+    Args:
+        data_matrix: A SegYs DataMatrix object. The matrix can be memory-mapped.
+        ax: matplotlib Axes object to draw on.
+        norm (bool): Enable or disable normalization of the traces (individual).
+
+    Returns:
+        The Image object.
+
+    """
+
+    pyramid = pyramid_of_dm(data_matrix, norm)
+    nt, ns = pyramid.matrix.shape
+
+    image, extent = pyramid.view(-0.5, nt - 0.5, -0.5, ns - 0.5, *_size_in_pixels(ax))
+    im = ax.imshow(image, aspect='auto', cmap='binary', interpolation='gaussian', extent=extent)
+
+    # the extent of the image changes with the view, the view should not follow it
+    ax.set_xlim(-0.5, nt - 0.5)
+    ax.set_ylim(ns - 0.5, -0.5)
+    ax.set_autoscale_on(False)
+
+    def update(ax):
+        (x0, x1), (y0, y1) = sorted(ax.get_xlim()), sorted(ax.get_ylim())
+        image, extent = pyramid_of_dm(data_matrix, norm).view(x0, x1, y0, y1, *_size_in_pixels(ax))
+        im.set_data(image)
+        im.set_extent(extent)
+
+    ax.callbacks.connect('xlim_changed', update)
+    ax.callbacks.connect('ylim_changed', update)
+
+    return im
+
+
+def pyramid_of_dm(data_matrix, norm=True):
+    """ Return a RasterPyramid of the Data Matrix, reusing the one built before if possible.
+
+    The pyramid is rebuilt if the matrix was replaced, or changed in place by the processing
+    functions, which increment the version of the Data Matrix.
+
+    """
+
+    pyramids = _pyramids.setdefault(data_matrix, {})
+    pyramid, version = pyramids.get(norm, (None, None))
+
+    if pyramid is None or pyramid.matrix is not data_matrix._m or version != data_matrix._version:
+        pyramid = RasterPyramid(data_matrix._m, norm=norm)
+        pyramids[norm] = pyramid, data_matrix._version
+
+    return pyramid
+
+
+class RasterPyramid:
+    """ This object holds decimated copies of a matrix for displaying it at lower resolutions.
+
+    A level (kt, ks) of the pyramid reduces every 2**kt traces and 2**ks samples of the matrix
+    into a minimum and a maximum. An image of the level shows the one of them with the larger
+    absolute value, so that peaks do not disappear when zooming out. The levels are computed
+    when first needed, reading the matrix in chunks of traces, and kept afterwards.
+
+    """
+
+    def __init__(self, matrix, *, norm=True):
+        """ Create a new RasterPyramid.
+
+        Args:
+            matrix: A matrix where each row is a trace and each column is a sample.
+            norm (bool): Normalize every trace by its maximum, as imshow_dm_into does.
+
+        """
+
+        self.matrix = matrix
+        self.norm = norm
+
+        self._factors = None
+        self._levels = {}
+
+    def level(self, kt, ks):
+        """ Return minimums and maximums of the level (kt, ks). """
+
+        if (kt, ks) in self._levels:
+            return self._levels[kt, ks]
+
+        # reduce the closest finer level that is already computed, if any
+        finer = [key for key in self._levels if key[0] <= kt and key[1] <= ks]
+
+        if finer:
+            ft, fs = max(finer, key=lambda key: key[0] + key[1])
+            mins, maxs = self._levels[ft, fs]
+            mins = _reduce(mins, kt - ft, ks - fs, np.min)
+            maxs = _reduce(maxs, kt - ft, ks - fs, np.max)
+        else:
+            mins, maxs = self._reduce_matrix(kt, ks)
+
+        self._levels[kt, ks] = mins, maxs
+
+        return mins, maxs
+
+    def view(self, x0, x1, y0, y1, width, height):
+        """ Return the image of the visible part of the matrix at the resolution of the screen.
+
+        Args:
+            x0, x1: Visible range of the traces, in trace indices.
+            y0, y1: Visible range of the samples, in sample indices.
+            width, height: Size of the view in pixels.
+
+        Returns:
+            image, extent: A (sample, trace) array and its extent for imshow.
+
+        """
+
+        nt, ns = self.matrix.shape
+
+        # the coarsest levels that still have a node for every pixel
+        kt = _level_for(x1 - x0, width)
+        ks = _level_for(y1 - y0, height)
+
+        t0, t1 = _node_range(x0, x1, kt, nt)
+        s0, s1 = _node_range(y0, y1, ks, ns)
+
+        if kt == 0 and ks == 0:
+            image = np.asarray(self.matrix[t0:t1, s0:s1], dtype=float)
+            if self.norm:
+                image = image / self.factors[t0:t1, np.newaxis]
+        else:
+            mins, maxs = self.level(kt, ks)
+            mins, maxs = mins[t0:t1, s0:s1], maxs[t0:t1, s0:s1]
+            image = np.where(np.abs(maxs) >= np.abs(mins), maxs, mins)
+
+        # nodes of a level are centered on the traces and samples they cover
+        extent = [t0 * 2 ** kt - 0.5, min(t1 * 2 ** kt, nt) - 0.5,
+                  min(s1 * 2 ** ks, ns) - 0.5, s0 * 2 ** ks - 0.5]
+
+        return image.T, extent
+
+    @property
+    def factors(self):
+        """ Normalization factors of the traces, computed chunk by chunk. """
+
+        if self._factors is None:
+            nt = self.matrix.shape[0]
+            self._factors = np.empty(nt)
+
+            for start in range(0, nt, TRACES_PER_CHUNK):
+                self._factors[start:start + TRACES_PER_CHUNK] = self.matrix[start:start + TRACES_PER_CHUNK].max(axis=1)
+
+            self._factors[self._factors == 0] = 1
+
+        return self._factors
+
+    def _reduce_matrix(self, kt, ks):
+        """ Compute the level (kt, ks) from the matrix itself, chunk by chunk. """
+
+        nt, ns = self.matrix.shape
+        bt, bs = 2 ** kt, 2 ** ks
+
+        shape = (-(-nt // bt), -(-ns // bs))
+        mins, maxs = np.empty(shape), np.empty(shape)
+
+        # chunks hold a whole number of nodes
+        step = max(bt, TRACES_PER_CHUNK // bt * bt)
+
+        for start in range(0, nt, step):
+            chunk = np.asarray(self.matrix[start:start + step], dtype=float)
+            if self.norm:
+                chunk = chunk / self.factors[start:start + step, np.newaxis]
+
+            rows = slice(start // bt, start // bt + -(-chunk.shape[0] // bt))
+            mins[rows] = _reduce(chunk, kt, ks, np.min)
+            maxs[rows] = _reduce(chunk, kt, ks, np.max)
+
+        return mins, maxs
+
+
+def _reduce(matrix, kt, ks, func):
+    """ Reduce blocks of 2**kt rows and 2**ks columns of the matrix with func. """
+
+    for axis, k in ((0, kt), (1, ks)):
+        if k == 0:
+            continue
+
+        # pad with the last row or column to fill the last block
+        b = 2 ** k
+        n = matrix.shape[axis]
+        index = np.minimum(np.arange(-(-n // b) * b), n - 1)
+        matrix = func(np.take(matrix, index, axis=axis).reshape(
+            matrix.shape[:axis] + (-1, b) + matrix.shape[axis + 1:]), axis=axis + 1)
+
+    return matrix
+
+
+def _level_for(visible, pixels):
+    """ Return the level at which the visible number of nodes is closest to the pixels, but not less. """
+
+    ratio = visible / max(pixels, 1)
+
+    return int(np.floor(np.log2(ratio))) if ratio >= 2 else 0
+
+
+def _node_range(v0, v1, k, n):
+    """ Return the range of nodes of a level k covering the visible range of indices. """
+
+    b = 2 ** k
+    nodes = -(-n // b)
+    first = int(np.clip(np.floor((v0 + 0.5) / b), 0, nodes - 1))
+    last = int(np.clip(np.ceil((v1 + 0.5) / b), first + 1, nodes))
+
+    return first, last
+
+
+def _size_in_pixels(ax):
+    """ Return the width and the height of the Axes in pixels. """
+
+    bbox = ax.get_window_extent()
+
+    return bbox.width, bbox.height
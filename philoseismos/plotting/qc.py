@@ -0,0 +1,175 @@
+""" philoseismos: engineering seismologist's toolbox.
+
+This file contains functions for rendering QC figures of many gathers in parallel.
+
+author: Ivan Dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import os
+import csv
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from philoseismos.segy import gfunc
+from philoseismos.segy import constants as const
+from philoseismos.segy.dm import DataMatrix
+from philoseismos.segy.g import Geometry
+from philoseismos.processing.spectra import spectrum_of_dm
+from philoseismos.plotting.wiggle import wiggle_dm_into
+from philoseismos.plotting.spectra import plot_average_spectrum_of_dm_into, imshow_dispersion_image_of_dm_into
+from philoseismos.plotting.spectra import pcolormesh_fk_spectrum_of_dm_into
+
+PANELS = ('wiggle', 'spectrum', 'fk', 'dispersion')
+
+
+def render_qc(source, directory, *, key='FFID', panels=PANELS, max_workers=None, panel_size=(4, 5),
+              dpi=100, f_max=150, c_max=1200, c_min=1, c_step=1):
+    """ Render QC figures of every gather into PNG files, in parallel.
+
+    Every gather gets a figure with the chosen panels side by side. The figures are drawn
+    with the Agg backend, without pyplot, so no display is needed. The spectra of the traces
+    are computed once per gather and shared by the spectral panels.
+
+    Args:
+        source: Path to a SEG-Y file to split into gathers by the key header, or a sequence
+            of Data Matrices. Only the key header is scanned to split the file, the traces of
+            every gather are read from the memory-mapped file by the process rendering it.
+        directory: Directory to write the PNG files and the index.csv into.
+        key (str): Header to split the SEG-Y file by.
+        panels: Names of the panels to render, any of 'wiggle', 'spectrum', 'fk', and
+            'dispersion'. The 'fk' and 'dispersion' panels need the OFFSET header.
+        max_workers: Number of processes to render in. If 1, everything is rendered in the
+            current process.
+        panel_size: Width and height of every panel in inches.
+        dpi: Resolution of the PNG files.
+        f_max: Maximum frequency for the spectral panels.
+        c_max, c_min, c_step: Phase velocities for the dispersion image.
+
+    Returns:
+        A dictionary with the number of gathers, the elapsed time in seconds, and the throughput
+            in gathers per second.
+
+    """
+
+    unknown = set(panels) - set(PANELS)
+    if unknown:
+        raise ValueError(f'Unknown QC panels: {", ".join(sorted(unknown))}!')
+
+    os.makedirs(directory, exist_ok=True)
+    start = time.perf_counter()
+
+    names, gathers = _split(source, key)
+    options = dict(panels=tuple(panels), panel_size=panel_size, dpi=dpi, f_max=f_max,
+                   c_max=c_max, c_min=c_min, c_step=c_step)
+    args = [(gather, os.path.join(directory, f'{name}.png'), options) for name, gather in zip(names, gathers)]
+
+    if max_workers == 1:
+        results = [_render_gather(arg) for arg in args]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            chunksize = max(1, len(args) // (4 * (max_workers or os.cpu_count() or 1)))
+            results = list(executor.map(_render_gather, args, chunksize=chunksize))
+
+    with open(os.path.join(directory, 'index.csv'), 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow([key if isinstance(source, str) else 'GATHER', 'TRACES', 'FILE'])
+        for name, (file, traces) in zip(names, results):
+            writer.writerow([name, traces, os.path.basename(file)])
+
+    elapsed = time.perf_counter() - start
+
+    return dict(gathers=len(results), seconds=elapsed,
+                gathers_per_second=len(results) / elapsed if elapsed > 0 else np.inf)
+
+
+def _split(source, key):
+    """ Return names of the gathers and the gathers themselves.
+
+    Gathers of a SEG-Y file are returned as the path to the file and the indices of their traces.
+
+    """
+
+    if not isinstance(source, str):
+        gathers = list(source)
+        return [f'{i:05d}' for i in range(len(gathers))], gathers
+
+    values = gfunc.memmap_trace_records(source)['header'][key].astype(np.int64)
+    groups = pd.Series(values).groupby(values).indices
+
+    names = [str(value) for value in groups]
+    gathers = [(source, indices) for indices in groups.values()]
+
+    return names, gathers
+
+
+def _render_gather(args):
+    """ Render the QC figure of a single gather, return the file name and the number of traces. """
+
+    dm, file, options = args
+    if not isinstance(dm, DataMatrix):
+        dm = _load_gather(*dm)
+
+    panels = options['panels']
+
+    width, height = options['panel_size']
+    fig = Figure(figsize=(width * len(panels), height))
+    FigureCanvasAgg(fig)
+    axes = fig.subplots(1, len(panels), squeeze=False)[0]
+
+    # the spectra are shared by all the spectral panels
+    spectrum = spectrum_of_dm(dm) if set(panels) & {'spectrum', 'fk', 'dispersion'} else None
+
+    for ax, panel in zip(axes, panels):
+        if panel == 'wiggle':
+            wiggle_dm_into(dm, ax)
+        elif panel == 'spectrum':
+            plot_average_spectrum_of_dm_into(dm, ax, spectrum=spectrum)
+            ax.set_xlim(0, options['f_max'])
+        elif panel == 'fk':
+            pcolormesh_fk_spectrum_of_dm_into(dm, ax, f_max=options['f_max'], spectrum=spectrum)
+        elif panel == 'dispersion':
+            imshow_dispersion_image_of_dm_into(dm, ax, options['c_max'], options['c_min'],
+                                               options['c_step'], options['f_max'], spectrum=spectrum)
+
+        ax.set_title(panel)
+
+    fig.tight_layout()
+    fig.savefig(file, dpi=options['dpi'])
+
+    return file, dm._m.shape[0]
+
+
+def _load_gather(file, indices):
+    """ Return a Data Matrix of the traces of a SEG-Y file with the given indices. """
+
+    with open(file, 'br') as sgy:
+        endian = gfunc.grab_endiannes(sgy)
+        sfc = gfunc.grab_sample_format_code(sgy)
+        si = gfunc.grab_sample_interval(sgy)
+
+    # only the records of the gather are read from the file
+    records = gfunc.memmap_trace_records(file)[indices]
+    headers = records['header']
+
+    dm = DataMatrix()
+
+    if sfc == 1:  # IBM is a special case
+        dm._m = np.array([gfunc.unpack_ibm32_series(trace.tobytes(), endian) for trace in records['samples']],
+                         dtype=const.DTYPEMAP[sfc]).reshape(records['samples'].shape)
+    else:
+        dm._m = records['samples'].astype(const.DTYPEMAP[sfc])
+
+    dm._headers = Geometry()
+    dm._headers._df = pd.DataFrame(np.column_stack([headers[name] for name in const.THCOLS]).astype(np.int32),
+                                   index=range(len(indices)), columns=const.THCOLS)
+    dm._headers._apply_scalars_after_unpacking()
+
+    dm.dt = si
+    dm.t = np.arange(0, si * dm._m.shape[1] / 1000, si / 1000)
+
+    return dm
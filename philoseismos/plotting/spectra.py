@@ -7,12 +7,13 @@ import numpy as np
 import scipy.fftpack as fft
 
 from philoseismos.processing.spectra import average_spectrum_of_dm, dispersion_image_of_dm
+from philoseismos.processing.semblance import velocity_spectrum_of_dm, velocity_spectrum_axes
 
 
-def plot_average_spectrum_of_dm_into(data_matrix, ax, norm=True, fill=True, **kwargs):
+def plot_average_spectrum_of_dm_into(data_matrix, ax, norm=True, fill=True, spectrum=None, **kwargs):
     """ Plot the average spectrum of given DM into given Axes. """
 
-    freq, amps = average_spectrum_of_dm(data_matrix)
+    freq, amps = average_spectrum_of_dm(data_matrix, spectrum)
 
     if norm:
         amps /= amps.max()
@@ -20,7 +21,7 @@ def plot_average_spectrum_of_dm_into(data_matrix, ax, norm=True, fill=True, **kw
     return ax.fill_between(freq, amps, **kwargs) if fill else ax.plot(freq, amps)
 
 
-def imshow_dispersion_image_of_dm_into(data_matrix, ax, c_max=1200, c_min=1, c_step=1, f_max=150):
+def imshow_dispersion_image_of_dm_into(data_matrix, ax, c_max=1200, c_min=1, c_step=1, f_max=150, spectrum=None):
     """ Plot the dispersion image of given DM into given Axes.
 
     Args:
@@ -30,20 +31,48 @@ def imshow_dispersion_image_of_dm_into(data_matrix, ax, c_max=1200, c_min=1, c_s
         c_min: Minimum phase velocity to include.
         c_step: Step for the phase velocities.
         f_max: Maximum frequency to consider. Defaults to 150 Hz.
+        spectrum: Spectra of the traces, see spectrum_of_dm, if already computed.
 
     Returns:
         The Image object.
 
     """
 
-    V = dispersion_image_of_dm(data_matrix, c_max, c_min, c_step, f_max)
+    V = dispersion_image_of_dm(data_matrix, c_max, c_min, c_step, f_max, spectrum)
     image = ax.imshow(np.abs(V), aspect='auto', interpolation='spline36', extent=[0, f_max, c_min, c_max])
 
     return image
 
 
-def pcolormesh_fk_spectrum_of_dm_into(data_matrix, ax, f_max=150):
-    fft2d = np.abs(fft.fft2(data_matrix._m.T))
+def imshow_velocity_spectrum_of_dm_into(data_matrix, ax, v_min=100, v_max=3000, v_step=10, window=20):
+    """ Plot the velocity spectrum of given CDP gather into given Axes.
+
+    Args:
+        data_matrix: The DataMatrix object.
+        ax: matplotlib Axes to plot into.
+        v_min: Minimum trial velocity.
+        v_max: Maximum trial velocity.
+        v_step: Step for the trial velocities.
+        window: Length of the time window in ms.
+
+    Returns:
+        The Image object.
+
+    """
+
+    S = velocity_spectrum_of_dm(data_matrix, v_min, v_max, v_step, window)
+    t, vs = velocity_spectrum_axes(data_matrix, v_min, v_max, v_step)
+    image = ax.imshow(S, aspect='auto', interpolation='spline36', extent=[vs[0], vs[-1], t[-1], t[0]])
+
+    return image
+
+
+def pcolormesh_fk_spectrum_of_dm_into(data_matrix, ax, f_max=150, spectrum=None):
+    # the 2D transform is the spatial transform of the spectra of the traces
+    if spectrum is None:
+        fft2d = np.abs(fft.fft2(data_matrix._m.T))
+    else:
+        fft2d = np.abs(fft.fft(spectrum, axis=0)).T
 
     dx = np.diff(data_matrix._headers.OFFSET)[0]
     dt = data_matrix.dt * 1e-6
@@ -5,31 +5,68 @@ e-mail: io.dubrovin@icloud.com """
 
 import numpy as np
 from matplotlib import ticker
+from matplotlib.collections import LineCollection, PolyCollection
 
+# minimum width of a trace on the screen when decimating
+PIXELS_PER_TRACE = 2
 
-def wiggle_dm_into(data_matrix, ax, norm=True, label_header=None, label_header_step=1):
+
+def wiggle_dm_into(data_matrix, ax, norm=True, label_header=None, label_header_step=1, decimate=True):
     """ Display the Data Matrix in form of the seismic wiggle trace image.
 
+    All the traces are drawn as a single LineCollection, and their positive lobes are filled
+    with a single PolyCollection. The Data Matrix is not modified.
+
     Args:
         data_matrix: A SegY's DataMatrix object.
         ax: matplotlib Axes object to draw on.
         norm (bool): Enable or disable normalization of the traces (individual).
         label_header (str): Header name to use as label for x axis.
         label_header_step (int): Step to use when labeling traces with label_header values.
+        decimate (bool): If True, traces and samples that do not fit into the pixels of the Axes
+            are skipped. Every shown trace is then scaled to fill the space of the skipped ones,
+            and the samples are reduced to the minimum and the maximum in every pixel.
+
+    Returns:
+        lines, fills: The LineCollection and the PolyCollection.
 
     """
 
-    for i, trace in enumerate(data_matrix._m):
+    matrix = data_matrix._m
+    t = np.asarray(data_matrix.t, dtype=float)
+    ntraces = matrix.shape[0]
+
+    trace_step, sample_step = 1, 1
+    if decimate:
+        bbox = ax.get_window_extent()
+        trace_step = max(1, int(np.ceil(ntraces / max(bbox.width / PIXELS_PER_TRACE, 1))))
+        sample_step = max(1, int(np.ceil(matrix.shape[1] / max(bbox.height, 1))))
+
+    positions = np.arange(0, ntraces, trace_step)
+    traces, times = _min_max_decimate(matrix[::trace_step], t, sample_step)
+
+    if norm:
+        factor = np.abs(traces).max(axis=1) * 2
+        factor[factor == 0] = 1
+        traces = traces / factor[:, np.newaxis] * trace_step
 
-        if norm and not np.all(trace == 0):
-            trace /= np.abs(trace).max() * 2
+    xs = traces + positions[:, np.newaxis]
+    ts = np.broadcast_to(times, xs.shape)
 
-        ax.plot(trace + i, data_matrix.t, color='k', lw=1)
-        ax.fill_betweenx(data_matrix.t, trace + i, i, where=((trace + i) >= i), color='k')
+    lines = LineCollection(np.stack([xs, ts], axis=-1), colors='k', linewidths=1)
+
+    # positive lobes are filled between the trace and its zero line
+    lobes = np.maximum(traces, 0) + positions[:, np.newaxis]
+    baseline = np.broadcast_to(positions[:, np.newaxis], xs.shape)
+    polygons = np.concatenate([np.stack([lobes, ts], axis=-1),
+                               np.stack([baseline, ts], axis=-1)[:, ::-1]], axis=1)
+    fills = PolyCollection(polygons, facecolors='k', edgecolors='none')
+
+    ax.add_collection(fills)
+    ax.add_collection(lines)
 
-    ntraces = data_matrix._m.shape[0]
     ax.set_xlim(-1, ntraces)
-    ax.set_ylim(0, data_matrix.t.max())
+    ax.set_ylim(0, t.max())
 
     if label_header:
         labels = data_matrix._headers.loc[::label_header_step, label_header].values
@@ -37,3 +74,36 @@ def wiggle_dm_into(data_matrix, ax, norm=True, label_header=None, label_header_s
         ax.xaxis.set_major_formatter(ticker.FixedFormatter(labels))
 
     ax.invert_yaxis()
+
+    return lines, fills
+
+
+def _min_max_decimate(matrix, t, step):
+    """ Reduce every row of the matrix to the minimum and the maximum of every step samples.
+
+    The extremes are kept in their original order, so the shape of the wiggles is preserved.
+
+    Returns:
+        values, times: The decimated matrix and the times of its samples.
+
+    """
+
+    if step == 1:
+        return matrix, t
+
+    n = matrix.shape[1]
+    bins = int(np.ceil(n / step))
+
+    # pad the traces with their last samples to fill the last bin
+    index = np.minimum(np.arange(bins * step), n - 1).reshape(bins, step)
+    binned = matrix[:, index]
+
+    imin = binned.argmin(axis=2)
+    imax = binned.argmax(axis=2)
+    first = np.minimum(imin, imax) + index[:, 0]
+    second = np.maximum(imin, imax) + index[:, 0]
+
+    order = np.stack([first, second], axis=2).reshape(matrix.shape[0], 2 * bins)
+    order = np.minimum(order, n - 1)
+
+    return np.take_along_axis(matrix, order, axis=1), t[order]
@@ -3,4 +3,12 @@
 author: Ivan Dubrovin
 e-mail: io.dubrovin@icloud.com """
 
-from philoseismos.processing.spectra import average_spectrum_of_dm, dispersion_image_of_dm
+from philoseismos.processing.spectra import average_spectrum_of_dm, dispersion_image_of_dm, dispersion_image_axes
+from philoseismos.processing.spectra import spectrum_of_dm
+from philoseismos.processing.binning import BinGrid, gather_indices, bin_geometry
+from philoseismos.processing.nmo import nmo_correct_dm, stack_dm, velocity_grid
+from philoseismos.processing.semblance import velocity_spectrum_of_dm, velocity_spectrum_axes, velocity_spectra_of_dms
+from philoseismos.processing.gain import agc_dm, tpow_gain_dm, balance_traces_dm
+from philoseismos.processing.filters import bandpass_dm, lowpass_dm, highpass_dm, notch_dm, butterworth_dm
+from philoseismos.processing.first_breaks import pick_first_breaks_of_dm, pick_first_breaks_in_file
+from philoseismos.processing.mute import mute_dm, mute_dm_by_table, mute_dm_by_polygon
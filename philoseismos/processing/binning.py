@@ -0,0 +1,203 @@
+""" philoseismos: engineering seismologist's toolbox.
+
+This file contains functions for computing the geometry of traces and binning them into CMPs.
+
+author: Ivan Dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import numpy as np
+
+
+def midpoints(sx, sy, rx, ry):
+    """ Return the coordinates of the midpoints between the sources and the receivers. """
+
+    sx, sy, rx, ry = _as_floats(sx, sy, rx, ry)
+
+    return (sx + rx) / 2, (sy + ry) / 2
+
+
+def offsets(sx, sy, rx, ry):
+    """ Return the distances between the sources and the receivers. """
+
+    sx, sy, rx, ry = _as_floats(sx, sy, rx, ry)
+
+    return np.hypot(rx - sx, ry - sy)
+
+
+def azimuths(sx, sy, rx, ry):
+    """ Return the azimuths from the sources to the receivers, in degrees clockwise from the Y axis. """
+
+    sx, sy, rx, ry = _as_floats(sx, sy, rx, ry)
+
+    return np.degrees(np.arctan2(rx - sx, ry - sy)) % 360
+
+
+class BinGrid:
+    """ This object represents a regular grid of CMP bins.
+
+    The inline axis of the grid points at the azimuth (clockwise from the Y axis), and the
+    crossline axis is 90 degrees clockwise from it. The origin is the center of the first
+    bin. Bins are numbered row by row: number = crossline index * nx + inline index.
+    A 2D grid has a single row, and the crossline position of the midpoints is ignored.
+
+    """
+
+    def __init__(self, x0, y0, dx, dy=None, *, azimuth=90, nx=None, ny=None):
+        """ Create a new BinGrid.
+
+        Args:
+            x0, y0: Coordinates of the center of the first bin.
+            dx: Size of the bins along the inline axis.
+            dy: Size of the bins along the crossline axis. If None, the grid is 2D.
+            azimuth: Direction of the inline axis, in degrees clockwise from the Y axis. Defaults
+                to the X axis, as the lines in philoseismos only fill the X coordinates.
+            nx, ny: Number of bins along the axes. If None, the grid is unlimited along the
+                axis, and bins can only be numbered along the inline one.
+
+        """
+
+        self.x0, self.y0 = x0, y0
+        self.dx, self.dy = dx, dy
+        self.azimuth = azimuth
+        self.nx = nx
+        self.ny = 1 if dy is None else ny
+
+    @classmethod
+    def fit(cls, x, y, dx, dy=None, *, azimuth=90):
+        """ Create a BinGrid that covers all the given midpoints, see __init__ for the arguments. """
+
+        x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+
+        grid = cls(x.flat[0], y.flat[0], dx, dy, azimuth=azimuth)
+        inline, crossline = grid._local(x, y)
+
+        # move the origin to the first bin and count the bins
+        u0 = np.floor(inline.min() / dx + 0.5) * dx
+        v0 = np.floor(crossline.min() / dy + 0.5) * dy if dy else 0
+        (ux, uy), (vx, vy) = grid._axes()
+
+        grid.x0, grid.y0 = grid.x0 + u0 * ux + v0 * vx, grid.y0 + u0 * uy + v0 * vy
+        grid.nx = int(np.floor((inline.max() - u0) / dx + 0.5)) + 1
+        grid.ny = int(np.floor((crossline.max() - v0) / dy + 0.5)) + 1 if dy else 1
+
+        return grid
+
+    def indices(self, x, y):
+        """ Return the inline and the crossline indices of the bins of the midpoints.
+
+        Midpoints outside of a limited grid get the index of -1 along both axes.
+
+        """
+
+        inline, crossline = self._local(x, y)
+
+        ix = np.floor(inline / self.dx + 0.5).astype(np.int64)
+        iy = np.zeros_like(ix) if self.dy is None else np.floor(crossline / self.dy + 0.5).astype(np.int64)
+
+        outside = np.zeros(ix.shape, dtype=bool)
+        if self.nx is not None:
+            outside |= (ix < 0) | (ix >= self.nx)
+        if self.ny is not None:
+            outside |= (iy < 0) | (iy >= self.ny)
+
+        ix[outside], iy[outside] = -1, -1
+
+        return ix, iy
+
+    def bins(self, x, y):
+        """ Return the numbers of the bins of the midpoints, or -1 for midpoints outside of the grid. """
+
+        ix, iy = self.indices(x, y)
+
+        if self.dy is not None and self.nx is None:
+            raise ValueError('Bins of a 3D grid can only be numbered when the number of inline bins is known!')
+
+        return np.where(ix >= 0, iy * (self.nx or 0) + ix, -1)
+
+    def centers(self):
+        """ Return the X and Y coordinates of the centers of the bins, as (ny, nx) arrays. """
+
+        iy, ix = np.mgrid[:self.ny, :self.nx]
+        (ux, uy), (vx, vy) = self._axes()
+        u, v = ix * self.dx, iy * (self.dy or 0)
+
+        return self.x0 + u * ux + v * vx, self.y0 + u * uy + v * vy
+
+    def fold(self, bins):
+        """ Return the number of traces in every bin, as an (ny, nx) array. """
+
+        if self.nx is None:
+            raise ValueError('Fold can only be computed when the number of bins is known, use BinGrid.fit!')
+
+        bins = np.asarray(bins)
+
+        return np.bincount(bins[bins >= 0], minlength=self.nx * self.ny).reshape(self.ny, self.nx)
+
+    def _axes(self):
+        """ Return the unit vectors of the inline and the crossline axes. """
+
+        a = np.radians(self.azimuth)
+
+        return (np.sin(a), np.cos(a)), (np.cos(a), -np.sin(a))
+
+    def _local(self, x, y):
+        """ Return the inline and the crossline coordinates of the points. """
+
+        (ux, uy), (vx, vy) = self._axes()
+        x = np.asarray(x, dtype=float) - self.x0
+        y = np.asarray(y, dtype=float) - self.y0
+
+        return x * ux + y * uy, x * vx + y * vy
+
+
+def gather_indices(keys):
+    """ Group traces by the values of a key in a single pass.
+
+    Args:
+        keys: Value of the key for every trace, for example the bin numbers.
+
+    Returns:
+        values, groups: Sorted unique values of the key, and an array of trace indices
+            for each of them, the traces in their original order.
+
+    """
+
+    keys = np.asarray(keys)
+    order = np.argsort(keys, kind='stable')
+    values, starts = np.unique(keys[order], return_index=True)
+
+    return values, np.split(order, starts[1:])
+
+
+def bin_geometry(geometry, grid):
+    """ Fill the CDP_X, CDP_Y, OFFSET, and CDP headers of a Geometry from the coordinates.
+
+    CDP numbers start from 1, traces outside of the grid get the CDP number of 0.
+
+    Args:
+        geometry: Geometry with SOU_X, SOU_Y, REC_X, and REC_Y filled in.
+        grid: BinGrid to assign the bins on.
+
+    Returns:
+        The bin numbers of the traces.
+
+    """
+
+    sx, sy = geometry.SOU_X.values, geometry.SOU_Y.values
+    rx, ry = geometry.REC_X.values, geometry.REC_Y.values
+
+    cx, cy = midpoints(sx, sy, rx, ry)
+    bins = grid.bins(cx, cy)
+
+    geometry.CDP_X = cx
+    geometry.CDP_Y = cy
+    geometry.OFFSET = np.round(offsets(sx, sy, rx, ry))
+    geometry.CDP = bins + 1
+
+    return bins
+
+
+def _as_floats(*arrays):
+    """ Return the arrays of coordinates as arrays of floats. """
+
+    return [np.asarray(a).astype(float) for a in arrays]
@@ -0,0 +1,191 @@
+""" philoseismos: engineering seismologist's toolbox.
+
+This file contains zero-phase frequency filters.
+
+author: Ivan Dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import numpy as np
+from scipy import fft
+from scipy import signal
+
+from philoseismos.processing import gfunc
+
+
+def bandpass(matrix, dt, f1, f2, f3, f4, *, workers=-1, inplace=False):
+    """ Apply a zero-phase bandpass filter with cosine tapers to the traces of a matrix.
+
+    The filter passes frequencies from f2 to f3, and rejects frequencies below f1 and
+    above f4.
+
+    Args:
+        matrix: A matrix where each row is a trace and each column is a sample. Can be a
+            memory-mapped array, it is processed chunk by chunk.
+        dt: Sample interval in microseconds.
+        f1, f2, f3, f4: Corner frequencies in Hz, in ascending order.
+        workers: Number of threads for the FFT, negative values count back from the number
+            of CPU cores. Defaults to -1, all the cores.
+        inplace: If True, modify the matrix instead of returning a new one.
+
+    Returns:
+        The filtered matrix.
+
+    """
+
+    if not f1 <= f2 <= f3 <= f4:
+        raise ValueError('Corner frequencies must be in ascending order!')
+
+    return _apply_mask(matrix, dt, lambda f: _ramp(f, f1, f2) * (1 - _ramp(f, f3, f4)), workers, inplace)
+
+
+def lowpass(matrix, dt, f3, f4, *, workers=-1, inplace=False):
+    """ Apply a zero-phase lowpass filter that passes frequencies below f3 and rejects those above f4.
+    See bandpass for the arguments. """
+
+    if not f3 <= f4:
+        raise ValueError('Corner frequencies must be in ascending order!')
+
+    return _apply_mask(matrix, dt, lambda f: 1 - _ramp(f, f3, f4), workers, inplace)
+
+
+def highpass(matrix, dt, f1, f2, *, workers=-1, inplace=False):
+    """ Apply a zero-phase highpass filter that rejects frequencies below f1 and passes those above f2.
+    See bandpass for the arguments. """
+
+    if not f1 <= f2:
+        raise ValueError('Corner frequencies must be in ascending order!')
+
+    return _apply_mask(matrix, dt, lambda f: _ramp(f, f1, f2), workers, inplace)
+
+
+def notch(matrix, dt, frequency, width=2, *, workers=-1, inplace=False):
+    """ Apply a zero-phase notch filter with a cosine taper, for example to remove power line noise.
+
+    Args:
+        matrix: A matrix where each row is a trace and each column is a sample.
+        dt: Sample interval in microseconds.
+        frequency: Frequency to reject in Hz.
+        width: Width of the notch in Hz, frequencies further than a half of it are passed.
+        workers: Number of threads for the FFT, negative values count back from the number
+            of CPU cores. Defaults to -1, all the cores.
+        inplace: If True, modify the matrix instead of returning a new one.
+
+    Returns:
+        The filtered matrix.
+
+    """
+
+    return _apply_mask(matrix, dt, lambda f: _ramp(np.abs(f - frequency), 0, width / 2), workers, inplace)
+
+
+def butterworth(matrix, dt, low=None, high=None, order=4, *, inplace=False):
+    """ Apply a zero-phase Butterworth filter, forwards and backwards along the traces.
+
+    Args:
+        matrix: A matrix where each row is a trace and each column is a sample.
+        dt: Sample interval in microseconds.
+        low: Low-cut frequency in Hz. If None, the filter is a lowpass one.
+        high: High-cut frequency in Hz. If None, the filter is a highpass one.
+        order: Order of the filter, its slopes are doubled by filtering twice.
+        inplace: If True, modify the matrix instead of returning a new one.
+
+    Returns:
+        The filtered matrix.
+
+    """
+
+    if low is None and high is None:
+        raise ValueError('At least one of the cut frequencies is needed!')
+
+    if low is None:
+        sos = signal.butter(order, high, btype='lowpass', fs=1e6 / dt, output='sos')
+    elif high is None:
+        sos = signal.butter(order, low, btype='highpass', fs=1e6 / dt, output='sos')
+    else:
+        sos = signal.butter(order, [low, high], btype='bandpass', fs=1e6 / dt, output='sos')
+
+    return gfunc.apply_by_chunks(matrix, lambda chunk, rows: signal.sosfiltfilt(sos, chunk, axis=1), inplace, 'Filters')
+
+
+def bandpass_dm(data_matrix, f1, f2, f3, f4, *, workers=-1, inplace=False):
+    """ Return a Data Matrix filtered with bandpass, updating the FREQXL and FREQXH headers. """
+
+    headers = dict(FREQXL=(f1 + f2) / 2, FREQXH=(f3 + f4) / 2)
+    return _filter_dm(data_matrix, inplace, headers, bandpass, data_matrix.dt, f1, f2, f3, f4, workers=workers)
+
+
+def lowpass_dm(data_matrix, f3, f4, *, workers=-1, inplace=False):
+    """ Return a Data Matrix filtered with lowpass, updating the FREQXH header. """
+
+    headers = dict(FREQXH=(f3 + f4) / 2)
+    return _filter_dm(data_matrix, inplace, headers, lowpass, data_matrix.dt, f3, f4, workers=workers)
+
+
+def highpass_dm(data_matrix, f1, f2, *, workers=-1, inplace=False):
+    """ Return a Data Matrix filtered with highpass, updating the FREQXL header. """
+
+    headers = dict(FREQXL=(f1 + f2) / 2)
+    return _filter_dm(data_matrix, inplace, headers, highpass, data_matrix.dt, f1, f2, workers=workers)
+
+
+def notch_dm(data_matrix, frequency, width=2, *, workers=-1, inplace=False):
+    """ Return a Data Matrix filtered with notch, updating the FREQXN header. """
+
+    headers = dict(FREQXN=frequency)
+    return _filter_dm(data_matrix, inplace, headers, notch, data_matrix.dt, frequency, width, workers=workers)
+
+
+def butterworth_dm(data_matrix, low=None, high=None, order=4, *, inplace=False):
+    """ Return a Data Matrix filtered with butterworth, updating the cut frequencies and slopes. """
+
+    # every pass of the filter falls off at 6 dB per octave per order
+    headers = {}
+    if low is not None:
+        headers.update(FREQXL=low, FXLSLOP=12 * order)
+    if high is not None:
+        headers.update(FREQXH=high, FXHSLOP=12 * order)
+
+    return _filter_dm(data_matrix, inplace, headers, butterworth, data_matrix.dt, low, high, order)
+
+
+def _filter_dm(data_matrix, inplace, headers, function, *args, **kwargs):
+    """ Apply a filter to the Data Matrix, or to a copy of it, and fill the headers. """
+
+    new = gfunc.process_dm(data_matrix, inplace, function, *args, **kwargs)
+
+    if new._headers is not None:
+        for header, value in headers.items():
+            new._headers.loc[:, header] = int(round(value))
+
+    return new
+
+
+def _apply_mask(matrix, dt, mask_function, workers, inplace):
+    """ Multiply the spectra of the traces by a real mask of the frequency.
+
+    The traces are padded with zeros to at least twice their length, so that the response of
+    the filter does not wrap around from the end of a trace to its start.
+
+    """
+
+    ns = matrix.shape[1]
+    n = fft.next_fast_len(2 * ns, True)
+    mask = mask_function(fft.rfftfreq(n, dt / 1e6))
+
+    def apply(chunk, rows):
+        spectrum = fft.rfft(chunk, n=n, axis=1, workers=workers)
+        spectrum *= mask
+        return fft.irfft(spectrum, n=n, axis=1, workers=workers)[:, :ns]
+
+    return gfunc.apply_by_chunks(matrix, apply, inplace, 'Filters')
+
+
+def _ramp(f, start, end):
+    """ Return a cosine ramp from 0 at the start frequency to 1 at the end one. """
+
+    if end <= start:
+        return (f >= start).astype(float)
+
+    x = np.clip((f - start) / (end - start), 0, 1)
+
+    return 0.5 - 0.5 * np.cos(np.pi * x)
@@ -0,0 +1,203 @@
+""" philoseismos: engineering seismologist's toolbox.
+
+This file contains functions for automatic picking of the first breaks.
+
+author: Ivan Dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import numpy as np
+
+from philoseismos.processing.gfunc import traces_per_chunk, window_mean
+from philoseismos.segy import gfunc
+from philoseismos.segy.editor import HeaderEditor
+
+METHODS = ('sta_lta', 'mer')
+
+
+def sta_lta(matrix, dt, sta=5, lta=50):
+    """ Return the STA/LTA characteristic function of every trace of a matrix.
+
+    The short-term average of the energy is taken over a window starting at the sample, and
+    the long-term average over a window ending before it, so the ratio peaks at the onset of
+    an arrival. The averages are computed from partial sums, for all traces at once.
+    The ratio is 0 within the first short-term window.
+
+    Args:
+        matrix: A matrix where each row is a trace and each column is a sample.
+        dt: Sample interval in microseconds.
+        sta: Length of the short-term window in ms.
+        lta: Length of the long-term window in ms.
+
+    Returns:
+        A matrix of the same shape with the values of the characteristic function.
+
+    """
+
+    energy = np.asarray(matrix, dtype=float) ** 2
+    n = _samples(sta, dt)
+
+    short = window_mean(energy, 0, n - 1)
+    long = window_mean(energy, _samples(lta, dt), -1)
+
+    return _ratio(short, long, energy, n)
+
+
+def modified_energy_ratio(matrix, dt, window=10):
+    """ Return the modified energy ratio characteristic function of every trace of a matrix.
+
+    The ratio of the energy in the windows after and before the sample is multiplied by the
+    absolute amplitude of the sample and raised to the power of 3.
+
+    Args:
+        matrix: A matrix where each row is a trace and each column is a sample.
+        dt: Sample interval in microseconds.
+        window: Length of the windows in ms.
+
+    Returns:
+        A matrix of the same shape with the values of the characteristic function.
+
+    """
+
+    matrix = np.asarray(matrix, dtype=float)
+    energy = matrix ** 2
+    n = _samples(window, dt)
+
+    ratio = _ratio(window_mean(energy, 0, n - 1), window_mean(energy, n, -1), energy, n)
+
+    return (ratio * np.abs(matrix)) ** 3
+
+
+def pick_first_breaks(matrix, dt, *, method='sta_lta', sta=5, lta=50, threshold=None):
+    """ Pick the first breaks on every trace of a matrix.
+
+    Args:
+        matrix: A matrix where each row is a trace and each column is a sample. Can be a
+            memory-mapped array, it is processed chunk by chunk.
+        dt: Sample interval in microseconds.
+        method: 'sta_lta' or 'mer' for the modified energy ratio, which uses the sta window.
+        sta: Length of the short-term window in ms.
+        lta: Length of the long-term window in ms.
+        threshold: If None, the first break is the maximum of the characteristic function.
+            Otherwise, it is the first sample where the function reaches this fraction of
+            its maximum on the trace.
+
+    Returns:
+        A 1D array of the first break times in ms, NaN for dead traces.
+
+    """
+
+    if method not in METHODS:
+        raise ValueError(f'Unknown picking method: {method}!')
+
+    n, ns = matrix.shape
+    picks = np.full(n, np.nan)
+    traces = traces_per_chunk(ns)
+
+    for start in range(0, n, traces):
+        stop = min(start + traces, n)
+        chunk = np.asarray(matrix[start:stop], dtype=float)
+
+        if method == 'sta_lta':
+            cf = sta_lta(chunk, dt, sta, lta)
+        else:
+            cf = modified_energy_ratio(chunk, dt, sta)
+
+        peak = cf.max(axis=1)
+
+        if threshold is None:
+            index = np.argmax(cf, axis=1)
+        else:
+            index = np.argmax(cf >= threshold * peak[:, None], axis=1)
+
+        picks[start:stop] = np.where(peak > 0, index * dt / 1000, np.nan)
+
+    return picks
+
+
+def pick_first_breaks_of_dm(data_matrix, *, header=None, **kwargs):
+    """ Pick the first breaks on every trace of a Data Matrix.
+
+    Args:
+        data_matrix: A Data Matrix object.
+        header: If given, the picks are also written into this header, rounded to ms, with
+            0 for dead traces.
+        **kwargs: Options for pick_first_breaks.
+
+    Returns:
+        A 1D array of the first break times in ms, NaN for dead traces.
+
+    """
+
+    picks = pick_first_breaks(data_matrix._m, data_matrix.dt, **kwargs)
+
+    if header is not None:
+        data_matrix._headers.loc[:, header] = np.round(np.nan_to_num(picks)).astype(int)
+
+    return picks
+
+
+def pick_first_breaks_in_file(file: str, *, header=None, progress=None, **kwargs):
+    """ Pick the first breaks on every trace of a SEG-Y file, without loading the file.
+
+    The trace records are memory-mapped and streamed chunk by chunk.
+
+    Args:
+        file (str): Path to the SEG-Y file.
+        header: If given, the picks are written into this trace header of the file, rounded
+            to ms, with 0 for dead traces.
+        progress: If given, called with the number of processed traces and the total number
+            of traces after every chunk.
+        **kwargs: Options for pick_first_breaks.
+
+    Returns:
+        A 1D array of the first break times in ms, NaN for dead traces.
+
+    """
+
+    with open(file, 'br') as sgy:
+        sfc = gfunc.grab_sample_format_code(sgy)
+        dt = gfunc.grab_sample_interval(sgy)
+
+    if sfc == 1:
+        raise ValueError('Files with IBM floats are not supported!')
+
+    samples = gfunc.memmap_trace_records(file)['samples']
+    n = samples.shape[0]
+
+    picks = np.full(n, np.nan)
+    traces = traces_per_chunk(samples.shape[1])
+
+    for start in range(0, n, traces):
+        stop = min(start + traces, n)
+        picks[start:stop] = pick_first_breaks(samples[start:stop], dt, **kwargs)
+
+        if progress is not None:
+            progress(stop, n)
+
+    if header is not None:
+        with HeaderEditor(file) as headers:
+            headers[header] = np.nan_to_num(picks)
+
+    return picks
+
+
+def _samples(window, dt):
+    """ Return the number of samples in a window of the given length in ms, at least one. """
+
+    return max(1, int(round(window * 1000 / dt)))
+
+
+def _ratio(numerator, denominator, energy, skip):
+    """ Return the ratio of the averages, stabilized by a small fraction of the mean energy of the trace.
+
+    The first samples have too few samples before them for a stable ratio, so it is set to 0.
+
+    """
+
+    stabilization = 1e-6 * energy.mean(axis=1, keepdims=True)
+    denominator = denominator + stabilization
+
+    ratio = np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator > 0)
+    ratio[:, :skip] = 0
+
+    return ratio
@@ -0,0 +1,121 @@
+""" philoseismos: engineering seismologist's toolbox.
+
+This file contains gain functions: AGC, t^n gain, and trace balancing.
+
+author: Ivan Dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import numpy as np
+
+from philoseismos.processing import gfunc
+
+KINDS = ('rms', 'mean')
+
+
+def agc(matrix, dt, window=100, *, kind='rms', inplace=False):
+    """ Apply automatic gain control to the traces of a matrix.
+
+    Every sample is divided by the RMS or the mean absolute amplitude of the trace in a
+    window centered on it. The windows are computed from partial sums, so the cost does
+    not depend on the length of the window.
+
+    Args:
+        matrix: A matrix where each row is a trace and each column is a sample. Can be a
+            memory-mapped array, it is processed chunk by chunk.
+        dt: Sample interval in microseconds.
+        window: Length of the window in ms.
+        kind: 'rms' or 'mean' for the mean absolute amplitude.
+        inplace: If True, modify the matrix instead of returning a new one.
+
+    Returns:
+        The matrix with the gain applied.
+
+    """
+
+    _check_kind(kind)
+    half = max(0, int(round(window * 1000 / dt)) // 2)
+
+    def gain(chunk, rows):
+        amplitude = gfunc.window_mean(chunk ** 2 if kind == 'rms' else np.abs(chunk), half, half)
+        if kind == 'rms':
+            np.sqrt(amplitude, out=amplitude)
+        return np.divide(chunk, amplitude, out=np.zeros_like(chunk), where=amplitude > 0)
+
+    return gfunc.apply_by_chunks(matrix, gain, inplace, 'Gain')
+
+
+def tpow_gain(matrix, dt, power=1, *, inplace=False):
+    """ Multiply the traces of a matrix by time in seconds to the given power.
+
+    The power of 1 corrects the spherical divergence in a medium of constant velocity.
+
+    Args:
+        matrix: A matrix where each row is a trace and each column is a sample.
+        dt: Sample interval in microseconds.
+        power: Power of the time. For a negative power, the samples at t = 0 are set to 0.
+        inplace: If True, modify the matrix instead of returning a new one.
+
+    Returns:
+        The matrix with the gain applied.
+
+    """
+
+    t = np.arange(matrix.shape[1]) * dt / 1e6
+
+    if power < 0:
+        # a negative power of 0 is infinite
+        scale = np.power(t, power, out=np.zeros_like(t), where=t > 0)
+    else:
+        scale = t ** power
+
+    return gfunc.apply_by_chunks(matrix, lambda chunk, rows: chunk * scale, inplace, 'Gain')
+
+
+def balance_traces(matrix, *, kind='rms', inplace=False):
+    """ Divide every trace of a matrix by its RMS or mean absolute amplitude.
+
+    Args:
+        matrix: A matrix where each row is a trace and each column is a sample.
+        kind: 'rms' or 'mean' for the mean absolute amplitude.
+        inplace: If True, modify the matrix instead of returning a new one.
+
+    Returns:
+        The matrix with the gain applied.
+
+    """
+
+    _check_kind(kind)
+
+    def gain(chunk, rows):
+        if kind == 'rms':
+            amplitude = np.sqrt(np.mean(chunk ** 2, axis=1, keepdims=True))
+        else:
+            amplitude = np.mean(np.abs(chunk), axis=1, keepdims=True)
+        return np.divide(chunk, amplitude, out=np.zeros_like(chunk), where=amplitude > 0)
+
+    return gfunc.apply_by_chunks(matrix, gain, inplace, 'Gain')
+
+
+def agc_dm(data_matrix, window=100, *, kind='rms', inplace=False):
+    """ Return a Data Matrix with automatic gain control applied, see agc. """
+
+    return gfunc.process_dm(data_matrix, inplace, agc, data_matrix.dt, window, kind=kind)
+
+
+def tpow_gain_dm(data_matrix, power=1, *, inplace=False):
+    """ Return a Data Matrix with the t^n gain applied, see tpow_gain. """
+
+    return gfunc.process_dm(data_matrix, inplace, tpow_gain, data_matrix.dt, power)
+
+
+def balance_traces_dm(data_matrix, *, kind='rms', inplace=False):
+    """ Return a Data Matrix with balanced traces, see balance_traces. """
+
+    return gfunc.process_dm(data_matrix, inplace, balance_traces, kind=kind)
+
+
+def _check_kind(kind):
+    """ Raise a ValueError for an unknown kind of amplitude. """
+
+    if kind not in KINDS:
+        raise ValueError(f'Unknown kind of amplitude: {kind}!')
@@ -0,0 +1,131 @@
+""" philoseismos: engineering seismologist's toolbox.
+
+This file defines general functions used in philoseismos.processing package.
+
+author: Ivan Dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import numpy as np
+
+from philoseismos.segy.dm import DataMatrix
+from philoseismos.segy.g import Geometry
+
+# number of samples processed at a time, to bound the memory usage
+ELEMENTS_PER_CHUNK = 2 ** 22
+
+
+def traces_per_chunk(ns, per_sample=1):
+    """ Return the number of traces of ns samples to process at a time, at least one.
+
+    Args:
+        ns: Number of samples in a trace.
+        per_sample: Number of elements held in memory for every sample of a trace.
+
+    """
+
+    return max(1, ELEMENTS_PER_CHUNK // max(1, ns * per_sample))
+
+
+def apply_by_chunks(matrix, function, inplace, name='Processing'):
+    """ Apply the function to chunks of traces, writing into the matrix or into a new one.
+
+    Args:
+        matrix: A matrix where each row is a trace and each column is a sample. Can be a
+            memory-mapped array, it is read chunk by chunk.
+        function: Called with a chunk of traces as floats and the slice of their rows, returns
+            the processed chunk.
+        inplace: If True, write into the matrix instead of a new one.
+        name: What is applied, for the error message.
+
+    Returns:
+        The processed matrix.
+
+    """
+
+    if inplace:
+        if not np.issubdtype(matrix.dtype, np.floating):
+            raise ValueError(f'{name} can only be applied in place to a matrix of floats!')
+        out = matrix
+    else:
+        out = np.empty(matrix.shape, dtype=np.result_type(matrix.dtype, np.float32))
+
+    traces = traces_per_chunk(matrix.shape[1])
+
+    for start in range(0, matrix.shape[0], traces):
+        rows = slice(start, min(start + traces, matrix.shape[0]))
+        out[rows] = function(np.array(matrix[rows], dtype=float), rows)
+
+    return out
+
+
+def process_dm(data_matrix, inplace, function, *args, **kwargs):
+    """ Apply a function of a matrix to the Data Matrix, or to a copy of it.
+
+    The function is called with the matrix of the Data Matrix, the args and the kwargs, and
+    with inplace=True to process the Data Matrix in place. A change in place increments the
+    version of the Data Matrix, so that the cached pyramids of it are rebuilt.
+
+    Returns:
+        The processed DataMatrix object.
+
+    """
+
+    if inplace:
+        function(data_matrix._m, *args, inplace=True, **kwargs)
+        data_matrix._version += 1
+        return data_matrix
+
+    return copy_dm(data_matrix, function(data_matrix._m, *args, **kwargs))
+
+
+def copy_dm(data_matrix, matrix):
+    """ Return a new Data Matrix with the given matrix and a copy of the rest of the Data Matrix. """
+
+    new = DataMatrix()
+    new.dt = data_matrix.dt
+    new.t = np.copy(data_matrix.t)
+    new._m = matrix
+
+    if data_matrix._headers is not None:
+        new._headers = Geometry()
+        new._headers._df = data_matrix._headers._df.copy()
+
+    return new
+
+
+def window_mean(a, before, after):
+    """ Return means of the last axis over windows from `before` samples before every sample
+    to `after` samples after it, inclusive.
+
+    Windows are shorter at the ends, empty windows have the mean of 0. A negative `after`
+    excludes the sample itself, for example before=n and after=-1 give the windows of n
+    samples ending before every sample.
+
+    Every window is a sum of a suffix of one block of the window length and a prefix of the
+    next one, so it only adds up values from inside the window. Unlike differences of
+    cumulative sums of whole traces, the quiet windows keep their precision after loud ones.
+
+    """
+
+    a = np.asarray(a, dtype=float)
+    ns = a.shape[-1]
+    length = before + after + 1
+
+    if length < 1:
+        return np.zeros(a.shape)
+
+    # the window of the sample j starts at j in the padded array
+    blocks = -(-(ns + before + max(after, 0)) // length)
+    padded = np.zeros(a.shape[:-1] + (blocks * length,))
+    padded[..., before:before + ns] = a
+
+    split = padded.reshape(a.shape[:-1] + (blocks, length))
+    prefix = np.cumsum(split, axis=-1).reshape(padded.shape)
+    suffix = np.cumsum(split[..., ::-1], axis=-1)[..., ::-1].reshape(padded.shape)
+
+    j = np.arange(ns)
+    sums = suffix[..., j] + np.where(j % length > 0, prefix[..., j + length - 1], 0)
+
+    count = np.minimum(j + after, ns - 1) - np.maximum(j - before, 0) + 1
+
+    return np.divide(sums, count, out=np.zeros(sums.shape), where=count > 0)
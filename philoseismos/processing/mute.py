@@ -0,0 +1,176 @@
+""" philoseismos: engineering seismologist's toolbox.
+
+This file contains functions for muting traces with tapered masks.
+
+author: Ivan Dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import numpy as np
+from matplotlib.path import Path
+
+from philoseismos.processing import gfunc
+
+KINDS = ('top', 'bottom')
+
+
+def taper_mask(t, start, end, kind='top'):
+    """ Return mute masks of the traces with cosine tapers.
+
+    A top mute is 0 before the start time and rises to 1 at the end time. A bottom mute is
+    1 before the start time and falls to 0 at the end time.
+
+    Args:
+        t: 1D array of times of the samples in ms.
+        start: Start times of the tapers in ms, one for every trace.
+        end: End times of the tapers in ms, one for every trace.
+        kind: 'top' or 'bottom'.
+
+    Returns:
+        A (trace, sample) array of weights from 0 to 1.
+
+    """
+
+    if kind not in KINDS:
+        raise ValueError(f'Unknown kind of mute: {kind}!')
+
+    t = np.asarray(t, dtype=float)
+    start = np.asarray(start, dtype=float)[:, None]
+    end = np.maximum(np.asarray(end, dtype=float)[:, None], start)
+
+    length = end - start
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x = np.where(length > 0, np.clip((t - start) / length, 0, 1), (t >= start).astype(float))
+
+    mask = 0.5 - 0.5 * np.cos(np.pi * x)
+
+    return mask if kind == 'top' else 1 - mask
+
+
+def mute(matrix, dt, start, end, *, kind='top', inplace=False):
+    """ Mute the traces of a matrix with cosine tapers, see taper_mask.
+
+    Args:
+        matrix: A matrix where each row is a trace and each column is a sample. Can be a
+            memory-mapped array, it is processed chunk by chunk.
+        dt: Sample interval in microseconds.
+        start: Start times of the tapers in ms, one for every trace.
+        end: End times of the tapers in ms, one for every trace.
+        kind: 'top' or 'bottom'.
+        inplace: If True, multiply the matrix in place instead of returning a new one.
+
+    Returns:
+        The muted matrix.
+
+    """
+
+    t = np.arange(matrix.shape[1]) * dt / 1000
+    start = np.broadcast_to(np.asarray(start, dtype=float), (matrix.shape[0],))
+    end = np.broadcast_to(np.asarray(end, dtype=float), (matrix.shape[0],))
+
+    return gfunc.apply_by_chunks(matrix, lambda chunk, rows: chunk * taper_mask(t, start[rows], end[rows], kind),
+                                 inplace, 'Mutes')
+
+
+def mute_by_table(matrix, dt, offsets, table_offsets, table_times, *, taper=10, kind='top', inplace=False):
+    """ Mute the traces of a matrix at times interpolated from an offset-time table.
+
+    Args:
+        matrix: A matrix where each row is a trace and each column is a sample.
+        dt: Sample interval in microseconds.
+        offsets: 1D array of offsets in m, one for every trace. Absolute values are used.
+        table_offsets: Offsets of the table in m, in ascending order.
+        table_times: Mute times of the table in ms. Between the offsets of the table the
+            times are interpolated linearly, outside of them the closest time is used.
+        taper: Length of the taper in ms, starting at the mute time.
+        kind: 'top' or 'bottom'.
+        inplace: If True, multiply the matrix in place instead of returning a new one.
+
+    Returns:
+        The muted matrix.
+
+    """
+
+    start = np.interp(np.abs(np.asarray(offsets, dtype=float)), table_offsets, table_times)
+
+    return mute(matrix, dt, start, start + taper, kind=kind, inplace=inplace)
+
+
+def mute_by_polygon(matrix, dt, offsets, polygon, *, taper=0, inside=True, inplace=False):
+    """ Mute the samples of a matrix inside or outside of a polygon in offset-time space.
+
+    Args:
+        matrix: A matrix where each row is a trace and each column is a sample.
+        dt: Sample interval in microseconds.
+        offsets: 1D array of offsets in m, one for every trace.
+        polygon: A sequence of (offset in m, time in ms) vertices.
+        taper: Length in ms of the taper along the traces at the edges of the polygon.
+        inside: If True, the samples inside the polygon are muted, otherwise the ones outside.
+        inplace: If True, multiply the matrix in place instead of returning a new one.
+
+    Returns:
+        The muted matrix.
+
+    """
+
+    path = Path(np.asarray(polygon, dtype=float))
+    offsets = np.asarray(offsets, dtype=float)
+
+    ns = matrix.shape[1]
+    t = np.arange(ns) * dt / 1000
+    half = int(round(taper * 1000 / dt)) // 2
+
+    def apply(chunk, rows):
+        x, y = np.broadcast_arrays(offsets[rows, None], t)
+        muted = path.contains_points(np.column_stack([x.ravel(), y.ravel()])).reshape(x.shape)
+        weights = (~muted if inside else muted).astype(float)
+
+        if half > 0:
+            weights = gfunc.window_mean(weights, half, half)
+
+        return chunk * weights
+
+    return gfunc.apply_by_chunks(matrix, apply, inplace, 'Mutes')
+
+
+def mute_dm(data_matrix, *, kind='top', inplace=False):
+    """ Mute the Data Matrix with tapers from the TLIVE_S and TFULL_S headers.
+
+    A top mute is 0 before TLIVE_S and rises to 1 at TFULL_S. A bottom mute is 1 before
+    TLIVE_S and falls to 0 at TFULL_S.
+
+    Args:
+        data_matrix: A Data Matrix object.
+        kind: 'top' or 'bottom'.
+        inplace: If True, multiply the Data Matrix in place instead of returning a new one.
+
+    Returns:
+        The muted DataMatrix object.
+
+    """
+
+    df = data_matrix._headers._df
+
+    return gfunc.process_dm(data_matrix, inplace, mute, data_matrix.dt, df.TLIVE_S.values, df.TFULL_S.values, kind=kind)
+
+
+def mute_dm_by_table(data_matrix, table_offsets, table_times, *, taper=10, kind='top', inplace=False):
+    """ Mute the Data Matrix at times interpolated from an offset-time table, see mute_by_table.
+
+    The mute times are also written into the TLIVE_S and TFULL_S headers, rounded to ms.
+
+    """
+
+    start = np.interp(np.abs(data_matrix._headers.OFFSET.values.astype(float)), table_offsets, table_times)
+
+    new = gfunc.process_dm(data_matrix, inplace, mute, data_matrix.dt, start, start + taper, kind=kind)
+    new._headers.loc[:, 'TLIVE_S'] = np.round(start).astype(int)
+    new._headers.loc[:, 'TFULL_S'] = np.round(start + taper).astype(int)
+
+    return new
+
+
+def mute_dm_by_polygon(data_matrix, polygon, *, taper=0, inside=True, inplace=False):
+    """ Mute the samples of the Data Matrix inside or outside of a polygon, see mute_by_polygon. """
+
+    return gfunc.process_dm(data_matrix, inplace, mute_by_polygon, data_matrix.dt,
+                            data_matrix._headers.OFFSET.values, polygon, taper=taper, inside=inside)
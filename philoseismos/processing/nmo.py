@@ -0,0 +1,231 @@
+""" philoseismos: engineering seismologist's toolbox.
+
+This file contains functions for normal moveout correction and CDP stacking.
+
+author: Ivan Dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import numpy as np
+
+from philoseismos.processing.gfunc import copy_dm, traces_per_chunk
+from philoseismos.segy.dm import DataMatrix
+from philoseismos.segy.g import Geometry
+
+# half-length of the windowed sinc interpolator in samples
+SINC_HALF_LENGTH = 4
+
+
+def velocity_grid(picks, cdps, t):
+    """ Interpolate velocity picks into a (CDP, time) grid.
+
+    Between the picked times and CDPs the velocities are interpolated linearly, outside of
+    them the closest picked value is used.
+
+    Args:
+        picks: A dictionary {cdp: (times in ms, velocities in m/s)}.
+        cdps: CDP numbers to build the grid for.
+        t: Times in ms to build the grid for.
+
+    Returns:
+        A (CDP, time) array of velocities in m/s.
+
+    """
+
+    if not picks:
+        raise ValueError('At least one velocity pick is needed!')
+
+    locations = np.array(sorted(picks), dtype=float)
+    functions = np.array([np.interp(t, *picks[cdp]) for cdp in sorted(picks)])
+
+    cdps = np.asarray(cdps, dtype=float)
+
+    if locations.size == 1:
+        return np.repeat(functions, cdps.size, axis=0)
+
+    right = np.clip(np.searchsorted(locations, cdps), 1, locations.size - 1)
+    left = right - 1
+    weight = np.clip((cdps - locations[left]) / (locations[right] - locations[left]), 0, 1)
+
+    return functions[left] + weight[:, None] * (functions[right] - functions[left])
+
+
+def nmo_times(t0, offsets, velocities):
+    """ Return the reflection times at the given offsets for every zero-offset time.
+
+    Args:
+        t0: 1D array of zero-offset times in ms.
+        offsets: 1D array of offsets in m, one for every trace.
+        velocities: Velocities in m/s, either a number, a 1D array with a velocity for every
+            zero-offset time, or a (trace, time) array.
+
+    Returns:
+        A (trace, time) array of times in ms.
+
+    """
+
+    t0 = np.asarray(t0, dtype=float)
+    moveout = np.asarray(offsets, dtype=float)[:, None] / np.asarray(velocities, dtype=float) * 1000
+
+    return np.sqrt(t0 ** 2 + moveout ** 2)
+
+
+def nmo_correct(matrix, dt, offsets, velocities, *, method='linear', stretch=0.5):
+    """ Apply normal moveout correction to the traces of a matrix.
+
+    Args:
+        matrix: A matrix where each row is a trace and each column is a sample.
+        dt: Sample interval in microseconds.
+        offsets: 1D array of offsets in m, one for every trace.
+        velocities: Velocities in m/s, see nmo_times.
+        method: Interpolation method, 'linear' or 'sinc'.
+        stretch: Samples stretched by more than this fraction are muted. If None, nothing
+            is muted.
+
+    Returns:
+        A matrix of corrected traces and a boolean matrix of live samples.
+
+    """
+
+    if method not in ('linear', 'sinc'):
+        raise ValueError(f'Unknown interpolation method: {method}!')
+
+    n, ns = matrix.shape
+    t0 = np.arange(ns) * dt / 1000
+
+    velocities = np.asarray(velocities, dtype=float)
+    offsets = np.asarray(offsets, dtype=float)
+
+    out = np.empty(matrix.shape, dtype=np.result_type(matrix.dtype, np.float32))
+    live = np.empty(matrix.shape, dtype=bool)
+
+    taps = 2 * SINC_HALF_LENGTH if method == 'sinc' else 2
+    traces = traces_per_chunk(ns, taps)
+
+    for start in range(0, n, traces):
+        stop = min(start + traces, n)
+        v = velocities[start:stop] if velocities.ndim == 2 else velocities
+
+        t = nmo_times(t0, offsets[start:stop], v)
+        position = t / (dt / 1000)
+
+        inside = position <= ns - 1
+        if stretch is not None:
+            inside &= (t - t0) <= stretch * t0
+
+        values = _interpolate(np.asarray(matrix[start:stop]), position, method)
+
+        out[start:stop] = np.where(inside, values, 0)
+        live[start:stop] = inside
+
+    return out, live
+
+
+def nmo_correct_dm(data_matrix, velocities, *, method='linear', stretch=0.5):
+    """ Return a new Data Matrix with normal moveout correction applied.
+
+    Make sure that the OFFSET header in the Geometry is filled correctly!
+
+    Args:
+        data_matrix: A Data Matrix object.
+        velocities: Velocities in m/s, see nmo_times.
+        method: Interpolation method, 'linear' or 'sinc'.
+        stretch: Samples stretched by more than this fraction are muted.
+
+    Returns:
+        A new DataMatrix object.
+
+    """
+
+    offsets = np.abs(data_matrix._headers.OFFSET.values)
+
+    corrected = nmo_correct(data_matrix._m, data_matrix.dt, offsets, velocities, method=method, stretch=stretch)[0]
+
+    return copy_dm(data_matrix, corrected)
+
+
+def stack_dm(data_matrix, velocities, *, method='linear', stretch=0.5):
+    """ Apply normal moveout correction and stack the traces of every CDP.
+
+    The traces are corrected and summed chunk by chunk, so that the Data Matrix can be
+    memory-mapped and does not have to be sorted into CDP gathers. Every sample of the stack
+    is divided by the number of live samples that were summed into it.
+
+    Make sure that the CDP and OFFSET headers in the Geometry are filled correctly!
+
+    Args:
+        data_matrix: A Data Matrix object.
+        velocities: Velocities in m/s, either a 1D array with a velocity for every sample, or
+            a (CDP, time) array with a row for every CDP in ascending order, see velocity_grid.
+        method: Interpolation method, 'linear' or 'sinc'.
+        stretch: Samples stretched by more than this fraction are muted.
+
+    Returns:
+        A new DataMatrix object with a trace for every CDP. The headers are taken from the first
+            trace of the CDP, with the OFFSET of 0 and the TRFOLD of the number of traces.
+
+    """
+
+    df = data_matrix._headers._df
+    cdps, first, rows, counts = np.unique(df.CDP.values, return_index=True, return_inverse=True, return_counts=True)
+    offsets = np.abs(df.OFFSET.values)
+
+    velocities = np.asarray(velocities, dtype=float)
+    if velocities.ndim == 2 and velocities.shape[0] != cdps.size:
+        raise ValueError(f'The velocity grid has {velocities.shape[0]} rows for {cdps.size} CDPs!')
+
+    n, ns = data_matrix._m.shape
+    stack = np.zeros((cdps.size, ns))
+    fold = np.zeros((cdps.size, ns), dtype=np.int64)
+
+    traces = traces_per_chunk(ns)
+
+    for start in range(0, n, traces):
+        stop = min(start + traces, n)
+        chunk_rows = rows[start:stop]
+        v = velocities[chunk_rows] if velocities.ndim == 2 else velocities
+
+        corrected, live = nmo_correct(data_matrix._m[start:stop], data_matrix.dt, offsets[start:stop], v,
+                                      method=method, stretch=stretch)
+
+        # sum the traces of the same CDP within the chunk, then add them to the stack
+        order = np.argsort(chunk_rows, kind='stable')
+        targets, starts = np.unique(chunk_rows[order], return_index=True)
+        stack[targets] += np.add.reduceat(corrected[order], starts, axis=0)
+        fold[targets] += np.add.reduceat(live[order].astype(np.int64), starts, axis=0)
+
+    new = DataMatrix()
+    new.dt = data_matrix.dt
+    new.t = np.copy(data_matrix.t)
+    new._m = np.divide(stack, fold, out=np.zeros_like(stack), where=fold > 0).astype(np.float32)
+    new._headers = Geometry()
+    new._headers._df = df.iloc[first].reset_index(drop=True)
+    new._headers.OFFSET = 0
+    new._headers.loc[:, 'TRFOLD'] = counts
+    new._headers.TRACENO = np.arange(1, cdps.size + 1)
+
+    return new
+
+
+def _interpolate(matrix, position, method):
+    """ Return values of every row of the matrix at the fractional sample positions. """
+
+    n, ns = matrix.shape
+    index = np.floor(position).astype(np.int64)
+    fraction = position - index
+
+    if method == 'linear':
+        taps = [(0, 1 - fraction), (1, fraction)]
+    else:
+        # Hann-windowed sinc
+        taps = []
+        for k in range(1 - SINC_HALF_LENGTH, SINC_HALF_LENGTH + 1):
+            x = fraction - k
+            taps.append((k, np.sinc(x) * (0.5 + 0.5 * np.cos(np.pi * x / SINC_HALF_LENGTH))))
+
+    out = np.zeros(position.shape)
+    for k, weight in taps:
+        i = index + k
+        valid = (i >= 0) & (i < ns)
+        out += np.where(valid, np.take_along_axis(matrix, np.clip(i, 0, ns - 1), axis=1), 0) * weight
+
+    return out
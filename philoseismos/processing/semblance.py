@@ -0,0 +1,139 @@
+""" philoseismos: engineering seismologist's toolbox.
+
+This file contains functions for velocity analysis of CDP gathers with semblance.
+
+author: Ivan Dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from philoseismos.processing.gfunc import traces_per_chunk, window_mean
+
+
+def semblance(matrix, dt, offsets, velocities, window=20):
+    """ Compute the semblance of a gather for every trial velocity and zero-offset time.
+
+    The moveout of all the traces is computed for a block of trial velocities at once, and
+    the sums over the sliding time window are computed from partial sums, so the cost does
+    not depend on the length of the window.
+
+    Args:
+        matrix: A matrix where each row is a trace and each column is a sample.
+        dt: Sample interval in microseconds.
+        offsets: 1D array of offsets in m, one for every trace.
+        velocities: 1D array of trial velocities in m/s.
+        window: Length of the time window in ms.
+
+    Returns:
+        A 2D array (time, velocity) with values of semblance from 0 to 1.
+
+    """
+
+    matrix = np.asarray(matrix, dtype=float)
+    offsets = np.abs(np.asarray(offsets, dtype=float))
+    velocities = np.asarray(velocities, dtype=float)
+
+    n, ns = matrix.shape
+    t0 = np.arange(ns) * dt / 1000
+    half = max(0, int(round(window * 1000 / dt)) // 2)
+
+    flat = matrix.ravel()
+    base = (np.arange(n) * ns)[:, None]
+
+    out = np.empty((ns, velocities.size))
+    # every trial velocity holds a moveout-corrected gather
+    step = traces_per_chunk(n * ns)
+
+    for start in range(0, velocities.size, step):
+        vs = velocities[start:start + step]
+
+        # positions of the reflections in samples, (velocity, trace, sample)
+        moveout = offsets[None, :, None] / vs[:, None, None] * 1000
+        position = np.sqrt(t0 ** 2 + moveout ** 2) / (dt / 1000)
+
+        live = position <= ns - 1
+        index = np.minimum(position.astype(np.int64), max(0, ns - 2))
+        fraction = np.minimum(position - index, 1)
+        following = np.minimum(index + 1, ns - 1)
+
+        values = flat[base + index] * (1 - fraction) + flat[base + following] * fraction
+        values[~live] = 0
+
+        # the windows of both sums have the same length, so their means can be divided instead
+        coherent = window_mean(values.sum(axis=1) ** 2, half, half)
+        total = window_mean(live.sum(axis=1) * (values ** 2).sum(axis=1), half, half)
+
+        out[:, start:start + step] = np.divide(coherent, total, out=np.zeros_like(total), where=total > 0).T
+
+    return out
+
+
+def velocity_spectrum_of_dm(data_matrix, v_min=100, v_max=3000, v_step=10, window=20):
+    """ Compute the velocity spectrum for the Data Matrix.
+
+        Make sure that the OFFSET header in the Geometry is filled correctly!
+
+        Args:
+            data_matrix: A Data Matrix object with a CDP gather.
+            v_min: Minimum trial velocity.
+            v_max: Maximum trial velocity.
+            v_step: Step for the trial velocities.
+            window: Length of the time window in ms.
+
+        Returns:
+            S: A 2D array (time, velocity) that contains values of semblance.
+
+    """
+
+    _, vs = velocity_spectrum_axes(data_matrix, v_min, v_max, v_step)
+
+    return semblance(data_matrix._m, data_matrix.dt, data_matrix._headers.OFFSET.values, vs, window)
+
+
+def velocity_spectrum_axes(data_matrix, v_min=100, v_max=3000, v_step=10):
+    """ Return the axes of the velocity spectrum computed by velocity_spectrum_of_dm.
+
+    Returns:
+        t: Zero-offset times of the rows in ms.
+        vs: Trial velocities of the columns.
+
+    """
+
+    t = np.arange(data_matrix._m.shape[1]) * data_matrix.dt / 1000
+    vs = np.arange(v_min, v_max + v_step, v_step)
+
+    return t, vs
+
+
+def velocity_spectra_of_dms(data_matrices, v_min=100, v_max=3000, v_step=10, window=20, max_workers=None):
+    """ Compute the velocity spectra of many CDP gathers in parallel.
+
+    Args:
+        data_matrices: A sequence of Data Matrix objects.
+        v_min, v_max, v_step, window: See velocity_spectrum_of_dm.
+        max_workers: Number of processes to compute in. If 1, everything is computed in the
+            current process.
+
+    Returns:
+        A list of 2D arrays (time, velocity), one for every Data Matrix.
+
+    """
+
+    args = [(dm._m, dm.dt, dm._headers.OFFSET.values, np.arange(v_min, v_max + v_step, v_step), window)
+            for dm in data_matrices]
+
+    if max_workers == 1:
+        return [_semblance(arg) for arg in args]
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        chunksize = max(1, len(args) // (4 * (max_workers or os.cpu_count() or 1)))
+        return list(executor.map(_semblance, args, chunksize=chunksize))
+
+
+def _semblance(args):
+    """ Unpack the arguments for semblance, to be mapped over processes. """
+
+    return semblance(*args)
@@ -6,13 +6,16 @@ e-mail: io.dubrovin@icloud.com """
 import numpy as np
 from scipy import fftpack as fft
 
+from philoseismos.processing.gfunc import traces_per_chunk
 
-def average_spectrum(seismogram, dt):
+
+def average_spectrum(seismogram, dt, spectrum=None):
     """ Calculate the average amplitude spectrum of all traces in a seismogram.
 
     Args:
         seismogram: A matrix where each row is a trace and each column is a sample.
         dt: Sample interval in microseconds.
+        spectrum: Spectra of the traces, fft of the seismogram, if already computed.
 
     Returns:
         freq : The frequency axis.
@@ -20,7 +23,7 @@ def average_spectrum(seismogram, dt):
 
     """
 
-    spectrum = np.abs(fft.fft(seismogram))
+    spectrum = np.abs(fft.fft(seismogram) if spectrum is None else spectrum)
     avg_spectrum = np.average(spectrum, axis=0)
     freq = fft.fftfreq(avg_spectrum.size, d=dt / 1e6)
 
@@ -31,19 +34,34 @@ def average_spectrum(seismogram, dt):
     return freq, avg_spectrum
 
 
-def average_spectrum_of_dm(data_matrix):
+def average_spectrum_of_dm(data_matrix, spectrum=None):
     """ Calculate the average amplitude spectrum of all traces in a Data Matrix.
 
+    Args:
+        data_matrix: A Data Matrix object.
+        spectrum: Spectra of the traces, see spectrum_of_dm, if already computed.
+
     Returns:
         freq : The frequency axis.
         amps : The average amplitude spectrum.
 
     """
 
-    return average_spectrum(data_matrix._m, data_matrix.dt)
+    return average_spectrum(data_matrix._m, data_matrix.dt, spectrum)
+
+
+def spectrum_of_dm(data_matrix):
+    """ Return the complex spectra of all traces in a Data Matrix.
+
+    The spectra can be passed to the other functions of this module, so that a Data Matrix
+    that is analyzed in several ways is only transformed once.
+
+    """
+
+    return fft.fft(data_matrix._m)
 
 
-def dispersion_image_of_dm(data_matrix, c_max=1200, c_min=1, c_step=1, f_max=150):
+def dispersion_image_of_dm(data_matrix, c_max=1200, c_min=1, c_step=1, f_max=150, spectrum=None):
     """ Compute the dispersion image for the Data Matrix.
 
         Make sure that the OFFSET header in the Geometry is filled correctly!
@@ -54,6 +72,7 @@ def dispersion_image_of_dm(data_matrix, c_max=1200, c_min=1, c_step=1, f_max=150
             c_min: Minimum phase velocity to include.
             c_step: Step for the phase velocities.
             f_max: Maximum frequency to consider. Defaults to 150 Hz.
+            spectrum: Spectra of the traces, see spectrum_of_dm, if already computed.
 
         Returns:
             V: A 2D array (phase velocity, frequency) that contains values of the dispersion image.
@@ -65,22 +84,42 @@ def dispersion_image_of_dm(data_matrix, c_max=1200, c_min=1, c_step=1, f_max=150
 
     """
 
-    U = fft.fft(data_matrix._m)
+    U = spectrum_of_dm(data_matrix) if spectrum is None else spectrum
     f = fft.fftfreq(n=U.shape[1], d=data_matrix.dt / 1e6)
 
     U, f = U[:, f >= 0], f[f >= 0]
     U, f = U[:, f <= f_max], f[f <= f_max]
 
-    P = np.angle(U)
+    # only the phase of the spectrum is used
+    E = np.exp(1j * np.angle(U))
     ws = 2 * np.pi * f
     cs = np.arange(c_min, c_max + c_step, c_step)
     xs = np.abs(data_matrix._headers.OFFSET.values)
 
     V = np.empty(shape=(cs.size, f.size), dtype=complex)
 
-    for i, w in enumerate(ws):
-        for j, c in enumerate(cs):
-            _v = np.exp(1j * (w * xs / c + P[:, i]))
-            V[cs.size - 1 - j, i] = _v.sum()
+    # frequencies are processed in blocks to limit the size of the phase shift array
+    block = traces_per_chunk(xs.size, per_sample=cs.size)
+    delays = xs / cs[::-1, None]  # (phase velocity, trace), the highest velocity first
+
+    for i in range(0, f.size, block):
+        shifts = np.exp(1j * ws[i:i + block, None, None] * delays)
+        V[:, i:i + block] = (shifts @ E[:, i:i + block].T[:, :, None])[:, :, 0].T
 
     return V
+
+
+def dispersion_image_axes(data_matrix, c_max=1200, c_min=1, c_step=1, f_max=150):
+    """ Return the axes of the dispersion image computed by dispersion_image_of_dm.
+
+    Returns:
+        f: Frequencies of the columns.
+        cs: Phase velocities of the rows, in descending order.
+
+    """
+
+    f = fft.fftfreq(n=data_matrix._m.shape[1], d=data_matrix.dt / 1e6)
+    f = f[(f >= 0) & (f <= f_max)]
+    cs = np.arange(c_min, c_max + c_step, c_step)[::-1]
+
+    return f, cs
@@ -2,3 +2,8 @@
 
 author: Ivan Dubrovin
 e-mail: io.dubrovin@icloud.com """
+
+from philoseismos.segy.segy import SegY
+from philoseismos.segy.editor import HeaderEditor
+from philoseismos.segy.appender import SegYAppender
+from philoseismos.segy.sort import sort_segy
@@ -0,0 +1,115 @@
+""" philoseismos: engineering seismologist's toolbox.
+
+This file defines SegYAppender - an object to append traces to existing SEG-Y files.
+
+author: Ivan Dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import os
+import struct
+
+from philoseismos.segy import gfunc
+from philoseismos.segy import constants as const
+
+# position of the number of traces in the Binary File Header, after the Textual one
+NO_TRACES_OFFSET = 3200 + struct.calcsize('>' + const.BFHFS[:const.BFHCOLS.index('no_traces')])
+NO_TRACES_FORMAT = const.BFHFS[const.BFHCOLS.index('no_traces')]
+
+# trace headers that number the traces, continued from the traces already in the file
+NUMBERS = ['TRACENO', 'SEQNO']
+
+
+class SegYAppender:
+    """ This object appends traces to the end of an existing SEG-Y file.
+
+    Only the new trace records and the number of traces in the Binary File Header are
+    written, so growing a file shot by shot costs as much as writing the new shots.
+    The traces are written before the number of traces is updated, and a partially
+    written trace left by a crash is cut off when the file is opened again, so the file
+    always holds whole traces. The trace numbers of the new traces continue the ones of
+    the traces already in the file.
+
+    """
+
+    def __init__(self, file: str):
+        """ Open the SEG-Y file for appending.
+
+        Args:
+            file (str): Path to an existing SEG-Y file.
+
+        """
+
+        self.file = file
+        self._f = open(file, 'br+')
+
+        self.endian = gfunc.grab_endiannes(self._f)
+        self.sfc = gfunc.grab_sample_format_code(self._f)
+        self.tl = gfunc.grab_trace_length(self._f)
+        self.dt = gfunc.grab_sample_interval(self._f)
+        self.record_size = 240 + const.SFC[self.sfc][0] * self.tl
+
+        # cut off an incomplete trace record, if any
+        size = self._f.seek(0, 2)
+        self.no_traces = (size - 3600) // self.record_size
+        if 3600 + self.no_traces * self.record_size != size:
+            self._f.truncate(3600 + self.no_traces * self.record_size)
+
+        self._update_no_traces()
+
+    def append(self, segy):
+        """ Append all the traces of a SegY object to the file.
+
+        The TRACENO and SEQNO headers of the traces are offset by the number of traces already
+        in the file while they are written, the SegY object itself is left as it is. Zero
+        numbers are not set and are written as they are.
+
+        Args:
+            segy: SegY object with the same sample format, trace length and sample interval as
+                the file.
+
+        """
+
+        sfc = segy.bfh['sample_format']
+        tl = segy.dm._m.shape[1]
+        dt = segy.bfh['sample_interval']
+
+        if sfc != self.sfc:
+            raise ValueError(f'Sample format {sfc} does not match the format {self.sfc} of the file!')
+        if tl != self.tl:
+            raise ValueError(f'Trace length {tl} does not match the trace length {self.tl} of the file!')
+        if dt != self.dt:
+            raise ValueError(f'Sample interval {dt} does not match the sample interval {self.dt} of the file!')
+
+        numbers = segy.g._df[NUMBERS].copy()
+        segy.g._df[NUMBERS] = numbers.where(numbers == 0, numbers + self.no_traces)
+
+        try:
+            self._f.seek(3600 + self.no_traces * self.record_size)
+            segy._write_traces(self._f, self.endian)
+        finally:
+            segy.g._df[NUMBERS] = numbers
+
+        # the traces have to be on the disk before they are counted in the header
+        self._f.flush()
+        os.fsync(self._f.fileno())
+
+        self.no_traces += segy.dm._m.shape[0]
+        self._update_no_traces()
+
+    def close(self):
+        """ Close the file. """
+
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _update_no_traces(self):
+        """ Write the number of traces into the Binary File Header. """
+
+        self._f.seek(NO_TRACES_OFFSET)
+        self._f.write(struct.pack(self.endian + NO_TRACES_FORMAT, self.no_traces))
+        self._f.flush()
@@ -20,6 +20,9 @@ class DataMatrix:
         self._m = None
         self._headers = None
 
+        # number of changes of the traces in place, for the views of them to be rebuilt
+        self._version = 0
+
     @classmethod
     def load(cls, file: str):
         """ Load the DataMatrix from a SEG-Y file. """
@@ -0,0 +1,111 @@
+""" philoseismos: engineering seismologist's toolbox.
+
+This file defines HeaderEditor - an object to edit trace headers of SEG-Y files in place.
+
+author: Ivan Dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import numpy as np
+
+from philoseismos.segy import gfunc
+
+# columns scaled by the ELEVSC and the COORDSC headers
+ELEVATION_COLUMNS = ('REC_ELEV', 'SOU_ELEV', 'DEPTH', 'REC_DATUM', 'SOU_DATUM', 'SOU_H2OD', 'REC_H2OD')
+COORDINATE_COLUMNS = ('SOU_X', 'SOU_Y', 'REC_X', 'REC_Y', 'CDP_X', 'CDP_Y')
+
+
+class HeaderEditor:
+    """ This object edits trace headers of an existing SEG-Y file in place.
+
+    The trace records are memory-mapped, so only the headers that are read or changed are
+    accessed on the disk, and the samples are never read or rewritten. Columns are accessed
+    by their Geometry names. Elevations and coordinates are scaled by ELEVSC and COORDSC
+    the same way as in Geometry, so to change the scalars and the scaled values together,
+    set the scalars first.
+
+    Example:
+        with HeaderEditor('line.sgy') as headers:
+            headers['OFFSET'] = headers['REC_X'] - headers['SOU_X']
+
+    """
+
+    def __init__(self, file: str):
+        """ Open the SEG-Y file for editing.
+
+        Args:
+            file (str): Path to the SEG-Y file.
+
+        """
+
+        self.file = file
+
+        self._records = gfunc.memmap_trace_records(file, mode='r+')
+        self._headers = self._records['header']
+
+    def __len__(self):
+        return self._records.shape[0]
+
+    def __getitem__(self, column):
+        """ Return values of the column for all the traces, scalars applied. """
+
+        values = np.array(self._headers[column])
+        scalar = self._scalar(column)
+
+        if scalar is None:
+            return values
+
+        values = values.astype(float)
+        values[scalar < 0] /= -scalar[scalar < 0]
+        values[scalar > 0] *= scalar[scalar > 0]
+
+        return values
+
+    def __setitem__(self, column, values):
+        """ Write values of the column for all the traces, scalars applied.
+
+        Values are rounded to integers after applying the scalars.
+
+        """
+
+        values = np.broadcast_to(np.asarray(values, dtype=float), (len(self),)).copy()
+        scalar = self._scalar(column)
+
+        if scalar is not None:
+            values[scalar < 0] *= -scalar[scalar < 0]
+            values[scalar > 0] /= scalar[scalar > 0]
+
+        self._headers[column] = np.round(values)
+
+    def flush(self):
+        """ Write the changes to the disk. """
+
+        self._records.flush()
+
+    def close(self):
+        """ Write the changes to the disk and close the file. """
+
+        self.flush()
+
+        # the memory map is closed when there are no references to it left
+        self._headers = None
+        self._records = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _scalar(self, column):
+        """ Return the scalars of the column, with zeros treated as ones, or None if not scaled. """
+
+        if column in ELEVATION_COLUMNS:
+            scalar = np.array(self._headers['ELEVSC'], dtype=float)
+        elif column in COORDINATE_COLUMNS:
+            scalar = np.array(self._headers['COORDSC'], dtype=float)
+        else:
+            return None
+
+        scalar[scalar == 0] = 1
+
+        return scalar
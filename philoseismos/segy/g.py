@@ -10,6 +10,11 @@ import pandas as pd
 from philoseismos.segy import gfunc
 from philoseismos.segy import constants as const
 
+# the scalars and the columns they apply to
+SCALARS = ['ELEVSC', 'COORDSC']
+SCALED_COLUMNS = ['REC_ELEV', 'SOU_ELEV', 'DEPTH', 'REC_DATUM', 'SOU_DATUM', 'SOU_H2OD', 'REC_H2OD',
+                  'SOU_X', 'SOU_Y', 'REC_X', 'REC_Y', 'CDP_X', 'CDP_Y']
+
 
 class Geometry:
     """ This object represents trace headers of a SEG-Y file. """
@@ -61,8 +66,10 @@ class Geometry:
         """ Apply elevation and coordinate scalars after unpacking. """
 
         # zero should be treated as one
-        self._df.replace({'ELEVSC', 0}, 1, inplace=True)
-        self._df.replace({'COORDSC', 0}, 1, inplace=True)
+        self._df[SCALARS] = self._df[SCALARS].replace(0, 1).astype(np.int64)
+
+        # scaled values are not integers anymore
+        self._df[SCALED_COLUMNS] = self._df[SCALED_COLUMNS].astype(float)
 
         # take the absolute value of the scalars
         abs_elevsc = abs(self._df.ELEVSC)
@@ -110,8 +117,10 @@ class Geometry:
         """ Apply elevation and coordinate scalars before packing. """
 
         # zero should be treated as one
-        self._df.replace({'ELEVSC', 0}, 1, inplace=True)
-        self._df.replace({'COORDSC', 0}, 1, inplace=True)
+        self._df[SCALARS] = self._df[SCALARS].replace(0, 1).astype(np.int64)
+
+        # scaled values are not integers anymore
+        self._df[SCALED_COLUMNS] = self._df[SCALED_COLUMNS].astype(float)
 
         # take the absolute value of the scalars
         abs_elevsc = abs(self._df.ELEVSC)
@@ -14,7 +14,9 @@ e-mail: io.dubrovin@icloud.com """
 import struct
 import math
 
-from philoseismos.segy.constants import SFC
+import numpy as np
+
+from philoseismos.segy.constants import SFC, THFS, THCOLS, DTYPEMAP
 
 
 def get_endiannes(file: str):
@@ -193,6 +195,87 @@ def grab_sample_interval(opened_file):
     return struct.unpack(endian + 'h', si)[0]
 
 
+# functions to work with whole trace records
+
+def trace_header_dtype(endian: str) -> np.dtype:
+    """ Return a structured dtype of a 240 byte trace header.
+
+    Fields are named after the Geometry columns, the last 8 bytes are the 'Header name'.
+
+    """
+
+    letters = {'i': 'i4', 'h': 'i2'}
+    fields = [(name, endian + letters[fl]) for name, fl in zip(THCOLS, THFS)]
+    fields.append(('Header name', 'S8'))
+
+    return np.dtype(fields)
+
+
+def trace_dtype(endian: str, sfc: int, tl: int) -> np.dtype:
+    """ Return a structured dtype of a trace record: a trace header followed by samples.
+
+    For IBM floats (sample format code 1) the samples are left as raw unsigned integers.
+
+    """
+
+    sample = np.dtype('u4') if sfc == 1 else np.dtype(DTYPEMAP[sfc])
+
+    return np.dtype([('header', trace_header_dtype(endian)),
+                     ('samples', sample.newbyteorder(endian), (tl,))])
+
+
+def memmap_trace_records(file: str, mode: str = 'r') -> np.memmap:
+    """ Return the trace records of a SEG-Y file as a memory-mapped structured array.
+
+    Args:
+        file (str): Path to the SEG-Y file.
+        mode (str): 'r' for read-only access, 'r+' to write changes back into the file.
+
+    Notes:
+        Only complete records are mapped, a partially written last trace is ignored.
+
+    """
+
+    with open(file, 'br') as sgy:
+        endian = grab_endiannes(sgy)
+        sfc = grab_sample_format_code(sgy)
+        tl = grab_trace_length(sgy)
+        nt = grab_number_of_traces(sgy)
+
+    return np.memmap(file, dtype=trace_dtype(endian, sfc, tl), mode=mode, offset=3600, shape=(nt,))
+
+
+def pack_trace_records(headers, matrix, endian: str, sfc: int) -> np.ndarray:
+    """ Pack trace headers and samples into an array of trace records, ready to be written.
+
+    Args:
+        headers: A Geometry DataFrame, with scalars already applied for packing.
+        matrix: A matrix with a trace in each row.
+        endian (str): '>' or '<' for big and little endian respectively.
+        sfc (int): Sample format code. IBM floats (1) are not supported.
+
+    Raises:
+        ValueError: If values of a header column do not fit into its field.
+
+    """
+
+    records = np.zeros(shape=matrix.shape[0], dtype=trace_dtype(endian, sfc, matrix.shape[1]))
+
+    values = headers.values
+    for i, name in enumerate(THCOLS):
+        column = values[:, i]
+        limits = np.iinfo(records.dtype['header'][name])
+
+        if column.size and (column.min() < limits.min or column.max() > limits.max):
+            raise ValueError(f'Values of {name} do not fit into a {limits.bits // 8}-byte header field!')
+
+        records['header'][name] = column.astype(int)
+
+    records['samples'] = matrix
+
+    return records
+
+
 # functions to work with IBM values
 
 def unpack_ibm32(val: bytes, endian: str) -> float:
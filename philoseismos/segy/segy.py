@@ -19,6 +19,9 @@ from philoseismos.segy import constants as const
 class SegY:
     """ This object represents a SEG-Y file. """
 
+    # number of traces packed at a time when saving
+    chunk_size = 4096
+
     def __init__(self):
         self.tfh = TextualFileHeader()
         self.bfh = BinaryFileHeader()
@@ -39,35 +42,51 @@ class SegY:
 
         """
 
-        header_fs = '>' + const.THFS
-        sfc = self.bfh['sample_format']
+        with open(file, 'bw') as sgy:
+            self._write_file_headers(sgy)
+            self._write_traces(sgy)
 
-        self.g._apply_scalars_before_packing()
+    def _write_file_headers(self, sgy):
+        """ Write the Textual and the Binary File Headers into an opened file. """
 
-        with open(file, 'bw') as sgy:
-            sgy.write(self.tfh._contents.encode('cp500'))
+        sgy.write(self.tfh._contents.encode('cp500'))
 
-            bfh_values = self.bfh._dict.values()
-            raw_bfh = struct.pack('>' + const.BFHFS, *bfh_values)
-            sgy.write(raw_bfh)
+        bfh_values = self.bfh._dict.values()
+        raw_bfh = struct.pack('>' + const.BFHFS, *bfh_values)
+        sgy.write(raw_bfh)
 
-            if sfc == 1:
-                for i in range(self.bfh['no_traces']):
-                    raw_th = bytearray(240)
-                    raw_th[:232] = struct.pack(header_fs, *self.g.loc[i, :].values.astype(int))
-                    sgy.write(raw_th)
+    def _write_traces(self, sgy, endian='>'):
+        """ Write all the trace records into an opened file.
 
-                    raw_trace = gfunc.pack_ibm32_series(self.dm._m[i], '>')
-                    sgy.write(raw_trace)
-            else:
-                trace_fs = '>' + const.SFC[sfc][1] * self.bfh['samples_per_trace']
-                for i in range(self.bfh['no_traces']):
-                    raw_th = bytearray(240)
-                    raw_th[:232] = struct.pack(header_fs, *self.g.loc[i, :].values.astype(int))
-                    sgy.write(raw_th)
-
-                    raw_trace = struct.pack(trace_fs, *self.dm._m[i])
-                    sgy.write(raw_trace)
+        Allows writing files trace by trace: the file headers can be followed by traces
+        of several SegY objects with the same trace length and sample format.
+
+        Args:
+            sgy: File opened for writing in binary mode.
+            endian (str): '>' or '<' for big and little endian respectively.
+
+        """
+
+        header_fs = endian + const.THFS
+        sfc = self.bfh['sample_format']
+        nt = self.dm._m.shape[0]
+
+        self.g._apply_scalars_before_packing()
+
+        if sfc == 1:
+            for i in range(nt):
+                raw_th = bytearray(240)
+                raw_th[:232] = struct.pack(header_fs, *self.g.loc[i, :].values.astype(int))
+                sgy.write(raw_th)
+
+                raw_trace = gfunc.pack_ibm32_series(self.dm._m[i], endian)
+                sgy.write(raw_trace)
+        else:
+            # pack and write the traces in chunks of whole records
+            for i in range(0, nt, self.chunk_size):
+                j = min(i + self.chunk_size, nt)
+                records = gfunc.pack_trace_records(self.g._df.iloc[i:j], self.dm._m[i:j], endian, sfc)
+                records.tofile(sgy)
 
         self.g._apply_scalars_after_unpacking()
 
@@ -0,0 +1,91 @@
+""" philoseismos: engineering seismologist's toolbox.
+
+This file contains functions for sorting SEG-Y files that do not fit into memory.
+
+author: Ivan Dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from philoseismos.segy import gfunc
+
+# number of bytes of trace records copied at a time
+BYTES_PER_CHUNK = 2 ** 26
+
+
+def sort_segy(file: str, output: str, keys, *, progress=None, read_ahead=True):
+    """ Sort traces of a SEG-Y file by trace headers into a new file, without loading the file.
+
+    Only the headers are scanned to find the order of the traces. The trace records are then
+    copied chunk by chunk: each chunk is read from the memory-mapped input in the order of the
+    file, and written to the output sequentially. The file headers are copied as they are.
+
+    Args:
+        file (str): Path to the SEG-Y file to sort.
+        output (str): Path to the sorted SEG-Y file.
+        keys: A header name or a sequence of them, the first one being the primary key.
+            Raw header values are compared, without applying the scalars.
+        progress: If given, called with the number of copied traces and the total number of
+            traces after every chunk.
+        read_ahead (bool): If True, the next chunk is read in a background thread while the
+            current one is written.
+
+    Returns:
+        The permutation: indices of the input traces in the order of the output.
+
+    Raises:
+        ValueError: If the output is the input file itself.
+
+    """
+
+    if os.path.realpath(output) == os.path.realpath(file):
+        raise ValueError('The sorted file can not be written over the file being sorted!')
+
+    keys = [keys] if isinstance(keys, str) else list(keys)
+
+    records = gfunc.memmap_trace_records(file)
+    nt = records.shape[0]
+
+    # lexsort uses the last key as the primary one; the sort is stable
+    headers = records['header']
+    permutation = np.lexsort([np.array(headers[key]) for key in reversed(keys)])
+
+    step = max(1, BYTES_PER_CHUNK // records.dtype.itemsize)
+    chunks = [permutation[i:i + step] for i in range(0, nt, step)]
+
+    with open(file, 'br') as sgy:
+        file_headers = sgy.read(3600)
+
+    with open(output, 'bw') as out, ThreadPoolExecutor(max_workers=1) as executor:
+        out.write(file_headers)
+
+        future = executor.submit(_gather, records, chunks[0]) if read_ahead and chunks else None
+        done = 0
+
+        for i, chunk in enumerate(chunks):
+            block = future.result() if read_ahead else _gather(records, chunk)
+
+            if read_ahead and i + 1 < len(chunks):
+                future = executor.submit(_gather, records, chunks[i + 1])
+
+            block.tofile(out)
+
+            done += chunk.size
+            if progress is not None:
+                progress(done, nt)
+
+    return permutation
+
+
+def _gather(records, indices):
+    """ Read the records at the indices, in the order of the file, and return them in the given order. """
+
+    order = np.argsort(indices, kind='stable')
+
+    out = np.empty(indices.size, dtype=records.dtype)
+    out[order] = records[indices[order]]
+
+    return out
@@ -0,0 +1,117 @@
+""" philoseismos: engineering seismologist's toolbox.
+
+author: Ivan Dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+from philoseismos.dispersion.cache import ForwardCache
+from philoseismos.models.hlm import HorizontallyLayeredMedium
+
+FREQS = np.linspace(5, 50, 10)
+MODEL = dict(vp=[600, 1500], vs=[300, 750], rho=[1500, 2000], h=[10])
+
+
+def test_key():
+    """ Test that the key depends on every input. """
+
+    key = ForwardCache.key(FREQS, **MODEL)
+
+    assert key == ForwardCache.key(list(FREQS), **MODEL)
+    assert key != ForwardCache.key(FREQS, **MODEL, modes=2)
+    assert key != ForwardCache.key(FREQS[1:], **MODEL)
+    assert key != ForwardCache.key(FREQS, **dict(MODEL, h=[11]))
+    assert key != ForwardCache.key(FREQS, **MODEL, cs=np.linspace(250, 750, 50))
+
+
+def test_memory_tier():
+    """ Test the LRU dictionary in memory. """
+
+    cache = ForwardCache(memory_items=2)
+
+    cache.put('a', np.zeros(3))
+    cache.put('b', np.ones(3))
+    cache.get('a')
+    cache.put('c', np.ones(3))
+
+    assert cache.get('b') is None
+    assert cache.get('a') is not None
+    assert cache.get('c') is not None
+
+    # changing the stored or the returned arrays does not change the cache
+    value = np.ones(3)
+    cache.put('d', value)
+    value[:] = 2
+    cache.get('d')[:] = 3
+    assert np.all(cache.get('d') == 1)
+
+
+def test_persistent_tier(tmp_path):
+    """ Test that the curves survive between the caches sharing a directory. """
+
+    first = ForwardCache(tmp_path)
+    curves = first.rayleigh_phase_velocities(FREQS, **MODEL, modes=2)
+
+    second = ForwardCache(tmp_path)
+    key = ForwardCache.key(FREQS, **MODEL, modes=2)
+    np.testing.assert_array_equal(second.get(key), curves)
+
+    # broken files are misses
+    with open(second._path(key), 'wb') as f:
+        f.write(b'broken')
+    assert ForwardCache(tmp_path).get(key) is None
+
+    # the memory tier is not pickled
+    assert len(pickle.loads(pickle.dumps(first))._memory) == 0
+
+
+def test_failed_write(tmp_path, monkeypatch):
+    """ Test that a failed write does not leave a temporary file behind. """
+
+    def save(*args, **kwargs):
+        raise OSError('No space left on device')
+
+    cache = ForwardCache(tmp_path)
+    monkeypatch.setattr(np, 'save', save)
+
+    with pytest.raises(OSError):
+        cache.put('ab', np.ones(3))
+
+    assert os.listdir(tmp_path / 'ab') == []
+
+
+def test_evict(tmp_path):
+    """ Test that the least recently used files are removed first. """
+
+    cache = ForwardCache(tmp_path, max_bytes=10 ** 6)
+
+    for i, key in enumerate(['aa', 'bb', 'cc']):
+        cache.put(key, np.zeros(1000))
+        os.utime(cache._path(key), (i, i))
+
+    cache.max_bytes = 2 * 8200
+    cache.evict()
+
+    assert not os.path.exists(cache._path('aa'))
+    assert os.path.exists(cache._path('bb'))
+    assert os.path.exists(cache._path('cc'))
+
+
+def test_cached_rayleigh_dispersion(tmp_path):
+    """ Test that the cached curves are the same as the computed ones. """
+
+    hlm = HorizontallyLayeredMedium(vp=1500, vs=750, rho=2000)
+    hlm.add_layer(vp=600, vs=300, rho=1500, h=10)
+
+    cache = ForwardCache(tmp_path)
+    computed = hlm.rayleigh_dispersion(FREQS, modes=2)
+    first = hlm.rayleigh_dispersion(FREQS, modes=2, cache=cache)
+    second = hlm.rayleigh_dispersion(FREQS, modes=2, cache=cache)
+
+    for a, b, c in zip(computed.modal_curves, first.modal_curves, second.modal_curves):
+        np.testing.assert_array_equal(a, b)
+        np.testing.assert_array_equal(a, c)
@@ -0,0 +1,83 @@
+""" philoseismos: engineering seismologist's toolbox.
+
+author: Ivan Dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import numpy as np
+import pandas as pd
+
+from philoseismos.segy import constants as const
+from philoseismos.segy.dm import DataMatrix
+from philoseismos.segy.g import Geometry
+from philoseismos.dispersion.rdc import RayleighDispersionCurve
+from philoseismos.dispersion.picking import pick_dispersion_curves, pick_dispersion_curves_of_dms
+
+
+def ridges(freqs, cs, shift):
+    """ An image with two modal ridges. """
+
+    fundamental = shift + 200 + 300 * np.exp(-freqs / 10)
+    first = fundamental + 250
+
+    image = np.exp(-((cs[:, None] - fundamental) / 15) ** 2)
+    image += 0.6 * np.exp(-((cs[:, None] - first) / 15) ** 2) * (freqs > 20)
+
+    return image, fundamental, first
+
+
+def test_pick_dispersion_curves():
+    """ Test picking of a stack of synthetic images. """
+
+    freqs = np.arange(0, 60.5, 0.5)
+    cs = np.arange(1000, 99, -5)  # descending, as in the dispersion images
+
+    images, expected = [], []
+    for shift in (0, 20, 40):
+        image, fundamental, first = ridges(freqs, cs, shift)
+        images.append(image)
+        expected.append((fundamental, first))
+
+    rdcs = pick_dispersion_curves(np.stack(images), freqs, cs, modes=2, f_min=2)
+
+    assert len(rdcs) == 3
+    for rdc, (fundamental, first) in zip(rdcs, expected):
+        assert isinstance(rdc, RayleighDispersionCurve)
+        assert np.all(rdc.freqs == freqs[freqs >= 2])
+
+        # sub-pixel refinement is much more accurate than the step of the velocities
+        assert np.nanmax(np.abs(rdc.modal_curves[0] - fundamental[freqs >= 2])) < 1
+
+        # the first higher mode only exists above 20 Hz
+        higher = rdc.modal_curves[1]
+        assert np.all(np.isnan(higher[rdc.freqs < 20]))
+        assert np.nanmax(np.abs(higher - first[freqs >= 2])) < 1
+        assert np.sum(~np.isnan(higher)) > 70
+
+    # a single image gives a single curve
+    single = pick_dispersion_curves(images[0], freqs, cs, f_min=2)
+    np.testing.assert_array_equal(single.modal_curves[0], rdcs[0].modal_curves[0])
+
+
+def test_pick_dispersion_curves_of_dms():
+    """ Test picking of the curves from seismograms of non-dispersive waves. """
+
+    dms = []
+    for c in (250, 400):
+        offsets = np.arange(5, 53, 2)
+        t = np.arange(1000) * 1e-3
+
+        # a Ricker wavelet with the dominant frequency of 30 Hz
+        arg = (np.pi * 30 * (t - 0.05 - offsets[:, None] / c)) ** 2
+
+        dm = DataMatrix()
+        dm._m = (1 - 2 * arg) * np.exp(-arg)
+        dm.dt = 1000
+        dm._headers = Geometry()
+        dm._headers._df = pd.DataFrame(np.zeros((offsets.size, 90), dtype=int), columns=const.THCOLS)
+        dm._headers._df.OFFSET = offsets
+        dms.append(dm)
+
+    rdcs = pick_dispersion_curves_of_dms(dms, c_max=800, c_min=100, c_step=5, f_max=60, f_min=15)
+
+    for c, rdc in zip((250, 400), rdcs):
+        assert np.nanmax(np.abs(rdc.modal_curves[0] - c)) < 0.05 * c
@@ -0,0 +1,38 @@
+""" philoseismos: engineering seismologist's toolbox.
+
+author: Ivan Dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import numpy as np
+
+from philoseismos.dispersion.rayleigh import rayleigh_phase_velocities, batch_rayleigh_phase_velocities
+
+FREQS = np.linspace(5, 50, 10)
+
+
+def test_batch_rayleigh_phase_velocities():
+    """ Test that the curves of a batch are the curves of the models computed one by one. """
+
+    rng = np.random.default_rng(0)
+    vs = np.column_stack([rng.uniform(150, 300, 4), rng.uniform(300, 500, 4), rng.uniform(600, 800, 4)])
+    vp, rho, h = vs * np.sqrt(3), rng.uniform(1600, 2200, (4, 3)), rng.uniform(2, 10, (4, 2))
+
+    curves = batch_rayleigh_phase_velocities(FREQS, vp, vs, rho, h, modes=2)
+    assert curves.shape == (4, 2, FREQS.size)
+
+    for i in range(4):
+        single = rayleigh_phase_velocities(FREQS, vp[i], vs[i], rho[i], h[i], modes=2)
+        assert np.allclose(curves[i], single, equal_nan=True)
+
+    assert batch_rayleigh_phase_velocities(FREQS, vp[:0], vs[:0], rho[:0], h[:0]).shape == (0, 1, FREQS.size)
+
+
+def test_root_next_to_half_space_velocity():
+    """ Test that a root between the last two trial velocities is found. """
+
+    vp, vs, rho, h = [600, 1500], [300, 750], [1500, 2000], [10]
+    expected = rayleigh_phase_velocities([5], vp, vs, rho, h, cs=np.linspace(300, 750, 20001))[0, 0]
+
+    # the last step of the trial velocities is the half-space velocity itself
+    cs = [300, expected - 1, 750]
+    assert np.isclose(rayleigh_phase_velocities([5], vp, vs, rho, h, cs=cs)[0, 0], expected)
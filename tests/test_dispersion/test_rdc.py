@@ -0,0 +1,162 @@
+""" philoseismos: engineering seismologist's toolbox.
+
+author: Ivan Dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import numpy as np
+import pytest
+
+from philoseismos.dispersion.rdc import RayleighDispersionCurve, stack_curves, curve_misfits
+
+
+@pytest.fixture
+def rdc():
+    """ Three modal curves with NaNs where the modes are not picked. """
+
+    rdc = RayleighDispersionCurve()
+    rdc.freqs = np.arange(1, 151) * 0.1
+
+    fundamental = np.linspace(500, 200, 150)
+    fundamental[:3] = np.nan
+    first = np.linspace(700, 400, 150)
+    first[:60] = np.nan
+
+    rdc.modal_curves = [fundamental, first, first + 100]
+
+    return rdc
+
+
+def test_radex_round_trip(rdc, tmp_path):
+    """ Test exporting and loading of the RadExPro files. """
+
+    file = str(tmp_path / 'curves.txt')
+    rdc.export_modal_curves_for_radex(file, rec_x_0=0, rec_x_1=46)
+
+    with open(file) as f:
+        assert f.readline() == '500 0 46\n'
+        assert f.readline() == 'True\n'
+        assert f.readline() == '147\n'
+
+    # the modes are put onto the union of their frequencies
+    loaded = RayleighDispersionCurve.load_from_radex(file)
+
+    assert loaded.curves.shape == (3, 147)
+    np.testing.assert_array_equal(loaded.freqs, rdc.freqs[3:])
+    np.testing.assert_array_equal(loaded.curves, rdc.curves[:, 3:])
+
+    # a single curve is followed by zero additional curves
+    rdc.modal_curves = rdc.modal_curves[:1]
+    rdc.export_modal_curves_for_radex(file, rec_x_0=0, rec_x_1=46)
+    assert len(RayleighDispersionCurve.load_from_radex(file).modal_curves) == 1
+
+
+def test_npz_round_trip(rdc, tmp_path):
+    """ Test saving and loading of the binary files. """
+
+    file = str(tmp_path / 'curves.npz')
+    rdc.save(file)
+    loaded = RayleighDispersionCurve.load(file)
+
+    np.testing.assert_array_equal(loaded.freqs, rdc.freqs)
+    for a, b in zip(loaded.modal_curves, rdc.modal_curves):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_from_points():
+    """ Test the creation of the curves from modes with separate frequencies. """
+
+    rdc = RayleighDispersionCurve.from_points([[1, 2, 3], [2, 4]], [[300, 250, 220], [400, 350]])
+
+    np.testing.assert_array_equal(rdc.freqs, [1, 2, 3, 4])
+    np.testing.assert_array_equal(rdc.curves, [[300, 250, 220, np.nan], [np.nan, 400, np.nan, 350]])
+    assert rdc.n_modes == 2
+    assert np.sum(rdc.mask) == 5
+
+
+def test_modal_curves(rdc):
+    """ Test that the modal curves are writable views of the curves array. """
+
+    assert rdc.curves.shape == (3, 150)
+
+    rdc.modal_curves[0][:] = 1
+    assert np.all(rdc.curves[0] == 1)
+
+    rdc.modal_curves = [[1, 2], [3, 4], [5, 6]]
+    assert rdc.curves.shape == (3, 2)
+
+    # no modes at all leave an empty array of curves on the same frequencies
+    rdc.freqs = [1, 2]
+    rdc.modal_curves = []
+    assert rdc.curves.shape == (0, 2)
+    assert rdc.n_modes == 0
+
+
+def test_add_modal_curve(rdc):
+    """ Test adding modes to the curves, the tuple of modal curves can not be appended to. """
+
+    with pytest.raises(AttributeError):
+        rdc.modal_curves.append(np.ones(150))
+
+    rdc.add_modal_curve(np.ones(150))
+    assert rdc.n_modes == 4
+    assert np.all(rdc.modal_curves[3] == 1)
+
+    with pytest.raises(ValueError):
+        rdc.add_modal_curve([1, 2, 3])
+
+    empty = RayleighDispersionCurve()
+    empty.add_modal_curve([300, 250])
+    empty.add_modal_curve([np.nan, 400])
+    np.testing.assert_array_equal(empty.curves, [[300, 250], [np.nan, 400]])
+
+
+def test_resample(rdc):
+    """ Test the interpolation of the curves onto new frequencies. """
+
+    freqs = np.array([0.05, 0.1, 0.35, 0.4, 6.15, 15, 15.1])
+    resampled = rdc.resample(freqs)
+
+    np.testing.assert_array_equal(resampled.freqs, freqs)
+    assert resampled.curves.shape == (3, 7)
+
+    # outside of the frequencies and before the first defined point
+    assert np.all(np.isnan(resampled.curves[:, [0, 1, 6]]))
+    assert np.isnan(resampled.curves[0, 2])
+
+    np.testing.assert_allclose(resampled.curves[0, 3], rdc.curves[0, 3])
+    np.testing.assert_allclose(resampled.curves[1, 4], rdc.curves[1, 60:62].mean())
+    np.testing.assert_allclose(resampled.curves[:, 5], rdc.curves[:, -1])
+
+
+def test_stack_curves_and_misfits(rdc):
+    """ Test the batched misfits between stacks of curves. """
+
+    other = RayleighDispersionCurve(rdc.freqs, rdc.curves[:1] * 1.1)
+
+    freqs = np.arange(1, 16)
+    stack = stack_curves([rdc, other], freqs)
+
+    assert stack.shape == (2, 3, 15)
+    assert np.all(np.isnan(stack[1, 1:]))
+    np.testing.assert_allclose(stack[1, 0], 1.1 * stack[0, 0])
+
+    misfits = curve_misfits(stack[:, None, :1], stack[None, :, :1])
+    assert misfits.shape == (2, 2, 1)
+    np.testing.assert_allclose(misfits[..., 0], [[0, 0.1], [1 / 11, 0]])
+
+    # undefined points of the modelled curves count as the missing misfit
+    misfits = curve_misfits(stack[0], stack[1])
+    np.testing.assert_allclose(misfits, [0.1, 1, 1])
+
+
+def test_rdcscalc_round_trip(rdc, tmp_path):
+    """ Test exporting and loading of the rdcscalc files. """
+
+    file = str(tmp_path / 'curves.csv')
+    rdc.export_modal_curves_for_rdcscalc(file)
+    loaded = RayleighDispersionCurve.load_from_rdcscalc(file)
+
+    assert len(loaded.modal_curves) == 6
+    for a, b in zip(loaded.modal_curves, rdc.modal_curves):
+        np.testing.assert_allclose(a, b)
+    assert np.all(np.isnan(loaded.modal_curves[5]))
@@ -85,3 +85,57 @@ def text_grd_file(tmp_path_factory):
             f.write('\n')
 
     return file
+
+
+@pytest.fixture(scope='module')
+def wrapped_text_grd_file(tmp_path_factory):
+    """ A manually created .grd file with rows wrapped over several lines. """
+
+    tempdir = tmp_path_factory.mktemp('tempdir')
+    file = str(tempdir / 'wrapped.grd')
+
+    # create the data
+    data = np.arange(150).reshape(15, 10) * 0.5
+
+    with open(file, 'w') as f:
+        f.write('DSAA\n')  # id string
+        f.write('10 15\n')  # nx and ny
+        f.write('0 9\n')  # xlo and xhi
+        f.write('10 38\n')  # ylo and yhi
+        f.write('0 74.5\n')  # zlo and zhi
+
+        # Surfer writes at most 10 values per line, rows are separated with an empty line
+        for row in data:
+            f.write(' '.join(map(str, row[:7])))
+            f.write('\n')
+            f.write(' '.join(map(str, row[7:])))
+            f.write('\n\n')
+
+    return file
+
+
+@pytest.fixture(scope='module')
+def surfer7_grd_file(tmp_path_factory):
+    """ A manually created Surfer 7 .grd file to test. """
+
+    tempdir = tmp_path_factory.mktemp('tempdir')
+    file = str(tempdir / 'test7.grd')
+
+    # create the data, with one node blanked
+    data = np.arange(150, dtype=np.float64).reshape(15, 10)
+    data[14, 9] = 1.70141e38
+
+    with open(file, 'bw') as f:
+        f.write(b'DSRB' + struct.pack('<ii', 4, 2))  # header section
+
+        # grid section: nrow, ncol, xll, yll, xsize, ysize, zmin, zmax, rotation, blank value
+        f.write(b'GRID' + struct.pack('<i', 72))
+        f.write(struct.pack('<iidddddddd', 15, 10, 0, 10, 1, 2, 0, 148, 0, 1.70141e38))
+
+        # an unknown section that should be skipped
+        f.write(b'FLTI' + struct.pack('<i', 4) + b'\x00' * 4)
+
+        f.write(b'DATA' + struct.pack('<i', 150 * 8))
+        f.write(data.astype('<f8').tobytes())
+
+    return file
@@ -68,3 +68,35 @@ def test_surfer6binary_invert_axis_methods(binary_grd_file):
     assert grd.yhi == 38
     assert grd.xhi == 9
     assert grd.xlo == 0
+
+
+def test_surfer6binary_save(binary_grd_file, tmp_path):
+    """ Test saving the grid and loading it back. """
+
+    grd = Surfer6BinaryGrid.load(binary_grd_file)
+    grd.dm[0, 0] = np.nan
+    grd.dm[3, 4] = -5
+
+    file = str(tmp_path / 'saved.grd')
+    grd.save(file)
+
+    # Z range is updated, blanks are not included
+    assert grd.zlo == -5
+    assert grd.zhi == 149
+
+    new = Surfer6BinaryGrid.load(file)
+    assert (new.nx, new.ny) == (10, 15)
+    assert new.extent == [0, 9, 38, 10]
+    assert (new.zlo, new.zhi) == (-5, 149)
+    assert np.isnan(new.dm[0, 0])
+    np.testing.assert_array_equal(new.dm, grd.dm)
+
+
+def test_surfer6binary_mmap(binary_grd_file):
+    """ Test loading the grid as a memory map. """
+
+    grd = Surfer6BinaryGrid.load(binary_grd_file, mmap=True)
+
+    assert isinstance(grd.dm, np.memmap)
+    assert grd.dm.shape == (15, 10)
+    assert np.all(grd.dm == np.arange(150).reshape(15, 10))
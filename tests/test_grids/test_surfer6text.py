@@ -68,3 +68,66 @@ def test_surfer6binary_invert_axis_methods(text_grd_file):
     assert grd.yhi == 38
     assert grd.xhi == 9
     assert grd.xlo == 0
+
+
+def test_loading_surfer6text_in_blocks(wrapped_text_grd_file, monkeypatch):
+    """ Test that the values are parsed correctly regardless of the line and block layout. """
+
+    dm = np.arange(150).reshape(15, 10) * 0.5
+
+    grd = Surfer6TextGrid.load(wrapped_text_grd_file)
+    assert grd.dm.dtype == np.float64
+    assert np.all(grd.dm == dm)
+
+    # make the blocks so small that the numbers get cut between them
+    monkeypatch.setattr(Surfer6TextGrid, 'block_size', 7)
+
+    grd = Surfer6TextGrid.load(wrapped_text_grd_file, dtype=np.float32)
+    assert grd.dm.dtype == np.float32
+    assert grd.dm.shape == (15, 10)
+    assert np.all(grd.dm == dm)
+
+
+def test_surfer6text_row_bands(wrapped_text_grd_file, monkeypatch):
+    """ Test the streaming of the grid in bands of rows. """
+
+    dm = np.arange(150).reshape(15, 10) * 0.5
+
+    grd = Surfer6TextGrid.load_header(wrapped_text_grd_file)
+    assert grd.nx == 10
+    assert grd.ny == 15
+    assert grd.dm is None
+
+    monkeypatch.setattr(Surfer6TextGrid, 'block_size', 16)
+
+    bands = list(Surfer6TextGrid.iter_row_bands(wrapped_text_grd_file, rows=4, dtype=np.float32))
+    assert [row for row, _ in bands] == [0, 4, 8, 12]
+    assert [band.shape for _, band in bands] == [(4, 10), (4, 10), (4, 10), (3, 10)]
+    assert np.all(np.vstack([band for _, band in bands]) == dm)
+
+
+def test_surfer6text_save(text_grd_file, tmp_path):
+    """ Test saving the grid and loading it back. """
+
+    grd = Surfer6TextGrid.load(text_grd_file)
+    grd.dm = grd.dm / 7
+    grd.dm[2, 2] = np.nan
+
+    file = str(tmp_path / 'saved.grd')
+    grd.save(file)
+
+    assert grd.zlo == 0
+    assert grd.zhi == 149 / 7
+
+    new = Surfer6TextGrid.load(file)
+    assert (new.nx, new.ny) == (10, 15)
+    assert new.extent == [0, 9, 38, 10]
+    assert np.isnan(new.dm[2, 2])
+
+    # by default the values are saved with all the digits of float64
+    np.testing.assert_array_equal(new.dm, grd.dm)
+
+    grd.save(file, precision=7)
+    new = Surfer6TextGrid.load(file)
+    assert not np.array_equal(new.dm, grd.dm)
+    assert np.allclose(new.dm, grd.dm, rtol=1e-6, equal_nan=True)
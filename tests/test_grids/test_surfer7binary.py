@@ -0,0 +1,99 @@
+""" philoseismos: engineering seismologist's toolbox.
+
+author: Ivan Dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import numpy as np
+import pytest
+
+from philoseismos.grids import Surfer7BinaryGrid
+
+
+def test_loading_surfer7binary(surfer7_grd_file, bad_binary_grd_file):
+    """ Test loading process of the grid files. """
+
+    # only proceeds to read true .grd files
+    with pytest.raises(ValueError):
+        grd = Surfer7BinaryGrid.load(bad_binary_grd_file)
+
+    grd = Surfer7BinaryGrid.load(surfer7_grd_file)
+
+    assert grd.nx == 10
+    assert grd.ny == 15
+    assert grd.xlo == 0
+    assert grd.xhi == 9
+    assert grd.ylo == 10
+    assert grd.yhi == 38
+    assert grd.zlo == 0
+    assert grd.zhi == 148
+    assert grd.extent == [0, 9, 38, 10]
+
+    dm = np.arange(150, dtype=np.float64).reshape(15, 10)
+    dm[14, 9] = np.nan
+
+    assert grd.dm.shape == (15, 10)
+    np.testing.assert_array_equal(grd.dm, dm)
+
+    grd = Surfer7BinaryGrid.load(surfer7_grd_file, mmap=True)
+    assert isinstance(grd.dm, np.memmap)
+    assert np.all(grd.dm[:14] == dm[:14])
+
+    # memory-mapped grids show blanked nodes as they are in the file
+    assert grd.dm[14, 9] == grd.blank
+
+
+def test_surfer7binary_save(surfer7_grd_file, tmp_path):
+    """ Test saving the grid and loading it back. """
+
+    grd = Surfer7BinaryGrid.load(surfer7_grd_file)
+    grd.dm[0, 0] = -1
+
+    file = str(tmp_path / 'saved.grd')
+    grd.save(file)
+
+    new = Surfer7BinaryGrid.load(file)
+    assert (new.nx, new.ny) == (10, 15)
+    assert new.extent == [0, 9, 38, 10]
+    assert (new.zlo, new.zhi) == (-1, 148)
+    np.testing.assert_array_equal(new.dm, grd.dm)
+
+
+def test_surfer7binary_create(tmp_path):
+    """ Test creating a memory-mapped grid and filling it piece by piece. """
+
+    file = str(tmp_path / 'created.grd')
+    grd = Surfer7BinaryGrid.create(file, 20, 30, 0, 19, 0, 58)
+
+    assert isinstance(grd.dm, np.memmap)
+    grd.dm[:10] = np.arange(200).reshape(10, 20)
+    grd.flush()
+
+    new = Surfer7BinaryGrid.load(file)
+    assert new.extent == [0, 19, 58, 0]
+    assert (new.zlo, new.zhi) == (0, 199)
+    assert np.all(new.dm[:10] == np.arange(200).reshape(10, 20))
+    assert np.all(np.isnan(new.dm[10:]))
+
+    # grids in memory and read-only memory maps can not be flushed
+    with pytest.raises(ValueError):
+        new.flush()
+    with pytest.raises(ValueError):
+        Surfer7BinaryGrid.load(file, mmap=True).flush()
+
+
+def test_surfer7binary_size_limit(tmp_path):
+    """ Test that grids with a DATA section larger than the format allows are not written. """
+
+    file = tmp_path / 'huge.grd'
+
+    # the size of the DATA section of 2 ** 28 nodes does not fit into a 4-byte signed integer
+    with pytest.raises(ValueError):
+        Surfer7BinaryGrid.create(str(file), 2 ** 14, 2 ** 14, 0, 1, 0, 1)
+    assert not file.exists()
+
+    grd = Surfer7BinaryGrid()
+    grd.xlo, grd.xhi, grd.ylo, grd.yhi = 0, 1, 0, 1
+    grd.dm = np.broadcast_to(0.0, (2 ** 14, 2 ** 14))
+    with pytest.raises(ValueError):
+        grd.save(str(file))
+    assert not file.exists()
@@ -0,0 +1,108 @@
+""" philoseismos: engineering seismologist's toolbox.
+
+author: Ivan Dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import numpy as np
+import pytest
+
+from philoseismos.grids import TiledGrid, Surfer6BinaryGrid, Surfer7BinaryGrid, mosaic
+
+
+def test_tiled_grid_window(binary_grd_file, surfer7_grd_file, text_grd_file):
+    """ Test windowed reads from the memory-mapped grids. """
+
+    # text grids can not be memory-mapped
+    with pytest.raises(ValueError):
+        TiledGrid.open(text_grd_file)
+
+    tg = TiledGrid.open(binary_grd_file)
+    assert isinstance(tg.grid, Surfer6BinaryGrid)
+    assert (tg.dx, tg.dy) == (1, 2)
+
+    # the binary grid spans x from 0 to 9 with dx=1 and y from 10 to 38 with dy=2
+    window = tg.window(2.5, 5, 14, 19)
+    assert isinstance(window, Surfer6BinaryGrid)
+    assert window.extent == [3, 5, 18, 14]
+    assert np.all(window.dm == np.arange(150).reshape(15, 10)[2:5, 3:6])
+
+    tg = TiledGrid.open(surfer7_grd_file)
+    window = tg.window(8, 100, 36, 100)
+    assert isinstance(window, Surfer7BinaryGrid)
+    assert window.dm.shape == (2, 2)
+    assert np.isnan(window.dm[1, 1])
+
+
+def test_tiled_grid_tiles(binary_grd_file):
+    """ Test iterating over the tiles of the grid. """
+
+    tg = TiledGrid.open(binary_grd_file)
+    tiles = list(tg.tiles(size=4))
+
+    assert len(tiles) == 4 * 3
+    assert tiles[0].dm.shape == (4, 4)
+    assert tiles[-1].dm.shape == (3, 2)
+    assert tiles[-1].extent == [8, 9, 38, 34]
+
+
+def test_mosaic(tmp_path):
+    """ Test combining grids into one. """
+
+    # two planes that overlap between x=10 and x=20
+    left, right = Surfer7BinaryGrid(), Surfer7BinaryGrid()
+    left.xlo, left.xhi, left.ylo, left.yhi = 0, 20, 0, 10
+    right.xlo, right.xhi, right.ylo, right.yhi = 10, 30, 0, 10
+
+    xl, yl = np.meshgrid(np.linspace(0, 20, 21), np.linspace(0, 10, 11))
+    xr, yr = np.meshgrid(np.linspace(10, 30, 11), np.linspace(0, 10, 6))
+    left.dm = xl + 2 * yl
+    right.dm = xr + 2 * yr
+
+    file = str(tmp_path / 'right.grd')
+    right.save(file)
+
+    out = mosaic([left, file], str(tmp_path / 'mosaic.grd'), 0.5, tile_size=7)
+    assert out.extent == [0, 30, 10, 0]
+
+    new = Surfer7BinaryGrid.load(str(tmp_path / 'mosaic.grd'))
+    x, y = np.meshgrid(np.linspace(0, 30, 61), np.linspace(0, 10, 21))
+    assert np.allclose(new.dm, x + 2 * y)
+    assert (new.zlo, new.zhi) == (0, 50)
+
+    # nodes outside all the grids are blanked
+    out = mosaic([left], str(tmp_path / 'mosaic.grd'), 1, extent=(0, 30, 0, 10))
+    new = Surfer7BinaryGrid.load(str(tmp_path / 'mosaic.grd'))
+    assert np.all(np.isnan(new.dm[:, 21:]))
+    assert np.allclose(new.dm[:, :21], left.dm)
+
+
+def test_mosaic_of_narrow_and_fine_grids(tmp_path):
+    """ Test grids a single node wide, and reading fine grids decimated to the mosaic. """
+
+    column = Surfer7BinaryGrid()
+    column.xlo, column.xhi, column.ylo, column.yhi = 2, 2, 0, 4
+    column.dm = np.arange(5.).reshape(5, 1)
+
+    out = mosaic([column], str(tmp_path / 'column.grd'), 1, extent=(0, 4, 0, 4))
+    assert np.allclose(out.dm[:, 2], np.arange(5))
+    assert np.all(out.dm[:, [0, 1, 3, 4]] == out.blank)
+
+    fine = Surfer7BinaryGrid()
+    fine.xlo, fine.xhi, fine.ylo, fine.yhi = 0, 40, 0, 40
+    x, y = np.meshgrid(np.linspace(0, 40, 401), np.linspace(0, 40, 401))
+    fine.dm = x + 2 * y
+
+    source = TiledGrid(fine)
+    shapes = []
+
+    def read(*args, **kwargs):
+        block = TiledGrid.read(source, *args, **kwargs)
+        shapes.append(block.shape)
+        return block
+
+    source.read = read
+
+    out = mosaic([source], str(tmp_path / 'fine.grd'), 4, tile_size=4)
+    x, y = np.meshgrid(np.arange(0, 41, 4), np.arange(0, 41, 4))
+    assert np.allclose(out.dm, x + 2 * y)
+    assert max(max(shape) for shape in shapes) <= 5
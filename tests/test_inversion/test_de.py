@@ -0,0 +1,116 @@
+""" philoseismos: engineering seismologist's toolbox.
+
+author: Ivan Dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import numpy as np
+import pytest
+
+from philoseismos.models.hlm import HorizontallyLayeredMedium
+from philoseismos.inversion import ModelSpace, invert_rdc
+from philoseismos.inversion.de import _misfits
+from philoseismos.dispersion.cache import ForwardCache
+
+
+def test_model_space():
+    """ Test the conversion of parameter vectors into models. """
+
+    with pytest.raises(ValueError):
+        ModelSpace([(1, 2)], [(100, 200)])
+
+    space = ModelSpace([(1, 2), (3, 4)], [(100, 200), (200, 300), (300, 400)])
+    assert space.n_params == 5
+    assert np.all(space.lower == [1, 3, 100, 200, 300])
+
+    hlm = space.to_hlm([1.5, 3.5, 150, 250, 350])
+    assert isinstance(hlm, HorizontallyLayeredMedium)
+    assert hlm.vs == 350
+    assert hlm.vp == 350 * np.sqrt(3)
+
+    # the first layer in the vector is the top one
+    assert hlm._layers[-1].vs == 150
+    assert hlm._layers[-1].h == 1.5
+    assert hlm._layers[0].vs == 250
+
+
+def test_invert_rdc(tmp_path):
+    """ Test the inversion of a synthetic dispersion curve. """
+
+    true = HorizontallyLayeredMedium(vs=450)
+    true.add_layer(vs=200, h=5)
+    rdc = true.rayleigh_dispersion(np.linspace(5, 50, 10))
+
+    space = ModelSpace([(1, 10)], [(100, 300), (300, 600)])
+    file = str(tmp_path / 'models.txt')
+
+    ensemble, misfits = invert_rdc(rdc, space, population=12, generations=15, max_workers=1,
+                                 file=file, seed=42)
+
+    assert len(ensemble) == 12
+    assert np.all(np.diff(misfits) >= 0)
+    assert misfits[0] < 0.05
+    assert abs(ensemble[0].vs - 450) < 60
+    assert np.all(ensemble.misfits == misfits)
+
+    # the initial population and every accepted model are streamed to the file
+    lines = np.loadtxt(file)
+    assert lines.shape[1] == 2 + 3
+    assert np.sum(lines[:, 0] == 0) == 12
+    assert lines[:, 1].min() == pytest.approx(misfits[0], rel=1e-4)
+
+
+def test_invert_rdc_with_cache(tmp_path):
+    """ Test that the cache does not change the result of the inversion. """
+
+    true = HorizontallyLayeredMedium(vs=450)
+    true.add_layer(vs=200, h=5)
+    rdc = true.rayleigh_dispersion(np.linspace(5, 50, 10))
+
+    space = ModelSpace([(1, 10)], [(100, 300), (300, 600)])
+    cache = ForwardCache(tmp_path)
+
+    _, expected = invert_rdc(rdc, space, population=8, generations=3, max_workers=1, seed=1)
+    _, first = invert_rdc(rdc, space, population=8, generations=3, max_workers=1, seed=1,
+                          cache=cache)
+    _, second = invert_rdc(rdc, space, population=8, generations=3, max_workers=1, seed=1,
+                           cache=ForwardCache(tmp_path))
+
+    np.testing.assert_array_equal(first, expected)
+    np.testing.assert_array_equal(second, expected)
+
+
+def test_invert_rdc_first_overtone():
+    """ Test that a higher mode is compared with the same mode of the models. """
+
+    space = ModelSpace([(1, 10)], [(100, 300), (300, 600)])
+    true = [5, 200, 450]
+    rdc = space.to_hlm(true).rayleigh_dispersion(np.linspace(5, 50, 10), modes=2)
+
+    valid = rdc.mask[1]
+    freqs, observed = rdc.freqs[valid], rdc.curves[1, valid]
+
+    assert _misfits(np.array([true]), space, freqs, observed, 120, mode=1)[0] < 1e-3
+    assert _misfits(np.array([true]), space, freqs, observed, 120, mode=0)[0] > 0.1
+
+    ensemble, misfits = invert_rdc(rdc, space, mode=1, population=12, generations=15, max_workers=1, seed=42)
+
+    assert misfits[0] < 0.05
+    assert abs(ensemble[0].vs - 450) < 60
+
+
+def test_invert_rdc_in_processes(tmp_path):
+    """ Test that evaluating the misfits in a pool of processes gives the same result. """
+
+    true = HorizontallyLayeredMedium(vs=450)
+    true.add_layer(vs=200, h=5)
+    rdc = true.rayleigh_dispersion(np.linspace(5, 50, 10))
+
+    space = ModelSpace([(1, 10)], [(100, 300), (300, 600)])
+
+    _, expected = invert_rdc(rdc, space, population=8, generations=3, max_workers=1, seed=1)
+    _, parallel = invert_rdc(rdc, space, population=8, generations=3, max_workers=2, seed=1)
+    _, cached = invert_rdc(rdc, space, population=8, generations=3, max_workers=2, seed=1,
+                           cache=ForwardCache(tmp_path))
+
+    np.testing.assert_array_equal(parallel, expected)
+    np.testing.assert_array_equal(cached, expected)
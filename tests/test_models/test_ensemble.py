@@ -0,0 +1,88 @@
+""" philoseismos: engineering seismologist's toolbox.
+
+author: Ivan Dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import numpy as np
+import pytest
+
+from philoseismos.models.hlm import HorizontallyLayeredMedium
+from philoseismos.models import ensemble as ensemble_module
+from philoseismos.models.ensemble import HLMEnsemble
+
+
+@pytest.fixture
+def ensemble():
+    """ An ensemble of three models with different number of layers. """
+
+    first = HorizontallyLayeredMedium(vp=1500, vs=750, rho=2000)
+
+    second = HorizontallyLayeredMedium(vp=1500, vs=700, rho=2000)
+    second.add_layer(vp=600, vs=300, rho=1500, h=10)
+
+    third = HorizontallyLayeredMedium(vp=1500, vs=800, rho=2000, q=100)
+    third.add_layer(vp=600, vs=300, rho=1500, h=20, q=30)
+    third.add_layer(vp=400, vs=150, rho=1300, h=5, q=10)
+
+    return HLMEnsemble.from_hlms([first, second, third])
+
+
+def test_from_and_to_hlms(ensemble):
+    """ Test the conversion between the ensemble and individual models. """
+
+    assert len(ensemble) == 3
+    assert ensemble.vs.shape == (3, 3)
+    assert ensemble.h.shape == (3, 2)
+    assert np.all(ensemble.mask == [[False, False], [True, False], [True, True]])
+    assert np.all(ensemble.vs[:, -1] == [750, 700, 800])
+    assert np.all(ensemble.vs[2] == [150, 300, 800])
+    assert np.all(ensemble.h == [[0, 0], [10, 0], [5, 20]])
+
+    hlms = ensemble.to_hlms()
+    assert str(hlms[0]) == 'Half-space: vp=1500.0 vs=750.0 rho=2000.0'
+    assert len(hlms[1]._layers) == 1
+    assert hlms[1]._layers[0].vs == 300
+    assert hlms[1].q is None
+
+    third = ensemble[2]
+    assert len(third._layers) == 2
+    assert third._layers[-1].vs == 150  # the top layer
+    assert third._layers[-1].q == 10
+    assert third.q == 100
+
+
+def test_sample(ensemble):
+    """ Test sampling the parameters of all the models on a depth grid. """
+
+    z = np.array([0, 5, 7, 10, 15, 20, 25, 40])
+
+    vs = ensemble.sample(z)
+    assert vs.shape == (3, 8)
+    assert np.all(vs[0] == 750)
+    assert np.all(vs[1] == [300, 300, 300, 300, 700, 700, 700, 700])
+    assert np.all(vs[2] == [150, 150, 300, 300, 300, 300, 300, 800])
+
+    # the same as rasterizing models one by one
+    for i, hlm in enumerate(ensemble.to_hlms()):
+        assert np.all(ensemble.sample(z, 'rho')[i] == hlm.rasterize(z)[2])
+
+    assert np.all(ensemble.median(z) == np.median(vs, axis=0))
+    assert np.all(ensemble.percentile([10, 90], z).shape == (2, 8))
+
+
+def test_sample_in_chunks(ensemble, monkeypatch):
+    """ Test that sampling in chunks of a few models gives the same values. """
+
+    z = np.array([0, 5, 7, 10, 15, 20, 25, 40])
+    expected = ensemble.sample(z)
+
+    # a chunk holds a single model: 2 layers by 8 depths
+    monkeypatch.setattr(ensemble_module, 'ELEMENTS_PER_CHUNK', 20)
+    assert np.all(ensemble.sample(z) == expected)
+
+
+def test_vs30(ensemble):
+    """ Test the time-averaged S-wave velocity in the upper 30 m. """
+
+    expected = [750, 30 / (10 / 300 + 20 / 700), 30 / (5 / 150 + 20 / 300 + 5 / 800)]
+    assert np.allclose(ensemble.vs30(), expected)
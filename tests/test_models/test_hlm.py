@@ -3,9 +3,13 @@
 author: Ivan Dubrovin
 e-mail: io.dubrovin@icloud.com """
 
+import numpy as np
 import pytest
 
 from philoseismos.models.layer import Layer
+from philoseismos.models.hlm import HorizontallyLayeredMedium, export_models_for_tesseral
+from philoseismos.segy.segy import SegY
+from philoseismos.dispersion.rdc import RayleighDispersionCurve
 
 
 def test_hlm_repr(hlm):
@@ -67,11 +71,63 @@ def test_pop_layer(hlm):
     assert layer.vs == 250
 
 
-@pytest.mark.skip
-def test_export_to_segy_for_tesseral(hlm):
+def test_rasterize(hlm):
+    """ Test the method for sampling the parameters at given depths. """
+
+    z = np.array([0, 5, 10, 12, 15, 15.5, 100])
+
+    vp, vs, rho, q = hlm.rasterize(z)
+    assert np.all(vp == 1500)
+    assert np.all(vs == 750)
+    assert np.all(rho == 2000)
+    assert np.all(np.isnan(q))
+
+    hlm.add_layer(vp=600, vs=280, rho=1400, h=5, q=20)
+    hlm.add_layer(vp=350, vs=120, rho=1000, h=10, q=10)
+
+    # samples at the boundaries belong to the upper layer
+    vp, vs, rho, q = hlm.rasterize(z)
+    assert np.all(vp == [350, 350, 350, 600, 600, 1500, 1500])
+    assert np.all(vs == [120, 120, 120, 280, 280, 750, 750])
+    assert np.all(rho == [1000, 1000, 1000, 1400, 1400, 2000, 2000])
+    assert np.all(q[:5] == [10, 10, 10, 20, 20])
+
+
+def test_export_to_segy_for_tesseral(hlm, tmp_path):
     """ Test the method for exporting models for Tesseral in SEG-Y format. """
 
-    pass
+    hlm.add_layer(vp=600, vs=280, rho=1400, h=2, q=20)
+    hlm.export_for_tesseral(0, 100, str(tmp_path / 'model'), dz=0.5, half_space_depth=3)
+
+    vs = SegY.load(str(tmp_path / 'model_vs.sgy'))
+    assert vs.dm._m.shape == (2, 11)
+    assert vs.dm.dt == 500
+    assert np.all(vs.dm._m == [280] * 5 + [750] * 6)
+    assert np.all(vs.g.REC_X == [0, 100])
+
+    rho = SegY.load(str(tmp_path / 'model_rho.sgy'))
+    assert np.all(rho.dm._m == [1400] * 5 + [2000] * 6)
+
+
+def test_export_many_models_for_tesseral(tmp_path):
+    """ Test the concurrent export of many models. """
+
+    models = []
+    for i in range(4):
+        hlm = HorizontallyLayeredMedium(vs=500 + i)
+        hlm.add_layer(vs=100 + i, h=1)
+        models.append(hlm)
+
+    names = [str(tmp_path / f'model_{i}') for i in range(4)]
+
+    with pytest.raises(ValueError):
+        export_models_for_tesseral(models, 0, 10, names[:2], dz=0.5, half_space_depth=1)
+
+    export_models_for_tesseral(models, 0, 10, names, dz=0.5, half_space_depth=1, max_workers=2)
+
+    for i in range(4):
+        vs = SegY.load(f'{names[i]}_vs.sgy')
+        assert np.all(vs.dm._m == [100 + i] * 3 + [500 + i] * 2)
 
 
 def test_get_profiles(hlm):
@@ -95,3 +151,33 @@ def test_get_profiles(hlm):
     assert vp == [200, 200, 400, 400, 1500, 1500]
     assert vs == [100, 100, 200, 200, 750, 750]
     assert rho == [1000, 1000, 1500, 1500, 2000, 2000]
+
+
+def test_rayleigh_dispersion():
+    """ Test the forward computation of the Rayleigh wave dispersion curves. """
+
+    freqs = np.array([5, 20, 100])
+
+    # in a homogeneous half-space with vp / vs = sqrt(3), Rayleigh waves travel at 0.9194 vs
+    homogeneous = HorizontallyLayeredMedium(vs=750)
+    rdc = homogeneous.rayleigh_dispersion(freqs, modes=2)
+    assert isinstance(rdc, RayleighDispersionCurve)
+    assert np.all(rdc.freqs == freqs)
+    assert np.allclose(rdc.modal_curves[0], 0.9194 * 750, rtol=1e-4)
+    assert np.all(np.isnan(rdc.modal_curves[1]))
+
+    # with a slow layer on top, the fundamental mode goes from the velocity of the half-space
+    # at low frequencies to the Rayleigh velocity of the layer at high frequencies
+    hlm = HorizontallyLayeredMedium(vs=750)
+    hlm.add_layer(vs=250, h=5)
+    rdc = hlm.rayleigh_dispersion([1, 10, 30, 200], modes=3)
+    fundamental = rdc.modal_curves[0]
+
+    assert np.all(np.diff(fundamental) < 0)
+    assert 0.9194 * 250 < fundamental[-1] < 0.9194 * 250 * 1.001
+    assert fundamental[0] > 0.9 * 750
+
+    # higher modes appear above their cut-off frequencies and are faster than the fundamental
+    assert np.isnan(rdc.modal_curves[1][0])
+    assert np.all(rdc.modal_curves[1][2:] > fundamental[2:])
+    assert np.all(rdc.modal_curves[2][-1] > rdc.modal_curves[1][-1])
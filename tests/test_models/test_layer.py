@@ -2,3 +2,17 @@
 
 author: Ivan Dubrovin
 e-mail: io.dubrovin@icloud.com """
+
+import pytest
+
+from philoseismos.models.layer import Layer
+
+
+def test_layer_slots():
+    """ Layers do not carry a __dict__, to keep large collections of them light. """
+
+    layer = Layer(vp=600, vs=300, rho=1500, h=10)
+    assert not hasattr(layer, '__dict__')
+
+    with pytest.raises(AttributeError):
+        layer.thickness = 10
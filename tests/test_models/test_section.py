@@ -0,0 +1,92 @@
+""" philoseismos: engineering seismologist's toolbox.
+
+author: Ivan Dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import numpy as np
+import pytest
+
+from philoseismos.models.hlm import HorizontallyLayeredMedium
+from philoseismos.models.section import VsSection
+from philoseismos.dispersion.rdc import RayleighDispersionCurve
+from philoseismos.grids.surfer7binary import Surfer7BinaryGrid
+from philoseismos.segy.segy import SegY
+
+
+@pytest.fixture
+def section():
+    """ A section from two models, given in reversed order of positions. """
+
+    deep = HorizontallyLayeredMedium(vs=600)
+    deep.add_layer(vs=200, h=10)
+
+    shallow = HorizontallyLayeredMedium(vs=400)
+    shallow.add_layer(vs=100, h=5)
+
+    return VsSection.from_models([deep, shallow], [20, 0])
+
+
+def test_rasterize(section):
+    """ Test the interpolation of the profiles between the positions. """
+
+    z = np.array([0, 5, 7, 20])
+    values = section.rasterize([-1, 0, 10, 20, 21], z)
+
+    assert values.shape == (4, 5)
+    assert np.all(np.isnan(values[:, [0, 4]]))
+    np.testing.assert_allclose(values[:, 1], [100, 100, 400, 400])
+    np.testing.assert_allclose(values[:, 3], [200, 200, 200, 600])
+    np.testing.assert_allclose(values[:, 2], [150, 150, 300, 500])
+
+    with pytest.raises(ValueError):
+        VsSection.from_models([HorizontallyLayeredMedium()], [0, 1])
+
+
+def test_from_curves():
+    """ Test the wavelength-depth approximation. """
+
+    rdc = RayleighDispersionCurve([0, 10, 20, 40], [[np.nan, 200, 100, 100]])
+    section = VsSection.from_curves([rdc, rdc], [0, 10], depth_factor=0.5, velocity_factor=1)
+
+    # points at depths of 1.25, 2.5 and 10 m
+    values = section.rasterize([5], [1, 1.25, 2.5, 6.25, 10, 11])[:, 0]
+    np.testing.assert_allclose(values, [np.nan, 100, 100, 150, 200, np.nan])
+
+
+def test_save_surfer(section, tmp_path, monkeypatch):
+    """ Test saving the section as a grid in several chunks. """
+
+    monkeypatch.setattr('philoseismos.models.section.NODES_PER_CHUNK', 12)
+
+    file = str(tmp_path / 'section.grd')
+    x, z = np.linspace(-10, 20, 7), np.arange(0, 12.5, 0.5)
+    section.save_surfer(file, x, z)
+
+    grid = Surfer7BinaryGrid.load(file)
+    assert (grid.nx, grid.ny) == (7, 25)
+    assert (grid.ylo, grid.yhi) == (-12, 0)
+    assert (grid.zlo, grid.zhi) == (100, 600)
+
+    # the grid goes from the bottom up
+    np.testing.assert_array_equal(grid.dm[::-1], section.rasterize(x, z))
+
+
+def test_export_for_tesseral(section, tmp_path, monkeypatch):
+    """ Test the export to SEG-Y in several chunks. """
+
+    monkeypatch.setattr('philoseismos.models.section.NODES_PER_CHUNK', 300)
+
+    file = str(tmp_path / 'section.sgy')
+    x = np.arange(-5, 26, 1.0)
+    section.export_for_tesseral(x, file, dz=0.1, depth=12)
+
+    sgy = SegY.load(file)
+    assert sgy.dm._m.shape == (31, 121)
+    assert sgy.dm.dt == 100
+    np.testing.assert_array_equal(sgy.g.REC_X, x)
+    np.testing.assert_array_equal(sgy.g.TRACENO, np.arange(1, 32))
+
+    # positions outside of the profiles take the closest one
+    np.testing.assert_array_equal(sgy.dm._m[0], sgy.dm._m[5])
+    np.testing.assert_array_equal(sgy.dm._m[-1], sgy.dm._m[-6])
+    np.testing.assert_allclose(sgy.dm._m[15, [0, 60, 120]], [150, 300, 500])
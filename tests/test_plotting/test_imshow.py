@@ -0,0 +1,97 @@
+""" philoseismos: engineering seismologist's toolbox.
+
+author: Ivan Dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+from philoseismos.segy.segy import SegY
+from philoseismos.processing.gain import tpow_gain_dm
+from philoseismos.plotting import imshow
+from philoseismos.plotting.imshow import RasterPyramid, imshow_dm_lod_into, pyramid_of_dm
+
+
+def test_raster_pyramid(monkeypatch):
+    """ Test that the levels keep the extremes, whichever way they are computed. """
+
+    monkeypatch.setattr(imshow, 'TRACES_PER_CHUNK', 8)
+
+    matrix = np.random.default_rng(0).normal(size=(37, 21))
+    matrix[5, 7] = 100
+    matrix[30, 2] = -100
+
+    direct = RasterPyramid(matrix, norm=False)
+    mins, maxs = direct.level(2, 1)
+
+    assert mins.shape == (10, 11)
+    assert maxs[1, 3] == 100
+    assert mins[7, 1] == -100
+    assert maxs[9, 10] == matrix[36, 20]
+
+    # a coarser level is reduced from a finer one, with the same result
+    stepwise = RasterPyramid(matrix, norm=False)
+    stepwise.level(1, 0)
+    for a, b in zip(stepwise.level(2, 1), direct.level(2, 1)):
+        np.testing.assert_array_equal(a, b)
+
+    # peaks are shown with their sign
+    image, extent = direct.view(-0.5, 36.5, -0.5, 20.5, 9, 10)
+    assert image.shape == (11, 10)
+    assert image.max() == 100 and image.min() == -100
+    assert extent == [-0.5, 36.5, 20.5, -0.5]
+
+
+def test_imshow_dm_lod_into():
+    """ Test that the image follows the view and the pyramid is reused. """
+
+    matrix = np.random.default_rng(0).normal(size=(5000, 2000)).astype(np.float32)
+    sgy = SegY.from_matrix(matrix)
+
+    fig, ax = plt.subplots(figsize=(4, 3), dpi=100)
+    im = imshow_dm_lod_into(sgy.dm, ax)
+
+    # the whole matrix is shown decimated
+    width, height = ax.get_window_extent().width, ax.get_window_extent().height
+    rows, cols = im.get_array().shape
+    assert width <= cols < 2 * width
+    assert height <= rows < 2 * height
+
+    # a zoomed view is shown at full resolution
+    ax.set_xlim(100, 200)
+    ax.set_ylim(400, 300)
+    assert im.get_array().shape == (101, 101)
+    assert im.get_extent() == [99.5, 200.5, 400.5, 299.5]
+    np.testing.assert_allclose(im.get_array()[0, 0], matrix[100, 300] / matrix[100].max())
+
+    fig.canvas.draw()
+    assert pyramid_of_dm(sgy.dm) is pyramid_of_dm(sgy.dm)
+
+    plt.close(fig)
+
+
+def test_pyramid_after_processing_in_place():
+    """ Test that the pyramid is rebuilt after the Data Matrix is changed in place. """
+
+    sgy = SegY.from_matrix(np.ones((64, 32), dtype=np.float32))
+
+    fig, ax = plt.subplots(figsize=(1, 1), dpi=10)
+    imshow_dm_lod_into(sgy.dm, ax, norm=False)
+    before = pyramid_of_dm(sgy.dm, norm=False)
+
+    tpow_gain_dm(sgy.dm, 1, inplace=True)
+    gained = sgy.dm._m.max()
+    assert gained < 1
+
+    after = pyramid_of_dm(sgy.dm, norm=False)
+    assert after is not before
+    assert after.level(2, 2)[1].max() == gained
+
+    # the image follows the changed matrix when the view changes
+    im = ax.images[0]
+    ax.set_xlim(0, 63)
+    assert im.get_array().max() == gained
+
+    plt.close(fig)
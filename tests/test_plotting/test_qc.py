@@ -0,0 +1,72 @@
+""" philoseismos: engineering seismologist's toolbox.
+
+author: Ivan Dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import csv
+import os
+
+import numpy as np
+import pytest
+
+from philoseismos.segy.segy import SegY
+from philoseismos.plotting.qc import render_qc, _split, _load_gather
+
+
+@pytest.fixture
+def shots_file(tmp_path):
+    """ A SEG-Y file with three shots of 12 traces. """
+
+    matrix = np.random.default_rng(0).normal(size=(36, 500)).astype(np.float32)
+    sgy = SegY.from_matrix(matrix, sample_interval=1000)
+    sgy.g.FFID = np.repeat([10, 20, 30], 12)
+    sgy.g.OFFSET = np.tile(np.arange(2, 26, 2), 3)
+
+    file = str(tmp_path / 'shots.sgy')
+    sgy.save(file)
+
+    return file
+
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_render_qc(shots_file, tmp_path, max_workers):
+    """ Test rendering of the figures and the index. """
+
+    directory = str(tmp_path / 'qc')
+    summary = render_qc(shots_file, directory, panels=('wiggle', 'spectrum', 'fk', 'dispersion'),
+                        max_workers=max_workers, dpi=30, c_max=500, c_min=50, c_step=10)
+
+    assert summary['gathers'] == 3
+    assert summary['gathers_per_second'] > 0
+
+    with open(os.path.join(directory, 'index.csv')) as f:
+        rows = list(csv.reader(f))
+
+    assert rows[0] == ['FFID', 'TRACES', 'FILE']
+    assert rows[1:] == [['10', '12', '10.png'], ['20', '12', '20.png'], ['30', '12', '30.png']]
+
+    for row in rows[1:]:
+        with open(os.path.join(directory, row[2]), 'rb') as png:
+            assert png.read(8) == b'\x89PNG\r\n\x1a\n'
+
+    with pytest.raises(ValueError):
+        render_qc(shots_file, directory, panels=('wiggle', 'histogram'))
+
+
+def test_split_reads_gathers_lazily(shots_file):
+    """ Test that gathers of a file are loaded from the file by their indices. """
+
+    names, gathers = _split(shots_file, 'FFID')
+    assert names == ['10', '20', '30']
+
+    file, indices = gathers[1]
+    assert file == shots_file
+    assert np.array_equal(indices, np.arange(12, 24))
+
+    sgy = SegY.load(shots_file)
+    dm = _load_gather(file, indices)
+
+    assert dm.dt == sgy.dm.dt
+    assert np.array_equal(dm.t, sgy.dm.t)
+    assert np.array_equal(dm._m, sgy.dm._m[12:24])
+    assert np.array_equal(dm._headers._df.values, sgy.g._df.values[12:24])
@@ -0,0 +1,51 @@
+""" philoseismos: engineering seismologist's toolbox.
+
+author: Ivan Dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+from philoseismos.segy.segy import SegY
+from philoseismos.plotting.wiggle import wiggle_dm_into, _min_max_decimate
+
+
+def test_wiggle_dm_into():
+    """ Test that the wiggles are drawn with two collections and the data is not modified. """
+
+    matrix = np.random.default_rng(0).normal(size=(1000, 3000)).astype(np.float32)
+    sgy = SegY.from_matrix(matrix.copy())
+
+    fig, ax = plt.subplots(figsize=(4, 3), dpi=100)
+    lines, fills = wiggle_dm_into(sgy.dm, ax)
+
+    assert len(ax.collections) == 2
+    assert len(ax.lines) == 0
+    np.testing.assert_array_equal(sgy.dm._m, matrix)
+
+    # traces and samples are decimated to the size of the axes in pixels
+    segments = lines.get_segments()
+    width, height = ax.get_window_extent().width, ax.get_window_extent().height
+    assert len(segments) <= width / 2 + 1
+    assert segments[0].shape[0] <= 2 * height + 2
+
+    plt.close(fig)
+
+    fig, ax = plt.subplots()
+    lines, _ = wiggle_dm_into(sgy.dm, ax, decimate=False)
+    assert len(lines.get_segments()) == 1000
+    plt.close(fig)
+
+
+def test_min_max_decimate():
+    """ Test that the extremes are preserved in their order. """
+
+    matrix = np.array([[0, 5, -1, 2, 0, 0, -3, 1, 0, 4]], dtype=float)
+    t = np.arange(10.)
+
+    values, times = _min_max_decimate(matrix, t, 4)
+
+    np.testing.assert_array_equal(values, [[5, -1, -3, 1, 0, 4]])
+    np.testing.assert_array_equal(times, [[1, 2, 6, 7, 8, 9]])
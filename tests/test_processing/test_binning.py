@@ -0,0 +1,98 @@
+""" philoseismos: engineering seismologist's toolbox.
+
+author: Ivan Dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import numpy as np
+import pytest
+
+from philoseismos.segy.segy import SegY
+from philoseismos.processing import binning
+
+
+def test_midpoints_offsets_azimuths():
+    """ Test the geometry of source-receiver pairs. """
+
+    sx, sy = np.array([0, 0, 10]), np.array([0, 0, 10])
+    rx, ry = np.array([10, 0, 10]), np.array([0, -20, 30])
+
+    # columns of a Geometry can have the object dtype
+    cx, cy = binning.midpoints(sx.astype(object), sy.astype(object), rx, ry)
+    assert np.allclose(cx, [5, 0, 10])
+    assert np.allclose(cy, [0, -10, 20])
+
+    assert np.allclose(binning.offsets(sx.astype(object), sy, rx, ry), [10, 20, 20])
+    assert np.allclose(binning.azimuths(sx, sy, rx, ry), [90, 180, 0])
+
+
+def test_bin_grid_2d():
+    """ Test binning along a line and the fold. """
+
+    grid = binning.BinGrid.fit([0, 2.4, 7.6, 10], [5, -3, 1, 0], 2.5, azimuth=90)
+
+    assert (grid.nx, grid.ny) == (5, 1)
+    assert (grid.x0, grid.y0) == pytest.approx((0, 5))
+
+    bins = grid.bins([0, 1.3, 2.4, 7.6, 10, 12], [0, 100, 0, 0, 0, 0])
+    np.testing.assert_array_equal(bins, [0, 1, 1, 3, 4, -1])
+
+    np.testing.assert_array_equal(grid.fold(bins), [[1, 2, 0, 1, 1]])
+
+
+def test_bin_grid_3d():
+    """ Test binning on a rotated grid. """
+
+    grid = binning.BinGrid(0, 0, 10, 5, azimuth=45, nx=4, ny=3)
+    cx, cy = grid.centers()
+
+    bins = grid.bins(cx.ravel(), cy.ravel())
+    np.testing.assert_array_equal(bins, np.arange(12))
+
+    # 10 m along the inline axis and 5 m along the crossline one
+    assert np.allclose((cx[1, 1], cy[1, 1]), (10 * np.sqrt(.5) + 5 * np.sqrt(.5), 10 * np.sqrt(.5) - 5 * np.sqrt(.5)))
+
+    np.testing.assert_array_equal(grid.bins([-100, cx[2, 3]], [0, cy[2, 3]]), [-1, 11])
+    np.testing.assert_array_equal(grid.fold(np.r_[bins, 5, 5, -1]).ravel(), np.r_[[1] * 5, 3, [1] * 6])
+
+    with pytest.raises(ValueError):
+        binning.BinGrid(0, 0, 10, 5).bins([0], [0])
+    with pytest.raises(ValueError):
+        binning.BinGrid(0, 0, 10).fold([0, 1])
+
+
+def test_gather_indices():
+    """ Test grouping of traces into gathers. """
+
+    values, groups = binning.gather_indices([3, 1, 3, -1, 1, 3])
+
+    np.testing.assert_array_equal(values, [-1, 1, 3])
+    assert [list(group) for group in groups] == [[3], [1, 4], [0, 2, 5]]
+
+
+def test_bin_geometry():
+    """ Test filling of the headers of a SEG-Y file. """
+
+    sgy = SegY.from_matrix(np.zeros((6, 10), dtype=np.float32))
+    sgy.g.SOU_X = np.repeat([0, 10], 3)
+    sgy.g.SOU_Y = 0
+    sgy.g.REC_X = np.tile([10, 20, 30], 2)
+    sgy.g.REC_Y = 0
+
+    grid = binning.BinGrid(5, 0, 5, azimuth=90)
+    bins = binning.bin_geometry(sgy.g, grid)
+
+    np.testing.assert_array_equal(bins, [0, 1, 2, 1, 2, 3])
+    np.testing.assert_array_equal(sgy.g.CDP, [1, 2, 3, 2, 3, 4])
+    np.testing.assert_array_equal(sgy.g.CDP_X, [5, 10, 15, 10, 15, 20])
+    np.testing.assert_array_equal(sgy.g.OFFSET, [10, 20, 30, 0, 10, 20])
+
+
+def test_default_grid_bins_along_x():
+    """ Test that a default grid bins a line with only the X coordinates filled. """
+
+    x, y = np.array([0, 2.4, 7.6, 10]), np.zeros(4)
+
+    np.testing.assert_array_equal(binning.BinGrid(0, 0, 2.5).bins(x, y), [0, 1, 3, 4])
+
+    grid = binning.BinGrid.fit(x, y, 2.5)
+    np.testing.assert_array_equal(grid.fold(grid.bins(x, y)), [[1, 1, 0, 1, 1]])
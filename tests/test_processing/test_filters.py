@@ -0,0 +1,92 @@
+""" philoseismos: engineering seismologist's toolbox.
+
+author: Ivan Dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import numpy as np
+import pytest
+
+from philoseismos.segy.segy import SegY
+from philoseismos.processing import filters
+from philoseismos.processing import gfunc
+
+
+def sines(frequencies, n=4, ns=1000, dt=1000):
+    """ Return a Data Matrix of identical traces, each a sum of sines of the given frequencies. """
+
+    t = np.arange(ns) * dt / 1e6
+    trace = sum(np.sin(2 * np.pi * f * t) for f in frequencies)
+
+    sgy = SegY.from_matrix(np.tile(trace, (n, 1)).astype(np.float32), sample_interval=dt)
+    sgy.dm._headers = sgy.g
+
+    return sgy.dm
+
+
+def amplitude(matrix, dt, f):
+    """ Return the amplitude of the given frequency in the first trace. """
+
+    t = np.arange(matrix.shape[1]) * dt / 1e6
+    return 2 * np.abs(np.mean(matrix[0] * np.exp(-2j * np.pi * f * t)))
+
+
+def test_bandpass_dm(monkeypatch):
+    """ Test that the bandpass keeps the passband, rejects the rest, and fills the headers. """
+
+    monkeypatch.setattr(gfunc, 'ELEMENTS_PER_CHUNK', 3 * 1000)
+
+    dm = sines([5, 40, 200])
+    out = filters.bandpass_dm(dm, 10, 20, 80, 120, workers=2)
+
+    assert out._m.dtype == np.float32
+    assert amplitude(out._m, dm.dt, 40) == pytest.approx(1, abs=0.01)
+    assert amplitude(out._m, dm.dt, 5) < 0.01
+    assert amplitude(out._m, dm.dt, 200) < 0.01
+    assert np.allclose(out._m, out._m[0])
+
+    assert list(out._headers._df.FREQXL) == [15] * 4
+    assert list(out._headers._df.FREQXH) == [100] * 4
+    assert list(dm._headers._df.FREQXL) == [0] * 4
+
+    with pytest.raises(ValueError):
+        filters.bandpass(dm._m, dm.dt, 20, 10, 80, 120)
+
+
+def test_lowpass_does_not_wrap_around():
+    """ Test that an arrival at the end of a trace does not leak into its start. """
+
+    matrix = np.zeros((1, 1000))
+    matrix[0, -1] = 1
+
+    out = filters.lowpass(matrix, 1000, 10, 20)
+    assert np.max(np.abs(out[0, :100])) < 1e-3 * np.max(np.abs(out))
+
+
+def test_notch_and_lowpass_in_place():
+    """ Test that the filters modify the matrix in place. """
+
+    dm = sines([30, 50])
+    matrix = dm._m
+
+    assert filters.notch_dm(dm, 50, 10, inplace=True) is dm
+    assert dm._m is matrix
+
+    # the ends of the traces ring, as the sines start and stop abruptly
+    assert amplitude(dm._m[:, 250:750], dm.dt, 50) < 0.01
+    assert amplitude(dm._m[:, 250:750], dm.dt, 30) == pytest.approx(1, abs=0.01)
+    assert list(dm._headers._df.FREQXN) == [50] * 4
+
+    filters.lowpass(matrix, dm.dt, 10, 20, inplace=True)
+    assert amplitude(matrix, dm.dt, 30) < 0.01
+
+
+def test_butterworth_dm():
+    """ Test the IIR bandpass filter. """
+
+    dm = sines([2, 40, 300])
+    out = filters.butterworth_dm(dm, 10, 100, order=4)
+
+    assert amplitude(out._m, dm.dt, 40) == pytest.approx(1, abs=0.02)
+    assert amplitude(out._m, dm.dt, 2) < 0.01
+    assert amplitude(out._m, dm.dt, 300) < 0.01
+    assert list(out._headers._df.FXLSLOP) == [48] * 4
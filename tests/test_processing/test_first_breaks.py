@@ -0,0 +1,64 @@
+""" philoseismos: engineering seismologist's toolbox.
+
+author: Ivan Dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import numpy as np
+import pytest
+
+from philoseismos.segy.segy import SegY
+from philoseismos.segy.g import Geometry
+from philoseismos.processing import first_breaks
+from philoseismos.processing import gfunc
+
+
+def refraction_shot(n=12, ns=500, dt=500):
+    """ Return a SegY with noisy traces and first arrivals at 20 + 2 * trace ms, the last trace dead. """
+
+    rng = np.random.default_rng(0)
+    t = np.arange(ns) * dt / 1000
+    arrivals = 20 + 2 * np.arange(n)
+
+    matrix = 0.01 * rng.normal(size=(n, ns))
+    after = t >= arrivals[:, None]
+    matrix[after] += np.sin(2 * np.pi * 50 * (t - arrivals[:, None]) / 1000)[after]
+    matrix[-1] = 0
+
+    sgy = SegY.from_matrix(matrix.astype(np.float32), sample_interval=dt)
+    sgy.dm._headers = sgy.g
+
+    return sgy, arrivals
+
+
+@pytest.mark.parametrize('method', ['sta_lta', 'mer'])
+def test_pick_first_breaks_of_dm(monkeypatch, method):
+    """ Test picking in several chunks, and writing the picks into a header. """
+
+    monkeypatch.setattr(gfunc, 'ELEMENTS_PER_CHUNK', 5 * 500)
+
+    sgy, arrivals = refraction_shot()
+    picks = first_breaks.pick_first_breaks_of_dm(sgy.dm, method=method, header='UPHOLE', threshold=0.2)
+
+    assert np.allclose(picks[:-1], arrivals[:-1], atol=3)
+    assert np.isnan(picks[-1])
+    assert list(sgy.g._df.UPHOLE) == list(np.round(picks[:-1]).astype(int)) + [0]
+
+
+def test_pick_first_breaks_in_file(tmp_path, monkeypatch):
+    """ Test picking of a file streamed chunk by chunk. """
+
+    monkeypatch.setattr(gfunc, 'ELEMENTS_PER_CHUNK', 5 * 500)
+
+    sgy, _ = refraction_shot()
+    file = str(tmp_path / 'shot.sgy')
+    sgy.save(file)
+
+    calls = []
+    picks = first_breaks.pick_first_breaks_in_file(file, header='UPHOLE', progress=lambda *args: calls.append(args))
+
+    assert np.allclose(picks, first_breaks.pick_first_breaks(sgy.dm._m, sgy.dm.dt), equal_nan=True)
+    assert calls == [(5, 12), (10, 12), (12, 12)]
+    assert list(Geometry.load(file)._df.UPHOLE) == list(np.round(np.nan_to_num(picks)).astype(int))
+
+    with pytest.raises(ValueError):
+        first_breaks.pick_first_breaks(sgy.dm._m, sgy.dm.dt, method='aic')
@@ -0,0 +1,74 @@
+""" philoseismos: engineering seismologist's toolbox.
+
+author: Ivan Dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import numpy as np
+import pytest
+
+from philoseismos.segy.segy import SegY
+from philoseismos.processing import gain
+from philoseismos.processing import gfunc
+
+
+@pytest.mark.parametrize('kind', ['rms', 'mean'])
+def test_agc(monkeypatch, kind):
+    """ Test AGC against windows computed directly, in several chunks. """
+
+    monkeypatch.setattr(gfunc, 'ELEMENTS_PER_CHUNK', 2 * 100)
+
+    rng = np.random.default_rng(0)
+    matrix = (rng.normal(size=(5, 100)) * np.linspace(1, 100, 100)).astype(np.float32)
+
+    out = gain.agc(matrix, 1000, window=10, kind=kind)
+    assert out.dtype == np.float32
+
+    for j in (0, 3, 50, 99):
+        window = matrix[:, max(0, j - 5):j + 6].astype(float)
+        amplitude = np.sqrt(np.mean(window ** 2, axis=1)) if kind == 'rms' else np.mean(np.abs(window), axis=1)
+        assert np.allclose(out[:, j], matrix[:, j] / amplitude, rtol=1e-5)
+
+
+def test_agc_of_quiet_samples_after_loud_ones():
+    """ Test that AGC keeps its precision in quiet windows after a strong arrival. """
+
+    trace = np.concatenate([np.full(100, 1e4), np.full(1000, 1e-3) * (-1) ** np.arange(1000)])
+
+    out = gain.agc(trace[None], 1000, window=10)
+    assert np.allclose(np.abs(out[0, 200:]), 1, rtol=1e-9)
+
+
+def test_agc_in_place_on_memmap(tmp_path):
+    """ Test that the in-place gain writes into a memory-mapped matrix. """
+
+    matrix = np.lib.format.open_memmap(str(tmp_path / 'm.npy'), mode='w+', dtype=np.float32, shape=(4, 50))
+    matrix[:] = np.random.default_rng(0).normal(size=(4, 50))
+    expected = gain.agc(matrix, 1000, window=20)
+
+    assert gain.agc(matrix, 1000, window=20, inplace=True) is matrix
+    assert np.allclose(matrix, expected)
+
+    with pytest.raises(ValueError):
+        gain.agc(np.ones((2, 5), dtype=np.int32), 1000, inplace=True)
+    with pytest.raises(ValueError):
+        gain.agc(matrix, 1000, kind='max')
+
+
+def test_tpow_gain_and_balance_dm():
+    """ Test the t^n gain and trace balancing of a Data Matrix. """
+
+    sgy = SegY.from_matrix(np.ones((3, 5), dtype=np.float32) * np.array([[1], [2], [4]], dtype=np.float32))
+    sgy.dm._headers = sgy.g
+
+    gained = gain.tpow_gain_dm(sgy.dm, 2)
+    assert np.allclose(gained._m, sgy.dm._m * (np.arange(5) * 500e-6) ** 2)
+    assert np.all(sgy.dm._m[:, 1:] > 0)
+
+    inverse = gain.tpow_gain_dm(sgy.dm, -1)
+    assert np.all(np.isfinite(inverse._m))
+    assert np.all(inverse._m[:, 0] == 0)
+    assert np.allclose(inverse._m[:, 1:], sgy.dm._m[:, 1:] / (np.arange(1, 5) * 500e-6))
+
+    balanced = gain.balance_traces_dm(sgy.dm, kind='mean', inplace=True)
+    assert balanced is sgy.dm
+    assert np.allclose(sgy.dm._m, 1)
@@ -0,0 +1,85 @@
+""" philoseismos: engineering seismologist's toolbox.
+
+author: Ivan Dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import numpy as np
+import pytest
+
+from philoseismos.segy.segy import SegY
+from philoseismos.processing import mute
+from philoseismos.processing import gfunc
+
+
+def ones(n=4, ns=100, dt=1000):
+    """ Return a Data Matrix of ones with offsets of 0, 10, 20, ... m. """
+
+    sgy = SegY.from_matrix(np.ones((n, ns), dtype=np.float32), sample_interval=dt)
+    sgy.g.OFFSET = np.arange(n) * 10
+    sgy.dm._headers = sgy.g
+
+    return sgy.dm
+
+
+def test_taper_mask():
+    """ Test the shapes of the top and the bottom mutes. """
+
+    t = np.arange(10.)
+    top = mute.taper_mask(t, [2, 5], [6, 5])
+
+    assert np.allclose(top[0], [0, 0, 0, 0.5 - 0.5 * np.cos(np.pi / 4), 0.5, 0.5 + 0.5 * np.cos(np.pi / 4), 1, 1, 1, 1])
+    assert np.allclose(top[1], [0] * 5 + [1] * 5)
+    assert np.allclose(mute.taper_mask(t, [2, 5], [6, 5], kind='bottom'), 1 - top)
+
+    with pytest.raises(ValueError):
+        mute.taper_mask(t, [2], [6], kind='middle')
+
+
+def test_mute_dm_from_headers(tmp_path, monkeypatch):
+    """ Test the mute from the headers, in place on a memory-mapped matrix, in chunks. """
+
+    monkeypatch.setattr(gfunc, 'ELEMENTS_PER_CHUNK', 100)
+
+    dm = ones()
+    dm._headers.loc[:, 'TLIVE_S'] = [0, 10, 20, 30]
+    dm._headers.loc[:, 'TFULL_S'] = [0, 20, 30, 50]
+
+    copy = mute.mute_dm(dm)
+    assert np.all(dm._m == 1)
+
+    matrix = np.lib.format.open_memmap(str(tmp_path / 'm.npy'), mode='w+', dtype=np.float32, shape=dm._m.shape)
+    matrix[:] = dm._m
+    dm._m = matrix
+
+    assert mute.mute_dm(dm, inplace=True) is dm
+    assert dm._m is matrix
+    assert np.allclose(matrix, copy._m)
+    assert np.all(matrix[1, :10] == 0) and np.all(matrix[1, 20:] == 1)
+    assert matrix[3, 40] == pytest.approx(0.5)
+
+
+def test_mute_dm_by_table():
+    """ Test the mute from an offset-time table. """
+
+    dm = ones()
+    out = mute.mute_dm_by_table(dm, [0, 30], [10, 40], taper=4)
+
+    assert list(out._headers._df.TLIVE_S) == [10, 20, 30, 40]
+    assert list(out._headers._df.TFULL_S) == [14, 24, 34, 44]
+    assert np.all(out._m[2, :30] == 0) and out._m[2, 32] == pytest.approx(0.5) and np.all(out._m[2, 34:] == 1)
+
+
+def test_mute_dm_by_polygon():
+    """ Test the mute of the samples inside a polygon. """
+
+    dm = ones()
+    polygon = [(-5, 50), (15, 50), (15, 70), (-5, 70)]
+
+    out = mute.mute_dm_by_polygon(dm, polygon)
+    assert np.all(out._m[:2, 51:70] == 0) and np.all(out._m[:2, :50] == 1) and np.all(out._m[2:] == 1)
+
+    tapered = mute.mute_dm_by_polygon(dm, polygon, taper=10)
+    assert 0 < tapered._m[0, 50] < 1 and tapered._m[0, 60] == 0
+
+    outside = mute.mute_dm_by_polygon(dm, polygon, inside=False)
+    assert np.all(outside._m[2:] == 0) and np.all(outside._m[:2, 51:70] == 1)
@@ -0,0 +1,81 @@
+""" philoseismos: engineering seismologist's toolbox.
+
+author: Ivan Dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import numpy as np
+import pytest
+
+from philoseismos.segy.segy import SegY
+from philoseismos.processing import nmo
+from philoseismos.processing import gfunc
+
+
+def reflection_gathers(t0=100, v=500, dt=1000, ns=300):
+    """ Return a SegY with two CDP gathers of a single hyperbolic reflection, traces interleaved. """
+
+    offsets = np.tile(np.arange(0, 60, 5), 2)
+    t = nmo.nmo_times([t0], offsets, v)[:, 0]
+
+    samples = np.arange(ns) * dt / 1000
+    matrix = np.exp(-((samples - t[:, None]) / 4) ** 2).astype(np.float32)
+
+    sgy = SegY.from_matrix(matrix, sample_interval=dt)
+    sgy.g.OFFSET = offsets
+    sgy.g.CDP = np.tile([1, 2], offsets.size // 2)
+    sgy.dm._headers = sgy.g
+
+    return sgy.dm
+
+
+@pytest.mark.parametrize('method', ['linear', 'sinc'])
+def test_nmo_correct_dm(method):
+    """ Test that the reflection is flattened at its zero-offset time. """
+
+    dm = reflection_gathers()
+    corrected = nmo.nmo_correct_dm(dm, 500, method=method, stretch=None)
+
+    assert np.all(np.argmax(corrected._m, axis=1) == 100)
+    assert np.allclose(corrected._m[:, 100], 1, atol=0.02)
+
+
+def test_stretch_mute():
+    """ Test that the shallow samples at far offsets are muted. """
+
+    dm = reflection_gathers()
+    corrected, live = nmo.nmo_correct(dm._m[[0, 10]], dm.dt, np.array([0, 50]), 500, stretch=0.5)
+
+    assert live[0].all()
+    # (t - t0) / t0 <= 0.5 holds for t0 >= 89.4 ms at 50 m and 500 m/s
+    assert not live[1, 89] and live[1, 90]
+    assert np.all(corrected[1, :90] == 0)
+
+
+def test_stack_dm_in_chunks(monkeypatch):
+    """ Test that stacking in chunks gives the same result as stacking at once. """
+
+    dm = reflection_gathers()
+    whole = nmo.stack_dm(dm, np.full(dm.t.size, 500.))
+
+    monkeypatch.setattr(gfunc, 'ELEMENTS_PER_CHUNK', 5 * dm.t.size)
+    grid = nmo.velocity_grid({1: ([0, 300], [500, 500])}, [1, 2], dm.t)
+    chunked = nmo.stack_dm(dm, grid)
+
+    assert whole._m.shape == (2, dm.t.size)
+    assert np.allclose(whole._m, chunked._m)
+    assert np.all(np.argmax(whole._m, axis=1) == 100)
+    np.testing.assert_array_equal(whole._headers.CDP, [1, 2])
+    np.testing.assert_array_equal(whole._headers._df.TRFOLD, [12, 12])
+    np.testing.assert_array_equal(whole._headers.OFFSET, [0, 0])
+
+
+def test_velocity_grid():
+    """ Test interpolation of the velocity picks between CDPs. """
+
+    picks = {10: ([0, 100], [400, 600]), 20: ([0, 100], [600, 800])}
+    grid = nmo.velocity_grid(picks, [5, 15, 25], [0, 50, 100])
+
+    assert np.allclose(grid, [[400, 500, 600], [500, 600, 700], [600, 700, 800]])
+
+    with pytest.raises(ValueError):
+        nmo.velocity_grid({}, [1], [0])
@@ -0,0 +1,56 @@
+""" philoseismos: engineering seismologist's toolbox.
+
+author: Ivan Dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import numpy as np
+import pytest
+
+from philoseismos.segy.segy import SegY
+from philoseismos.processing import gfunc
+
+
+@pytest.mark.parametrize('before, after', [(0, 0), (3, 3), (0, 7), (7, -1), (20, 20)])
+def test_window_mean(before, after):
+    """ Test the means over windows against ones computed directly, shorter at the ends. """
+
+    a = np.random.default_rng(0).normal(size=(3, 30))
+    out = gfunc.window_mean(a, before, after)
+
+    for j in range(30):
+        window = a[:, max(0, j - before):j + after + 1]
+        expected = window.mean(axis=1) if window.shape[1] else 0
+        assert np.allclose(out[:, j], expected)
+
+
+def test_window_mean_after_loud_samples():
+    """ Test that the means of quiet windows are exact after loud ones. """
+
+    a = np.concatenate([np.full(100, 1e8), np.full(1000, 1e-6)])
+
+    assert np.allclose(gfunc.window_mean(a, 5, 5)[200:], 1e-6, rtol=1e-12, atol=0)
+
+
+def test_apply_by_chunks(monkeypatch):
+    """ Test that the function gets the chunks with the slices of their rows. """
+
+    monkeypatch.setattr(gfunc, 'ELEMENTS_PER_CHUNK', 20)
+    matrix = np.arange(60, dtype=np.int16).reshape(6, 10)
+
+    out = gfunc.apply_by_chunks(matrix, lambda chunk, rows: chunk + np.arange(rows.start, rows.stop)[:, None], False)
+    assert out.dtype == np.float32
+    assert np.all(out == matrix + np.arange(6)[:, None])
+
+    with pytest.raises(ValueError):
+        gfunc.apply_by_chunks(matrix, lambda chunk, rows: chunk, True)
+
+
+def test_process_dm_without_headers():
+    """ Test that a Data Matrix without headers is copied. """
+
+    sgy = SegY.from_matrix(np.ones((3, 5), dtype=np.float32))
+    assert sgy.dm._headers is None
+
+    new = gfunc.process_dm(sgy.dm, False, lambda matrix: matrix * 2)
+    assert new._headers is None
+    assert np.all(new._m == 2) and np.all(sgy.dm._m == 1)
@@ -0,0 +1,63 @@
+""" philoseismos: engineering seismologist's toolbox.
+
+author: Ivan Dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import numpy as np
+
+from philoseismos.segy.segy import SegY
+from philoseismos.processing import semblance
+from philoseismos.processing import gfunc
+from philoseismos.processing.nmo import nmo_times
+
+
+def reflection_gather(t0=100, v=500, dt=1000, ns=200):
+    """ Return a Data Matrix with a CDP gather of a single hyperbolic reflection. """
+
+    offsets = np.arange(0, 60, 5)
+    t = nmo_times([t0], offsets, v)[:, 0]
+
+    samples = np.arange(ns) * dt / 1000
+    matrix = np.exp(-((samples - t[:, None]) / 4) ** 2)
+
+    # semblance does not depend on the amplitude, so the tails of the wavelet need some noise
+    matrix += np.random.default_rng(0).normal(scale=0.05, size=matrix.shape)
+
+    sgy = SegY.from_matrix(matrix.astype(np.float32), sample_interval=dt)
+    sgy.g.OFFSET = offsets
+    sgy.dm._headers = sgy.g
+
+    return sgy.dm
+
+
+def test_velocity_spectrum_of_dm(monkeypatch):
+    """ Test that the semblance peaks at the velocity and time of the reflection. """
+
+    dm = reflection_gather()
+    S = semblance.velocity_spectrum_of_dm(dm, 300, 800, 10, window=10)
+    t, vs = semblance.velocity_spectrum_axes(dm, 300, 800, 10)
+
+    assert S.shape == (t.size, vs.size)
+    assert S.min() >= 0 and S.max() <= 1 + 1e-9
+
+    # the peak is within the window and the velocity resolution of a short spread
+    i, j = np.unravel_index(np.argmax(S), S.shape)
+    assert abs(t[i] - 100) <= 5 and abs(vs[j] - 500) <= 20
+    assert S[100, vs == 500] > 0.9
+
+    # computing in blocks of trial velocities gives the same result
+    monkeypatch.setattr(gfunc, 'ELEMENTS_PER_CHUNK', 3 * dm._m.size)
+    assert np.allclose(semblance.velocity_spectrum_of_dm(dm, 300, 800, 10, window=10), S)
+
+
+def test_velocity_spectra_of_dms():
+    """ Test the velocity analysis of a batch of gathers in processes. """
+
+    dms = [reflection_gather(v=400), reflection_gather(v=600)]
+
+    serial = semblance.velocity_spectra_of_dms(dms, 300, 800, 10, max_workers=1)
+    parallel = semblance.velocity_spectra_of_dms(dms, 300, 800, 10, max_workers=2)
+
+    assert all(np.allclose(a, b) for a, b in zip(serial, parallel))
+    assert np.allclose([300 + 10 * np.argmax(S.max(axis=0)) for S in serial], [400, 600], atol=20)
+
@@ -0,0 +1,30 @@
+""" philoseismos: engineering seismologist's toolbox.
+
+author: Ivan Dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import numpy as np
+import pandas as pd
+
+from philoseismos.segy import constants as const
+from philoseismos.segy.dm import DataMatrix
+from philoseismos.segy.g import Geometry
+from philoseismos.processing import gfunc
+from philoseismos.processing.spectra import dispersion_image_of_dm
+
+
+def test_dispersion_image_of_dm_in_chunks(monkeypatch):
+    """ Test that the dispersion image does not depend on the number of frequencies processed at a time. """
+
+    dm = DataMatrix()
+    dm._m = np.random.default_rng(0).normal(size=(12, 200))
+    dm.dt = 1000
+    dm._headers = Geometry()
+    dm._headers._df = pd.DataFrame(np.zeros((12, 90), dtype=int), columns=const.THCOLS)
+    dm._headers._df.OFFSET = np.arange(2, 26, 2)
+
+    expected = dispersion_image_of_dm(dm, c_max=500, c_min=50, c_step=10)
+
+    # three frequencies at a time
+    monkeypatch.setattr(gfunc, 'ELEMENTS_PER_CHUNK', 3 * 12 * 46)
+    assert np.allclose(dispersion_image_of_dm(dm, c_max=500, c_min=50, c_step=10), expected)
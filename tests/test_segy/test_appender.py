@@ -0,0 +1,80 @@
+""" philoseismos: engineering seismologist's toolbox.
+
+author: Ivan Dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import shutil
+
+import numpy as np
+import pytest
+
+from philoseismos.segy.segy import SegY
+from philoseismos.segy.appender import SegYAppender, NO_TRACES_OFFSET
+
+
+def test_append(tmp_path):
+    """ Test appending shots to a file. """
+
+    rng = np.random.default_rng(0)
+    shots = [rng.normal(size=(n, 100)).astype(np.float32) for n in (5, 3, 4)]
+
+    file = str(tmp_path / 'line.sgy')
+    SegY.from_matrix(shots[0]).save(file)
+
+    with SegYAppender(file) as appender:
+        assert appender.no_traces == 5
+
+        for shot in shots[1:]:
+            sgy = SegY.from_matrix(shot)
+            sgy.g.REC_X = np.arange(shot.shape[0]) * 0.5
+            sgy.g.loc[:, 'SEQNO'] = np.arange(1, shot.shape[0] + 1)
+            appender.append(sgy)
+
+        assert appender.no_traces == 12
+
+        with pytest.raises(ValueError):
+            appender.append(SegY.from_matrix(shots[0][:, :50]))
+        with pytest.raises(ValueError):
+            appender.append(SegY.from_matrix(shots[0].astype(np.int16)))
+        with pytest.raises(ValueError):
+            appender.append(SegY.from_matrix(shots[0], sample_interval=1000))
+
+        # the appended SegY object keeps its own trace numbers
+        assert list(sgy.g.TRACENO) == [1, 2, 3, 4]
+
+    loaded = SegY.load(file)
+    np.testing.assert_array_equal(loaded.dm._m, np.concatenate(shots))
+    np.testing.assert_array_equal(loaded.g.REC_X[5:], [0, 0.5, 1, 0, 0.5, 1, 1.5])
+    np.testing.assert_array_equal(loaded.g.TRACENO, np.arange(1, 13))
+    np.testing.assert_array_equal(loaded.g._df.SEQNO, [0] * 5 + list(range(6, 13)))
+
+    with open(file, 'br') as f:
+        f.seek(NO_TRACES_OFFSET)
+        assert int.from_bytes(f.read(8), 'big') == 12
+
+    # a partially written trace is cut off
+    with open(file, 'ba') as f:
+        f.write(bytes(300))
+
+    with SegYAppender(file) as appender:
+        assert appender.no_traces == 12
+        appender.append(SegY.from_matrix(shots[0]))
+
+    np.testing.assert_array_equal(SegY.load(file).dm._m, np.concatenate(shots + shots[:1]))
+
+
+def test_append_little_endian(manually_crafted_little_endian_segy_file, tmp_path):
+    """ Test appending to a little endian file. """
+
+    file = str(tmp_path / 'little.sgy')
+    shutil.copy(manually_crafted_little_endian_segy_file, file)
+
+    original = SegY.load(file)
+
+    with SegYAppender(file) as appender:
+        assert appender.endian == '<'
+        appender.append(original)
+
+    loaded = SegY.load(file)
+    np.testing.assert_array_equal(loaded.dm._m, np.concatenate([original.dm._m] * 2))
+    np.testing.assert_array_equal(loaded.g.REC_X, np.tile(original.g.REC_X, 2))
@@ -0,0 +1,47 @@
+""" philoseismos: engineering seismologist's toolbox.
+
+author: Ivan Dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import numpy as np
+
+from philoseismos.segy.segy import SegY
+from philoseismos.segy.editor import HeaderEditor
+
+
+def test_header_editor(tmp_path):
+    """ Test that the headers are changed in place and the samples are not touched. """
+
+    matrix = np.random.default_rng(0).normal(size=(10, 50)).astype(np.float32)
+    sgy = SegY.from_matrix(matrix)
+    sgy.g.SOU_X = 1.5
+    sgy.g.REC_X = np.arange(10) * 2.25
+    sgy.g.COORDSC = [-100] * 5 + [10] * 5
+
+    file = str(tmp_path / 'file.sgy')
+    sgy.save(file)
+
+    with open(file, 'br') as f:
+        before = f.read()
+
+    with HeaderEditor(file) as headers:
+        assert len(headers) == 10
+        np.testing.assert_allclose(headers['REC_X'][:5], np.arange(5) * 2.25)
+        np.testing.assert_array_equal(headers['TRACENO'], np.arange(1, 11))
+
+        headers['OFFSET'] = np.round(headers['REC_X'] - headers['SOU_X'])
+        headers['REC_Y'] = 100.25
+
+    loaded = SegY.load(file)
+    np.testing.assert_array_equal(loaded.dm._m, matrix)
+    np.testing.assert_array_equal(loaded.g.REC_Y, [100.25] * 5 + [100] * 5)
+    np.testing.assert_array_equal(loaded.g.OFFSET, np.round(loaded.g.REC_X - loaded.g.SOU_X))
+
+    # only the headers are changed
+    with open(file, 'br') as f:
+        after = f.read()
+
+    records = np.frombuffer(after[3600:], dtype=np.uint8).reshape(10, -1)
+    original = np.frombuffer(before[3600:], dtype=np.uint8).reshape(10, -1)
+    assert after[:3600] == before[:3600]
+    np.testing.assert_array_equal(records[:, 240:], original[:, 240:])
@@ -7,7 +7,12 @@ e-mail: io.dubrovin@icloud.com """
 
 import random
 
+import numpy as np
+import pandas as pd
+import pytest
+
 from philoseismos.segy import gfunc
+from philoseismos.segy.constants import THCOLS
 
 
 # there are 2 types of value getting functions in gfunc: `get_` functions and `grab_` functions.
@@ -172,3 +177,20 @@ def test_unpack_ibm32_series():
 
     assert gfunc.unpack_ibm32_series(big_endian, '>') == (-118.625, 118.625, 0, 601)
     assert gfunc.unpack_ibm32_series(little_endian, '<') == (-118.625, 118.625, 0, 601)
+
+
+def test_pack_trace_records():
+    """ Test packing trace headers and samples into trace records. """
+
+    headers = pd.DataFrame(np.zeros((3, len(THCOLS)), dtype=int), columns=THCOLS)
+    headers['TRACENO'] = [1, 2, 3]
+    matrix = np.arange(12, dtype=np.float32).reshape(3, 4)
+
+    records = gfunc.pack_trace_records(headers, matrix, '>', 5)
+    assert list(records['header']['TRACENO']) == [1, 2, 3]
+    assert np.all(records['samples'] == matrix)
+
+    # TRC_TYPE is a 2-byte field, a value that does not fit is not wrapped around silently
+    headers['TRC_TYPE'] = [1, 2 ** 15, 3]
+    with pytest.raises(ValueError):
+        gfunc.pack_trace_records(headers, matrix, '>', 5)
@@ -0,0 +1,61 @@
+""" philoseismos: engineering seismologist's toolbox.
+
+author: Ivan Dubrovin
+e-mail: io.dubrovin@icloud.com """
+
+import os
+
+import numpy as np
+import pytest
+
+from philoseismos.segy.segy import SegY
+from philoseismos.segy import sort
+
+
+@pytest.mark.parametrize('read_ahead', [True, False])
+def test_sort_segy(tmp_path, monkeypatch, read_ahead):
+    """ Test sorting of shot gathers into CDP gathers in several chunks. """
+
+    monkeypatch.setattr(sort, 'BYTES_PER_CHUNK', 5 * (240 + 4 * 20))
+
+    rng = np.random.default_rng(0)
+    matrix = rng.normal(size=(24, 20)).astype(np.float32)
+
+    sgy = SegY.from_matrix(matrix)
+    sgy.g.FFID = np.repeat([1, 2, 3], 8)
+    sgy.g.CDP = np.tile(np.arange(8), 3) + np.repeat([0, 1, 2], 8)
+    sgy.g.OFFSET = np.tile(np.arange(8) * 5, 3)
+
+    file, output = str(tmp_path / 'shots.sgy'), str(tmp_path / 'cdps.sgy')
+    sgy.save(file)
+
+    calls = []
+    permutation = sort.sort_segy(file, output, ['CDP', 'OFFSET'], read_ahead=read_ahead,
+                                 progress=lambda done, total: calls.append((done, total)))
+
+    expected = np.lexsort([sgy.g.OFFSET.values, sgy.g.CDP.values])
+    np.testing.assert_array_equal(permutation, expected)
+    assert calls == [(5, 24), (10, 24), (15, 24), (20, 24), (24, 24)]
+
+    loaded = SegY.load(output)
+    np.testing.assert_array_equal(loaded.dm._m, matrix[expected])
+    np.testing.assert_array_equal(loaded.g.CDP, sgy.g.CDP.values[expected])
+    np.testing.assert_array_equal(loaded.g.FFID, sgy.g.FFID.values[expected])
+    assert loaded.bfh._dict == SegY.load(file).bfh._dict
+
+
+def test_sort_segy_into_itself(tmp_path):
+    """ Test that the file can not be sorted into itself. """
+
+    file = str(tmp_path / 'shots.sgy')
+    SegY.from_matrix(np.ones((4, 10), dtype=np.float32)).save(file)
+
+    with open(file, 'rb') as f:
+        contents = f.read()
+
+    same = os.path.join(str(tmp_path), '.', 'shots.sgy')
+    with pytest.raises(ValueError):
+        sort.sort_segy(file, same, 'CDP')
+
+    with open(file, 'rb') as f:
+        assert f.read() == contents